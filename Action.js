@@ -1,5 +1,12 @@
 // src/models/Action.js - Action model for task and workflow management
 const mongoose = require('mongoose');
+const { EventEmitter } = require('events');
+const ApprovalQueueItem = require('./ApprovalQueueItem');
+const ActionLog = require('./ActionLog');
+const actionLogger = require('../services/actionLogger');
+
+// Local notifications for the scheduler when an action's due time changes
+const scheduleEvents = new EventEmitter();
 
 const actionSchema = new mongoose.Schema({
   type: {
@@ -66,6 +73,19 @@ const actionSchema = new mongoose.Schema({
   },
   nextRunAt: Date,
 
+  // When the scheduler should next execute this action (derived, see computeDueAt)
+  dueAt: Date,
+  // Scheduler lease: the node executing the action and until when
+  lockedBy: String,
+  lockedUntil: Date,
+  attempts: {
+    type: Number,
+    default: 0
+  },
+  lastRunAt: Date,
+  // scheduledFor while the action is still open (not completed or cancelled)
+  deadlineAt: Date,
+
   // Assignment
   assignedTo: {
     type: mongoose.Schema.Types.ObjectId,
@@ -86,28 +106,16 @@ const actionSchema = new mongoose.Schema({
   startedAt: Date,
   completedAt: Date,
 
-  // Results and logs
+  // Results (execution logs live in the ActionLog collection)
   result: {
     success: Boolean,
     message: String,
     data: mongoose.Schema.Types.Mixed
   },
 
-  executionLogs: [{
-    timestamp: {
-      type: Date,
-      default: Date.now
-    },
-    level: {
-      type: String,
-      enum: ['info', 'warning', 'error', 'debug'],
-      default: 'info'
-    },
-    message: String,
-    details: mongoose.Schema.Types.Mixed
-  }],
-
-  // Dependencies
+  // Dependencies on upstream actions: this action `requires` the upstream
+  // one to complete, is `blocks`-ed until it finishes either way, or is
+  // `triggers`-ed (started at once) when it completes
   dependencies: [{
     action: {
       type: mongoose.Schema.Types.ObjectId,
@@ -118,6 +126,14 @@ const actionSchema = new mongoose.Schema({
       enum: ['blocks', 'triggers', 'requires']
     }
   }],
+  // Upstream requires/blocks actions still unfinished; not due until empty
+  waitingOn: [{
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Action'
+  }],
+  // When the last prerequisite finished, and when a trigger fired
+  readyAt: Date,
+  triggeredAt: Date,
 
   // Notifications
   notifyOnCompletion: {
@@ -159,10 +175,181 @@ actionSchema.index({ assignedTo: 1 });
 actionSchema.index({ scheduledFor: 1 });
 actionSchema.index({ createdAt: -1 });
 
+// Scheduler: due actions in time order
+actionSchema.index({ dueAt: 1 }, { sparse: true });
+
+// Overdue queue: open actions by deadline, overall and per assignee
+actionSchema.index({ deadlineAt: 1 });
+actionSchema.index({ assignedTo: 1, deadlineAt: 1 });
+
+// Dependency graph: downstream actions of a finished one
+actionSchema.index({ waitingOn: 1 });
+actionSchema.index({ 'dependencies.action': 1 });
+
 // Compound indexes
 actionSchema.index({ status: 1, priority: -1 });
 actionSchema.index({ assignedTo: 1, status: 1 });
 
+const PREREQUISITE_TYPES = ['requires', 'blocks'];
+const FINISHED_STATUSES = ['Completed', 'Failed', 'Cancelled'];
+
+// Types the scheduler executes (see services/actionHandlers). Other types are
+// manual tasks: scheduledFor is only their due date and they never get a dueAt.
+const SCHEDULED_TYPES = [
+  'Send Notification',
+  'Send Reminder',
+  'Generate Report',
+  'Process Payroll',
+  'Backup Data',
+  'Lock Salary'
+];
+
+// Upper bound on actions visited when walking a dependency graph
+const MAX_GRAPH_SIZE = 5000;
+
+// Helper to step a date forward by one recurrence period
+const addPeriod = (date, pattern) => {
+  const next = new Date(date);
+  switch (pattern) {
+    case 'daily':
+      next.setDate(next.getDate() + 1);
+      break;
+    case 'weekly':
+      next.setDate(next.getDate() + 7);
+      break;
+    case 'monthly':
+      next.setMonth(next.getMonth() + 1);
+      break;
+    case 'quarterly':
+      next.setMonth(next.getMonth() + 3);
+      break;
+    case 'yearly':
+      next.setFullYear(next.getFullYear() + 1);
+      break;
+  }
+  return next;
+};
+
+// Helper to find the first occurrence after `now`, stepping from the last
+// occurrence so recurring runs don't drift and missed runs aren't replayed
+const nextOccurrence = (pattern, from, now = new Date()) => {
+  let next = addPeriod(from || now, pattern);
+  while (next <= now) {
+    next = addPeriod(next, pattern);
+  }
+  return next;
+};
+
+// Helper to work out when the scheduler should next run an action
+// (dueAtExpression below is the same rule for pipeline updates)
+const computeDueAt = (action) => {
+  if (!SCHEDULED_TYPES.includes(action.type)) return null;
+  if (action.status === 'Cancelled') return null;
+  if (action.requiresApproval && !action.approvedBy) return null;
+  if (action.waitingOn && action.waitingOn.length) return null;
+  if (action.isRecurring && action.recurringPattern) {
+    return action.nextRunAt || action.scheduledFor || null;
+  }
+  if (action.status !== 'Pending') return null;
+  if (action.triggeredAt) return action.triggeredAt;
+  if (action.readyAt) {
+    return action.scheduledFor > action.readyAt ? action.scheduledFor : action.readyAt;
+  }
+  return action.scheduledFor || null;
+};
+
+// Helper to work out the deadline an open action can become overdue at
+const computeDeadline = (action) =>
+  ['Completed', 'Cancelled'].includes(action.status) ? null : action.scheduledFor || null;
+
+const deadlineExpression = {
+  $cond: [{ $in: ['$status', ['Completed', 'Cancelled']] }, null, { $ifNull: ['$scheduledFor', null] }]
+};
+
+const isSet = (field) => ({ $ne: [{ $ifNull: [field, null] }, null] });
+const dueAtExpression = {
+  $switch: {
+    branches: [
+      { case: { $not: [{ $in: ['$type', SCHEDULED_TYPES] }] }, then: null },
+      { case: { $eq: ['$status', 'Cancelled'] }, then: null },
+      { case: { $and: ['$requiresApproval', { $not: ['$approvedBy'] }] }, then: null },
+      { case: { $gt: [{ $size: { $ifNull: ['$waitingOn', []] } }, 0] }, then: null },
+      {
+        case: { $and: ['$isRecurring', isSet('$recurringPattern')] },
+        then: { $ifNull: ['$nextRunAt', { $ifNull: ['$scheduledFor', null] }] }
+      },
+      { case: { $ne: ['$status', 'Pending'] }, then: null },
+      { case: isSet('$triggeredAt'), then: '$triggeredAt' },
+      { case: isSet('$readyAt'), then: { $max: ['$readyAt', '$scheduledFor'] } }
+    ],
+    default: { $ifNull: ['$scheduledFor', null] }
+  }
+};
+
+// Helper to check whether any upstream path from `ids` leads back to `targetId`
+const leadsTo = async (Action, ids, targetId) => {
+  const seen = new Set();
+  let frontier = ids;
+  while (frontier.length && seen.size < MAX_GRAPH_SIZE) {
+    const upstream = await Action.find({ _id: { $in: frontier } }).select('dependencies.action').lean();
+    frontier = [];
+    for (const action of upstream) {
+      for (const dependency of action.dependencies || []) {
+        if (!dependency.action) continue;
+        if (dependency.action.equals(targetId)) return true;
+        const key = String(dependency.action);
+        if (!seen.has(key)) {
+          seen.add(key);
+          frontier.push(dependency.action);
+        }
+      }
+    }
+  }
+  return false;
+};
+
+// Helper to check dependencies and work out which prerequisites are still
+// unfinished. A failed or cancelled required action cancels this one.
+const resolvePrerequisites = async (action) => {
+  const Action = action.constructor;
+  const edges = action.dependencies.filter(dependency => dependency.action);
+  const ids = [...new Map(edges.map(dependency => [String(dependency.action), dependency.action])).values()];
+
+  if (ids.some(id => id.equals(action._id))) {
+    action.invalidate('dependencies', 'An action cannot depend on itself');
+    return;
+  }
+
+  const upstream = await Action.find({ _id: { $in: ids } }).select('status').lean();
+  if (upstream.length !== ids.length) {
+    action.invalidate('dependencies', 'Dependent action not found');
+    return;
+  }
+  if (!action.isNew && ids.length && await leadsTo(Action, ids, action._id)) {
+    action.invalidate('dependencies', 'Dependencies cannot form a cycle');
+    return;
+  }
+
+  const statusOf = new Map(upstream.map(row => [String(row._id), row.status]));
+  const prerequisites = edges.filter(dependency => PREREQUISITE_TYPES.includes(dependency.type));
+  const failed = prerequisites.some(dependency => dependency.type === 'requires' &&
+    ['Failed', 'Cancelled'].includes(statusOf.get(String(dependency.action))));
+
+  if (failed && action.status === 'Pending') {
+    action.status = 'Cancelled';
+    action.result = { success: false, message: 'A required action did not complete' };
+    return;
+  }
+
+  const waiting = prerequisites.filter(dependency => dependency.type === 'requires'
+    ? statusOf.get(String(dependency.action)) !== 'Completed'
+    : !FINISHED_STATUSES.includes(statusOf.get(String(dependency.action))));
+  action.waitingOn = [...new Set(waiting.map(dependency => String(dependency.action)))];
+  if (prerequisites.length && !action.waitingOn.length && !action.readyAt) {
+    action.readyAt = new Date();
+  }
+};
+
 // Virtual for time elapsed
 actionSchema.virtual('timeElapsed').get(function() {
   if (!this.startedAt) return null;
@@ -172,8 +359,8 @@ actionSchema.virtual('timeElapsed').get(function() {
 
 // Virtual for is overdue
 actionSchema.virtual('isOverdue').get(function() {
-  if (!this.scheduledFor || this.status === 'Completed') return false;
-  return new Date() > this.scheduledFor;
+  if (!this.deadlineAt) return false;
+  return new Date() > this.deadlineAt;
 });
 
 // Static method to get actions by status
@@ -194,12 +381,14 @@ actionSchema.statics.getUserActions = function(userId, status = null) {
     .sort({ scheduledFor: 1, createdAt: -1 });
 };
 
-// Static method to get overdue actions
-actionSchema.statics.getOverdueActions = function() {
-  return this.find({
-    scheduledFor: { $lt: new Date() },
-    status: { $nin: ['Completed', 'Cancelled'] }
-  }).populate('assignedTo', 'name email');
+// Static method to get overdue actions (a range on the deadline index)
+actionSchema.statics.getOverdueActions = function(assignedTo = null) {
+  const query = { deadlineAt: { $lt: new Date() } };
+  if (assignedTo) query.assignedTo = assignedTo;
+
+  return this.find(query)
+    .populate('assignedTo', 'name email')
+    .sort({ deadlineAt: 1 });
 };
 
 // Method to start action
@@ -208,11 +397,7 @@ actionSchema.methods.start = function() {
   this.startedAt = new Date();
   this.progress = 10;
 
-  this.executionLogs.push({
-    level: 'info',
-    message: 'Action started',
-    details: { startedAt: this.startedAt }
-  });
+  actionLogger.log(this._id, 'info', 'Action started', { startedAt: this.startedAt });
 
   return this.save();
 };
@@ -224,15 +409,11 @@ actionSchema.methods.complete = function(result = {}) {
   this.progress = 100;
   this.result = result;
 
-  this.executionLogs.push({
-    level: 'info',
-    message: 'Action completed',
-    details: { completedAt: this.completedAt, result }
-  });
+  actionLogger.log(this._id, 'info', 'Action completed', { completedAt: this.completedAt, result });
 
   // Schedule next run if recurring
   if (this.isRecurring && this.recurringPattern) {
-    this.scheduleNextRun();
+    this.nextRunAt = nextOccurrence(this.recurringPattern, this.nextRunAt || this.scheduledFor);
   }
 
   return this.save();
@@ -246,58 +427,256 @@ actionSchema.methods.fail = function(error) {
     message: error.message || 'Action failed'
   };
 
-  this.executionLogs.push({
-    level: 'error',
-    message: 'Action failed',
-    details: { error: error.message || error }
-  });
+  actionLogger.log(this._id, 'error', 'Action failed', { error: error.message || error });
 
   return this.save();
 };
 
-// Method to add execution log
+// Method to add execution log (buffered append, the action isn't saved)
 actionSchema.methods.addLog = function(level, message, details = null) {
-  this.executionLogs.push({
-    level,
-    message,
-    details
-  });
-  return this.save();
+  actionLogger.log(this._id, level, message, details);
+  return Promise.resolve(this);
+};
+
+// Method to get execution logs, oldest first
+actionSchema.methods.getLogs = function(options = {}) {
+  return ActionLog.getForAction(this._id, options);
 };
 
 // Method to schedule next run (for recurring actions)
 actionSchema.methods.scheduleNextRun = function() {
   if (!this.recurringPattern) return;
 
+  this.nextRunAt = addPeriod(new Date(), this.recurringPattern);
+  return this.save();
+};
+
+// Static method to fill dueAt and deadlineAt for actions saved before they
+// existed, and to take manual task types back out of the schedule
+actionSchema.statics.backfillDueAt = function() {
+  return this.updateMany(
+    {
+      $or: [
+        { dueAt: { $exists: false } },
+        { deadlineAt: { $exists: false } },
+        { dueAt: { $ne: null }, type: { $nin: SCHEDULED_TYPES } }
+      ]
+    },
+    [{ $set: { dueAt: dueAtExpression, deadlineAt: deadlineExpression } }]
+  );
+};
+
+// Static method to tell local listeners (the overdue tracker) about deadline changes
+actionSchema.statics.announceDeadlines = function(actions) {
+  actions.forEach(action => {
+    scheduleEvents.emit('deadline', {
+      id: String(action._id),
+      deadlineAt: action.deadlineAt || null,
+      assignedTo: action.assignedTo ? String(action.assignedTo) : null
+    });
+  });
+};
+
+// Static method to apply pipeline $set stages and recompute dueAt
+actionSchema.statics.updateSchedule = function(filter, ...stages) {
+  return this.updateMany(filter, [...stages.map(fields => ({ $set: fields })), { $set: { dueAt: dueAtExpression } }]);
+};
+
+// Static method to tell local listeners (the scheduler) about new due times
+actionSchema.statics.announceSchedule = async function(ids) {
+  if (!ids.length) return;
+  const actions = await this.find({ _id: { $in: ids } }).select('dueAt category').lean();
+  actions.forEach(action => {
+    scheduleEvents.emit('scheduled', { id: String(action._id), dueAt: action.dueAt, category: action.category });
+  });
+};
+
+// Static method to move the dependency graph on once an action finishes:
+// completion fires `triggers` edges and releases dependents; failure or
+// cancellation cancels everything that `requires` it, transitively, and
+// releases what it only `blocks`. Dependents are updated in place, so
+// independent branches run as soon as their own prerequisites are done.
+actionSchema.statics.settleDependents = async function(actionId, status) {
+  const id = new mongoose.Types.ObjectId(String(actionId));
   const now = new Date();
-  let nextRun = new Date(now);
+  const changed = [];
+  const finished = [id];
+
+  if (status === 'Completed') {
+    const triggered = await this.find({
+      dependencies: { $elemMatch: { action: id, type: 'triggers' } },
+      status: 'Pending'
+    }).distinct('_id');
+    if (triggered.length) {
+      await this.updateSchedule({ _id: { $in: triggered }, status: 'Pending' }, { triggeredAt: now });
+      changed.push(...triggered);
+    }
+  } else if (FINISHED_STATUSES.includes(status)) {
+    // Cancel downstream requirers level by level
+    let frontier = [id];
+    while (frontier.length && finished.length < MAX_GRAPH_SIZE) {
+      const dependents = await this.find({
+        dependencies: { $elemMatch: { action: { $in: frontier }, type: 'requires' } },
+        status: 'Pending'
+      }).distinct('_id');
+      if (!dependents.length) break;
+
+      await this.updateMany({ _id: { $in: dependents }, status: 'Pending' }, {
+        $set: {
+          status: 'Cancelled',
+          dueAt: null,
+          deadlineAt: null,
+          result: { success: false, message: 'A required action did not complete' }
+        }
+      });
+      await ApprovalQueueItem.dequeue('Action', dependents);
+      this.announceDeadlines(dependents.map(_id => ({ _id })));
+      finished.push(...dependents);
+      frontier = dependents;
+    }
+  } else {
+    return [];
+  }
 
-  switch (this.recurringPattern) {
-    case 'daily':
-      nextRun.setDate(now.getDate() + 1);
-      break;
-    case 'weekly':
-      nextRun.setDate(now.getDate() + 7);
-      break;
-    case 'monthly':
-      nextRun.setMonth(now.getMonth() + 1);
-      break;
-    case 'quarterly':
-      nextRun.setMonth(now.getMonth() + 3);
-      break;
-    case 'yearly':
-      nextRun.setFullYear(now.getFullYear() + 1);
-      break;
+  // Everything finished no longer holds anyone back
+  const released = await this.find({ waitingOn: { $in: finished }, status: 'Pending' }).distinct('_id');
+  if (released.length) {
+    await this.updateSchedule({ _id: { $in: released } }, {
+      waitingOn: { $setDifference: [{ $ifNull: ['$waitingOn', []] }, finished] }
+    }, {
+      readyAt: { $cond: [{ $eq: [{ $size: '$waitingOn' }, 0] }, { $ifNull: ['$readyAt', now] }, '$readyAt'] }
+    });
+    changed.push(...released);
   }
 
-  this.nextRunAt = nextRun;
-  return this.save();
+  await this.announceSchedule(changed);
+  return changed;
+};
+
+// Static method to start a set of linked actions: checks the graph is
+// acyclic, orders it into topological levels and triggers the roots;
+// the rest follow as their dependencies settle
+actionSchema.statics.startGraph = async function(actionIds) {
+  const actions = await this.find({ _id: { $in: actionIds } }).select('dependencies status').lean();
+  if (actions.length !== new Set(actionIds.map(String)).size) {
+    throw Object.assign(new Error('Action not found'), { status: 404 });
+  }
+
+  const incoming = new Map(actions.map(action => [String(action._id), 0]));
+  const downstream = new Map(actions.map(action => [String(action._id), []]));
+  actions.forEach(action => {
+    (action.dependencies || []).forEach(dependency => {
+      const from = String(dependency.action);
+      if (!downstream.has(from)) return;
+      downstream.get(from).push(String(action._id));
+      incoming.set(String(action._id), incoming.get(String(action._id)) + 1);
+    });
+  });
+
+  // Kahn's algorithm, one level at a time
+  const levels = [];
+  let level = [...incoming].filter(([, count]) => count === 0).map(([key]) => key);
+  let visited = 0;
+  while (level.length) {
+    levels.push(level);
+    visited += level.length;
+    const next = [];
+    level.forEach(key => {
+      downstream.get(key).forEach(child => {
+        incoming.set(child, incoming.get(child) - 1);
+        if (incoming.get(child) === 0) next.push(child);
+      });
+    });
+    level = next;
+  }
+  if (visited !== actions.length) {
+    throw Object.assign(new Error('Dependencies form a cycle'), { status: 400 });
+  }
+
+  const roots = actions
+    .filter(action => levels[0].includes(String(action._id)) && action.status === 'Pending')
+    .map(action => action._id);
+  if (roots.length) {
+    await this.updateSchedule({ _id: { $in: roots }, status: 'Pending' }, { triggeredAt: new Date() });
+    await this.announceSchedule(roots);
+  }
+
+  return { levels, triggered: roots.length };
 };
 
+// Method to summarize the action for the approval queue
+actionSchema.methods.toQueueEntry = function() {
+  return {
+    itemType: 'Action',
+    item: this._id,
+    submittedAt: this.createdAt || new Date(),
+    title: `${this.type}: ${this.target}`,
+    priority: this.priority,
+    status: this.status
+  };
+};
+
+// Whether the action is waiting for someone to approve it
+actionSchema.virtual('awaitingApproval').get(function() {
+  return this.requiresApproval && !this.approvedBy && !['Completed', 'Cancelled'].includes(this.status);
+});
+
+// Keep dueAt in step with status, schedule, approval and dependencies
+actionSchema.pre('validate', async function() {
+  if (this.isNew || this.isModified('dependencies')) {
+    await resolvePrerequisites(this);
+  }
+  this.dueAt = computeDueAt(this);
+  this.deadlineAt = computeDeadline(this);
+});
+
+// Keep the approval queue in step with approval-relevant changes
+actionSchema.pre('save', function(next) {
+  this.$locals.dueChanged = this.isNew || this.isModified('dueAt');
+  this.$locals.deadlineChanged = this.isNew || this.isModified('deadlineAt') || this.isModified('assignedTo');
+  this.$locals.finished = !this.isNew && this.isModified('status') && FINISHED_STATUSES.includes(this.status);
+  const relevant = this.requiresApproval || this.isModified('requiresApproval');
+  this.$locals.queueChanged = relevant && (
+    this.isNew ||
+    this.isModified('requiresApproval') ||
+    this.isModified('approvedBy') ||
+    this.isModified('status') ||
+    this.isModified('priority')
+  );
+  next();
+});
+
+actionSchema.post('save', function(doc) {
+  if (doc.$locals.dueChanged) {
+    scheduleEvents.emit('scheduled', { id: String(doc._id), dueAt: doc.dueAt, category: doc.category });
+  }
+  if (doc.$locals.deadlineChanged) {
+    doc.constructor.announceDeadlines([doc]);
+  }
+  if (doc.$locals.finished) {
+    doc.constructor.settleDependents(doc._id, doc.status).catch(error => {
+      console.error('Action dependency error:', error);
+    });
+  }
+  if (!doc.$locals.queueChanged) return;
+
+  const sync = doc.awaitingApproval
+    ? ApprovalQueueItem.enqueue([doc.toQueueEntry()])
+    : ApprovalQueueItem.dequeue('Action', [doc._id]);
+
+  return sync.catch(error => {
+    console.error('Approval queue sync error:', error);
+  });
+});
+
 // Transform output
 actionSchema.methods.toJSON = function() {
   const actionObject = this.toObject({ virtuals: true });
   return actionObject;
 };
 
+actionSchema.statics.scheduleEvents = scheduleEvents;
+actionSchema.statics.SCHEDULED_TYPES = SCHEDULED_TYPES;
+actionSchema.statics.nextOccurrence = nextOccurrence;
+
 module.exports = mongoose.model('Action', actionSchema);
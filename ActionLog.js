@@ -0,0 +1,100 @@
+// src/models/ActionLog.js - Append-only execution log entries for actions
+const mongoose = require('mongoose');
+
+// Entries are removed by MongoDB this long after they were written.
+// Changing it later needs a collMod on the existing TTL index.
+const LOG_RETENTION_DAYS = parseInt(process.env.ACTION_LOG_RETENTION_DAYS) || 90;
+
+const actionLogSchema = new mongoose.Schema({
+  action: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Action',
+    required: [true, 'Action is required']
+  },
+  timestamp: {
+    type: Date,
+    default: Date.now
+  },
+  level: {
+    type: String,
+    enum: ['info', 'warning', 'error', 'debug'],
+    default: 'info'
+  },
+  message: String,
+  details: mongoose.Schema.Types.Mixed
+}, {
+  versionKey: false
+});
+
+// One action's log in time order
+actionLogSchema.index({ action: 1, timestamp: 1, _id: 1 });
+// Retention
+actionLogSchema.index({ timestamp: 1 }, { expireAfterSeconds: LOG_RETENTION_DAYS * 24 * 60 * 60 });
+
+// Static method to page through an action's log, oldest first
+actionLogSchema.statics.getForAction = function(actionId, { limit = 100, after = null, level } = {}) {
+  const query = { action: actionId };
+  if (level) query.level = level;
+  if (after) {
+    query.$or = [
+      { timestamp: { $gt: after.timestamp } },
+      { timestamp: after.timestamp, _id: { $gt: after.id } }
+    ];
+  }
+
+  return this.find(query)
+    .select('-action')
+    .sort({ timestamp: 1, _id: 1 })
+    .limit(limit)
+    .lean();
+};
+
+// Static method to move logs still embedded in action documents into this
+// collection, a batch of actions at a time
+actionLogSchema.statics.migrateEmbedded = async function({ batchSize = 200 } = {}) {
+  const actions = mongoose.model('Action').collection;
+  let migratedActions = 0;
+  let migratedEntries = 0;
+
+  for (;;) {
+    const batch = await actions
+      .find({ executionLogs: { $exists: true } }, { projection: { executionLogs: 1 } })
+      .limit(batchSize)
+      .toArray();
+    if (!batch.length) break;
+
+    const entries = batch.flatMap(action => (action.executionLogs || []).map(entry => ({
+      _id: entry._id,
+      action: action._id,
+      timestamp: entry.timestamp || action._id.getTimestamp(),
+      level: entry.level || 'info',
+      message: entry.message,
+      details: entry.details
+    })));
+
+    if (entries.length) {
+      try {
+        await this.insertMany(entries, { ordered: false });
+      } catch (error) {
+        // Entries copied by an interrupted earlier run are already here
+        const errors = error.writeErrors || [];
+        if (error.code !== 11000 && !(errors.length && errors.every(err => err.code === 11000))) {
+          throw error;
+        }
+      }
+    }
+
+    await actions.updateMany(
+      { _id: { $in: batch.map(action => action._id) } },
+      { $unset: { executionLogs: '' } }
+    );
+    migratedActions += batch.length;
+    migratedEntries += entries.length;
+  }
+
+  return { actions: migratedActions, entries: migratedEntries };
+};
+
+actionLogSchema.statics.LOG_RETENTION_DAYS = LOG_RETENTION_DAYS;
+
+module.exports = mongoose.model('ActionLog', actionLogSchema);
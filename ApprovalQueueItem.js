@@ -0,0 +1,180 @@
+// src/models/ApprovalQueueItem.js - Unified approval queue across claims, declarations and actions
+const mongoose = require('mongoose');
+
+// Who can act on each kind of item, as scope keys (role:<role> or user:<id>)
+const APPROVER_SCOPES = {
+  Reimbursement: ['role:Administrator', 'role:HR Manager', 'role:Manager'],
+  ITDeclaration: ['role:Administrator', 'role:HR Manager'],
+  Action: ['role:Administrator', 'role:HR Manager']
+};
+
+const COUNT_CACHE_TTL_MS = 30 * 1000;
+
+const approvalQueueItemSchema = new mongoose.Schema({
+  itemType: {
+    type: String,
+    required: [true, 'Item type is required'],
+    enum: Object.keys(APPROVER_SCOPES)
+  },
+  item: {
+    type: mongoose.Schema.Types.ObjectId,
+    refPath: 'itemType',
+    required: [true, 'Item reference is required']
+  },
+  scopes: [String],
+  submittedAt: {
+    type: Date,
+    required: [true, 'Submission date is required']
+  },
+
+  // Denormalized summary so the inbox renders without lookups
+  title: String,
+  employee: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Employee'
+  },
+  employeeName: String,
+  amount: Number,
+  currency: String,
+  priority: String,
+  status: String
+}, {
+  timestamps: true
+});
+
+approvalQueueItemSchema.index({ itemType: 1, item: 1 }, { unique: true });
+
+// Inbox index: everything in my scopes, oldest first
+approvalQueueItemSchema.index({ scopes: 1, submittedAt: 1 });
+
+// Cached badge counts per scope set: key -> { expiresAt, counts }
+const countCache = new Map();
+
+// Helper to drop cached counts that include any of the changed scopes
+const invalidateCounts = (scopes) => {
+  for (const key of countCache.keys()) {
+    if (scopes.some(scope => key.split('|').includes(scope))) {
+      countCache.delete(key);
+    }
+  }
+};
+
+// Helper to list the scopes an approver acts under
+const scopesForUser = (user) => [`role:${user.role}`, `user:${user._id}`];
+
+// Static method to add or refresh queue entries.
+// `entries` are { itemType, item, submittedAt, ...summary }.
+approvalQueueItemSchema.statics.enqueue = async function(entries) {
+  if (!entries.length) return null;
+
+  const operations = entries.map(entry => {
+    const scopes = entry.scopes || APPROVER_SCOPES[entry.itemType];
+    return {
+      updateOne: {
+        filter: { itemType: entry.itemType, item: entry.item },
+        update: { $set: { ...entry, scopes } },
+        upsert: true
+      }
+    };
+  });
+
+  const result = await this.bulkWrite(operations, { ordered: false });
+  invalidateCounts([...new Set(operations.flatMap(op => op.updateOne.update.$set.scopes))]);
+  return result;
+};
+
+// Static method to remove items that are no longer awaiting approval
+approvalQueueItemSchema.statics.dequeue = async function(itemType, itemIds) {
+  if (!itemIds.length) return null;
+
+  const result = await this.deleteMany({ itemType, item: { $in: itemIds } });
+  if (result.deletedCount) {
+    invalidateCounts(APPROVER_SCOPES[itemType]);
+  }
+  return result;
+};
+
+// Static method to page through an approver's inbox, oldest first.
+// `after` is the submittedAt/_id cursor of the last item already shown.
+approvalQueueItemSchema.statics.getInbox = function(user, { itemType, limit = 20, after } = {}) {
+  const query = { scopes: { $in: scopesForUser(user) } };
+  if (itemType) query.itemType = itemType;
+  if (after) {
+    query.$or = [
+      { submittedAt: { $gt: after.submittedAt } },
+      { submittedAt: after.submittedAt, _id: { $gt: after.id } }
+    ];
+  }
+
+  return this.find(query)
+    .sort({ submittedAt: 1, _id: 1 })
+    .limit(limit)
+    .lean();
+};
+
+// Static method to get an approver's pending counts per item type (cached)
+approvalQueueItemSchema.statics.getPendingCounts = async function(user) {
+  const scopes = scopesForUser(user);
+  const key = scopes.join('|');
+  const cached = countCache.get(key);
+
+  if (cached && cached.expiresAt > Date.now()) {
+    return cached.counts;
+  }
+
+  const rows = await this.aggregate([
+    { $match: { scopes: { $in: scopes } } },
+    { $group: { _id: '$itemType', count: { $sum: 1 } } }
+  ]);
+
+  const counts = Object.keys(APPROVER_SCOPES).reduce((acc, itemType) => {
+    acc[itemType] = 0;
+    return acc;
+  }, { total: 0 });
+  rows.forEach(row => {
+    counts[row._id] = row.count;
+    counts.total += row.count;
+  });
+
+  countCache.set(key, { expiresAt: Date.now() + COUNT_CACHE_TTL_MS, counts });
+  return counts;
+};
+
+// Static method to rebuild the queue from the source collections
+approvalQueueItemSchema.statics.rebuild = async function() {
+  const Reimbursement = mongoose.model('Reimbursement');
+  const ITDeclaration = mongoose.model('ITDeclaration');
+  const Action = mongoose.model('Action');
+
+  await this.deleteMany({});
+  countCache.clear();
+
+  const sources = [
+    Reimbursement.find({ status: 'Pending' }).cursor(),
+    ITDeclaration.find({ status: { $in: ['Pending', 'Under Review'] } }).cursor(),
+    Action.find({ requiresApproval: true, approvedBy: null, status: { $nin: ['Completed', 'Cancelled'] } }).cursor()
+  ];
+
+  let total = 0;
+  for (const cursor of sources) {
+    let entries = [];
+    for await (const doc of cursor) {
+      entries.push(doc.toQueueEntry());
+      if (entries.length >= 500) {
+        await this.enqueue(entries);
+        total += entries.length;
+        entries = [];
+      }
+    }
+    if (entries.length) {
+      await this.enqueue(entries);
+      total += entries.length;
+    }
+  }
+
+  return total;
+};
+
+approvalQueueItemSchema.statics.APPROVER_SCOPES = APPROVER_SCOPES;
+
+module.exports = mongoose.model('ApprovalQueueItem', approvalQueueItemSchema);
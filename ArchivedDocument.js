@@ -0,0 +1,40 @@
+// src/models/ArchivedDocument.js - Cold archive for documents emptied from the recycle bin
+const mongoose = require('mongoose');
+
+const archivedDocumentSchema = new mongoose.Schema({
+  // Same _id as the original document
+  _id: mongoose.Schema.Types.ObjectId,
+
+  // The document as it was when archived (metadata only, no file bytes)
+  snapshot: {
+    type: mongoose.Schema.Types.Mixed,
+    required: [true, 'Document snapshot is required']
+  },
+  name: String,
+  uploadedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User'
+  },
+  recycledAt: Date,
+
+  // Blobs held by the document and its versions until the purge
+  digests: [String],
+  archivedAt: {
+    type: Date,
+    default: Date.now
+  },
+  purgeAfter: {
+    type: Date,
+    required: [true, 'Purge date is required']
+  },
+  blobsPurgedAt: {
+    type: Date,
+    default: null
+  }
+});
+
+// Purge queue: archived entries whose blobs are still held, oldest first
+archivedDocumentSchema.index({ blobsPurgedAt: 1, purgeAfter: 1 });
+archivedDocumentSchema.index({ uploadedBy: 1, archivedAt: -1 });
+
+module.exports = mongoose.model('ArchivedDocument', archivedDocumentSchema);
@@ -1,5 +1,7 @@
 // src/models/Document.js - Document model for file management
 const mongoose = require('mongoose');
+const { recordDownload } = require('../services/documentCounters');
+const documentSearch = require('../services/documentSearch');
 
 const documentSchema = new mongoose.Schema({
   name: {
@@ -10,6 +12,8 @@ const documentSchema = new mongoose.Schema({
   originalName: String,
   filename: String,
   path: String,
+  // sha256 of the content; set for blob-store files, filled lazily for legacy paths
+  digest: String,
   size: {
     type: Number,
     min: [0, 'File size cannot be negative']
@@ -18,7 +22,7 @@ const documentSchema = new mongoose.Schema({
   mimetype: String,
   type: {
     type: String,
-    enum: ['PDF', 'DOCX', 'DOC', 'XLSX', 'XLS', 'JPG', 'JPEG', 'PNG', 'TXT', 'Folder'],
+    enum: ['PDF', 'DOCX', 'DOC', 'XLSX', 'XLS', 'CSV', 'JPG', 'JPEG', 'PNG', 'TXT', 'Folder'],
     required: [true, 'Document type is required']
   },
   folder: {
@@ -26,6 +30,11 @@ const documentSchema = new mongoose.Schema({
     enum: ['my-drive', 'shared', 'recycle', 'templates'],
     default: 'my-drive'
   },
+  // Recycle bin: where the item came from, and (on the item the user
+  // deleted) when it was recycled. archivingAt is the archive job's claim.
+  recycledFrom: String,
+  recycledAt: Date,
+  archivingAt: Date,
   isFolder: {
     type: Boolean,
     default: false
@@ -34,12 +43,22 @@ const documentSchema = new mongoose.Schema({
     type: mongoose.Schema.Types.ObjectId,
     ref: 'Document'
   },
+  // Materialized path: every folder above this one, root first
+  ancestors: [{
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Document'
+  }],
 
   // Folder specific fields
   itemCount: {
     type: Number,
     default: 0
   },
+  // Bytes of every file anywhere below this folder
+  totalSize: {
+    type: Number,
+    default: 0
+  },
 
   // Access control
   visibility: {
@@ -65,6 +84,11 @@ const documentSchema = new mongoose.Schema({
 
   // Document metadata
   tags: [String],
+  // Lowercase name and tag words for prefix search (derived, see buildKeywords)
+  keywords: {
+    type: [String],
+    select: false
+  },
   category: {
     type: String,
     enum: [
@@ -87,6 +111,7 @@ const documentSchema = new mongoose.Schema({
     type: Number,
     default: 1
   },
+  // Latest few versions only (see INLINE_VERSIONS)
   versionHistory: [{
     version: Number,
     filename: String,
@@ -137,6 +162,61 @@ documentSchema.index({ uploadedBy: 1 });
 documentSchema.index({ category: 1 });
 documentSchema.index({ visibility: 1 });
 documentSchema.index({ createdAt: -1 });
+documentSchema.index({ digest: 1 }, { sparse: true });
+
+// Recycle bin roots waiting for the retention job
+documentSchema.index({ recycledAt: 1 }, { sparse: true });
+
+// Prefix autocomplete on name and tag words
+documentSchema.index({ keywords: 1 });
+
+// Tree indexes: subtree queries and folder listings
+documentSchema.index({ ancestors: 1 });
+documentSchema.index({ parentFolder: 1, isFolder: -1, name: 1 });
+
+// An archive claim older than this is treated as abandoned
+const ARCHIVE_CLAIM_MS = 60 * 60 * 1000;
+
+// How many recent versions are summarized inline; the full history lives
+// in the DocumentVersion collection
+const INLINE_VERSIONS = 5;
+
+// Helper to format a byte count for display
+const formatSize = (bytes) => {
+  const sizes = ['Bytes', 'KB', 'MB', 'GB'];
+  if (bytes === 0) return '0 Bytes';
+  const i = Math.floor(Math.log(bytes) / Math.log(1024));
+  return `${Math.round(bytes / Math.pow(1024, i) * 100) / 100} ${sizes[i]}`;
+};
+
+// Guard against cycles in legacy parentFolder data
+const MAX_TREE_DEPTH = 64;
+
+// Helper to log failed derived-data updates (folder counters, version rows);
+// rebuildFolderStats and migrateVersionHistory repair them
+const syncDerived = (promise) => promise.catch(error => {
+  console.error('Document derived data sync error:', error);
+});
+
+// Helper to get the bytes a document contributes to the folders above it
+const subtreeBytes = (doc) => (doc.isFolder ? doc.totalSize : doc.size) || 0;
+
+// Helper to build the counter updates for adding (+1) or removing (-1) a
+// subtree under a parent: the parent's itemCount and every ancestor's size
+const folderCounterOps = (parentFolder, ancestors, sign, bytes) => {
+  const operations = [];
+  if (parentFolder) {
+    operations.push({
+      updateOne: { filter: { _id: parentFolder }, update: { $inc: { itemCount: sign } } }
+    });
+  }
+  if (ancestors.length && bytes) {
+    operations.push({
+      updateMany: { filter: { _id: { $in: ancestors } }, update: { $inc: { totalSize: sign * bytes } } }
+    });
+  }
+  return operations;
+};
 
 // Virtual for formatted upload date
 documentSchema.virtual('uploadDate').get(function() {
@@ -162,11 +242,355 @@ documentSchema.statics.getByFolder = function(folder) {
   return this.find({ folder }).populate('uploadedBy', 'name').sort({ createdAt: -1 });
 };
 
-// Static method to search documents
+// Static method to search documents, best matches first
+// (see services/documentSearch for paginated, filtered search)
 documentSchema.statics.searchDocuments = function(searchTerm) {
-  return this.find({
-    $text: { $search: searchTerm }
-  }).populate('uploadedBy', 'name');
+  return this.find(
+    { $text: { $search: searchTerm } },
+    { score: { $meta: 'textScore' } }
+  )
+    .sort({ score: { $meta: 'textScore' } })
+    .populate('uploadedBy', 'name');
+};
+
+// Static method to fill search keywords for documents saved before they existed
+documentSchema.statics.backfillKeywords = async function(batchSize = 500) {
+  const cursor = this.find({ keywords: { $exists: false } })
+    .select('name tags')
+    .lean()
+    .cursor();
+
+  let operations = [];
+  let total = 0;
+  for await (const doc of cursor) {
+    operations.push({
+      updateOne: {
+        filter: { _id: doc._id },
+        update: { $set: { keywords: documentSearch.buildKeywords(doc.name, doc.tags) } }
+      }
+    });
+    if (operations.length >= batchSize) {
+      await this.bulkWrite(operations, { ordered: false });
+      total += operations.length;
+      operations = [];
+    }
+  }
+  if (operations.length) {
+    await this.bulkWrite(operations, { ordered: false });
+    total += operations.length;
+  }
+
+  documentSearch.invalidate();
+  return total;
+};
+
+// Static method to get everything below a folder in one indexed query
+documentSchema.statics.getSubtree = function(folderId, { foldersOnly = false } = {}) {
+  const query = { ancestors: folderId };
+  if (foldersOnly) query.isFolder = true;
+  return this.find(query).sort({ isFolder: -1, name: 1 });
+};
+
+// Static method to get the breadcrumb trail for a document, root first
+documentSchema.statics.getBreadcrumbs = async function(doc) {
+  if (!doc.ancestors || !doc.ancestors.length) return [];
+
+  const folders = await this.find({ _id: { $in: doc.ancestors } }).select('name').lean();
+  const byId = new Map(folders.map(folder => [String(folder._id), folder]));
+  return doc.ancestors.map(id => byId.get(String(id))).filter(Boolean);
+};
+
+// Static method to move a document (and its whole subtree) under a new parent.
+// Pass a null parent to move it to the root.
+documentSchema.statics.moveTo = async function(documentId, parentId) {
+  const doc = await this.findById(documentId).select('parentFolder ancestors isFolder size totalSize');
+  if (!doc) return null;
+
+  let newAncestors = [];
+  if (parentId) {
+    const parent = await this.findById(parentId).select('isFolder ancestors');
+    if (!parent || !parent.isFolder) {
+      throw Object.assign(new Error('Target folder not found'), { status: 400 });
+    }
+    if (parent._id.equals(doc._id) || parent.ancestors.some(id => id.equals(doc._id))) {
+      throw Object.assign(new Error('Cannot move a folder into itself'), { status: 400 });
+    }
+    newAncestors = [...parent.ancestors, parent._id];
+  }
+
+  const oldParent = doc.parentFolder || null;
+  const newParent = newAncestors.length ? newAncestors[newAncestors.length - 1] : null;
+  if (String(oldParent) === String(newParent)) {
+    return this.findById(doc._id);
+  }
+
+  // Guarded on the current parent so two concurrent moves can't both apply
+  const moved = await this.findOneAndUpdate(
+    { _id: doc._id, parentFolder: oldParent },
+    { $set: { parentFolder: newParent, ancestors: newAncestors } },
+    { new: true }
+  );
+  if (!moved) {
+    throw Object.assign(new Error('Document was moved by another request'), { status: 409 });
+  }
+
+  // Re-root the subtree in one update: new prefix + the path from this folder down
+  if (doc.isFolder) {
+    await this.updateMany({ ancestors: doc._id }, [{
+      $set: {
+        ancestors: {
+          $concatArrays: [
+            newAncestors,
+            { $slice: ['$ancestors', { $indexOfArray: ['$ancestors', doc._id] }, { $size: '$ancestors' }] }
+          ]
+        }
+      }
+    }]);
+  }
+
+  // Folders above both the old and new position keep their size
+  const oldIds = new Set(doc.ancestors.map(String));
+  const newIds = new Set(newAncestors.map(String));
+  const bytes = subtreeBytes(doc);
+  const operations = [
+    ...folderCounterOps(oldParent, doc.ancestors.filter(id => !newIds.has(String(id))), -1, bytes),
+    ...folderCounterOps(newParent, newAncestors.filter(id => !oldIds.has(String(id))), 1, bytes)
+  ];
+  if (operations.length) {
+    await this.bulkWrite(operations, { ordered: false });
+  }
+
+  return moved;
+};
+
+// Static method to delete a document together with everything below it
+documentSchema.statics.removeTree = async function(documentId) {
+  const doc = await this.findById(documentId).select('parentFolder ancestors isFolder size totalSize');
+  if (!doc) return null;
+
+  const subtree = { $or: [{ _id: doc._id }, { ancestors: doc._id }] };
+  const ids = await this.find(subtree).distinct('_id');
+  const result = await this.deleteMany(subtree);
+  await syncDerived(mongoose.model('DocumentAccess').removeDocuments(ids));
+
+  const operations = folderCounterOps(doc.parentFolder, doc.ancestors, -1, subtreeBytes(doc));
+  if (operations.length) {
+    await this.bulkWrite(operations, { ordered: false });
+  }
+
+  return { deletedCount: result.deletedCount };
+};
+
+// Static method to rebuild ancestors, item counts and folder sizes from parentFolder
+documentSchema.statics.rebuildFolderStats = async function() {
+  // Materialized paths, one tree level at a time from the roots down
+  await this.updateMany({ parentFolder: null }, { $set: { ancestors: [] } });
+  let level = await this.find({ parentFolder: null, isFolder: true }).select('ancestors').lean();
+
+  for (let depth = 0; level.length && depth < MAX_TREE_DEPTH; depth++) {
+    await this.bulkWrite(level.map(folder => ({
+      updateMany: {
+        filter: { parentFolder: folder._id },
+        update: { $set: { ancestors: [...folder.ancestors, folder._id] } }
+      }
+    })), { ordered: false });
+
+    level = await this.find({ parentFolder: { $in: level.map(folder => folder._id) }, isFolder: true })
+      .select('ancestors')
+      .lean();
+  }
+
+  const [children, sizes] = await Promise.all([
+    this.aggregate([
+      { $match: { parentFolder: { $ne: null } } },
+      { $group: { _id: '$parentFolder', count: { $sum: 1 } } }
+    ]),
+    this.aggregate([
+      { $match: { isFolder: false } },
+      { $unwind: '$ancestors' },
+      { $group: { _id: '$ancestors', bytes: { $sum: { $ifNull: ['$size', 0] } } } }
+    ])
+  ]);
+
+  await this.updateMany({ isFolder: true }, { $set: { itemCount: 0, totalSize: 0 } });
+
+  const operations = [
+    ...children.map(row => ({ updateOne: { filter: { _id: row._id }, update: { $set: { itemCount: row.count } } } })),
+    ...sizes.map(row => ({ updateOne: { filter: { _id: row._id }, update: { $set: { totalSize: row.bytes } } } }))
+  ];
+  if (operations.length) {
+    await this.bulkWrite(operations, { ordered: false });
+  }
+
+  return { folders: children.length };
+};
+
+// Static method to make an uploaded file the new current version.
+// `file` is an upload result ({ digest, size, mimetype, originalName }).
+documentSchema.statics.addVersion = async function(documentId, file, { uploadedBy, changes } = {}) {
+  const DocumentVersion = mongoose.model('DocumentVersion');
+
+  for (let attempt = 0; attempt < 5; attempt++) {
+    const current = await this.findById(documentId).select('version size isFolder ancestors');
+    if (!current) return null;
+    if (current.isFolder) {
+      throw Object.assign(new Error('Folders do not have versions'), { status: 400 });
+    }
+
+    const entry = {
+      document: current._id,
+      version: current.version + 1,
+      filename: file.digest,
+      originalName: file.originalName,
+      digest: file.digest,
+      size: file.size,
+      mimetype: file.mimetype,
+      uploadedBy,
+      uploadedAt: new Date(),
+      changes
+    };
+
+    // The unique (document, version) row claims the number; a concurrent
+    // upload that claimed it first sends us round again
+    let version;
+    try {
+      version = await DocumentVersion.create(entry);
+    } catch (error) {
+      if (error.code === 11000) continue;
+      throw error;
+    }
+
+    const updated = await this.findOneAndUpdate(
+      { _id: current._id, version: current.version },
+      {
+        $set: {
+          version: entry.version,
+          filename: entry.filename,
+          originalName: entry.originalName,
+          digest: entry.digest,
+          size: entry.size,
+          formattedSize: formatSize(entry.size),
+          mimetype: entry.mimetype
+        },
+        $push: {
+          versionHistory: { $each: [DocumentVersion.toSummary(entry)], $slice: -INLINE_VERSIONS }
+        }
+      },
+      { new: true }
+    );
+
+    if (!updated) {
+      await DocumentVersion.deleteOne({ _id: version._id });
+      continue;
+    }
+
+    const delta = (entry.size || 0) - (current.size || 0);
+    if (delta && current.ancestors.length) {
+      await syncDerived(this.updateMany({ _id: { $in: current.ancestors } }, { $inc: { totalSize: delta } }));
+    }
+
+    return updated;
+  }
+
+  throw Object.assign(new Error('Document is being updated by another request'), { status: 409 });
+};
+
+// Static method to move a document and everything inside it to the recycle bin
+documentSchema.statics.recycle = async function(documentId) {
+  const root = await this.findOneAndUpdate(
+    { _id: documentId, folder: { $ne: 'recycle' } },
+    [{ $set: { recycledFrom: '$folder', folder: 'recycle', recycledAt: '$$NOW' } }],
+    { new: true }
+  );
+  if (!root) return null;
+
+  // Items already recycled on their own keep their own recycle state
+  await this.updateMany(
+    { ancestors: root._id, folder: { $ne: 'recycle' } },
+    [{ $set: { recycledFrom: '$folder', folder: 'recycle' } }]
+  );
+  return root;
+};
+
+// Static method to bring a recycled document (and its contents) back,
+// unless the retention job is archiving it right now
+documentSchema.statics.restore = async function(documentId) {
+  const restoreFolder = [
+    { $set: { folder: { $ifNull: ['$recycledFrom', 'my-drive'] } } },
+    { $unset: ['recycledFrom', 'recycledAt', 'archivingAt'] }
+  ];
+
+  const root = await this.findOneAndUpdate(
+    {
+      _id: documentId,
+      folder: 'recycle',
+      recycledAt: { $ne: null },
+      $or: [{ archivingAt: null }, { archivingAt: { $lt: new Date(Date.now() - ARCHIVE_CLAIM_MS) } }]
+    },
+    restoreFolder,
+    { new: true }
+  );
+  if (!root) return null;
+
+  await this.updateMany({ ancestors: root._id, folder: 'recycle', recycledAt: null }, restoreFolder);
+  return root;
+};
+
+// Static method for the retention job to claim a recycled root for archiving
+documentSchema.statics.claimForArchive = function(documentId, recycledBefore) {
+  const now = new Date();
+  return this.findOneAndUpdate(
+    {
+      _id: documentId,
+      folder: 'recycle',
+      recycledAt: { $lt: recycledBefore },
+      $or: [{ archivingAt: null }, { archivingAt: { $lt: new Date(now.getTime() - ARCHIVE_CLAIM_MS) } }]
+    },
+    { $set: { archivingAt: now } },
+    { new: true }
+  );
+};
+
+// Static method to copy embedded version history into DocumentVersion and
+// trim the inline array to the latest few entries
+documentSchema.statics.migrateVersionHistory = async function() {
+  const DocumentVersion = mongoose.model('DocumentVersion');
+  const cursor = this.find({ 'versionHistory.0': { $exists: true } })
+    .select('versionHistory')
+    .lean()
+    .cursor();
+
+  let migrated = 0;
+  for await (const doc of cursor) {
+    const rows = doc.versionHistory.filter(entry => entry.version);
+    if (rows.length) {
+      await DocumentVersion.bulkWrite(rows.map(entry => ({
+        updateOne: {
+          filter: { document: doc._id, version: entry.version },
+          update: {
+            $setOnInsert: {
+              filename: entry.filename,
+              size: entry.size,
+              uploadedBy: entry.uploadedBy,
+              uploadedAt: entry.uploadedAt,
+              changes: entry.changes
+            }
+          },
+          upsert: true
+        }
+      })), { ordered: false });
+    }
+
+    if (doc.versionHistory.length > INLINE_VERSIONS) {
+      await this.updateOne(
+        { _id: doc._id },
+        { $push: { versionHistory: { $each: [], $slice: -INLINE_VERSIONS } } }
+      );
+      migrated += 1;
+    }
+  }
+
+  return { trimmed: migrated };
 };
 
 // Static method to get documents by user
@@ -174,54 +598,185 @@ documentSchema.statics.getUserDocuments = function(userId) {
   return this.find({ uploadedBy: userId }).sort({ createdAt: -1 });
 };
 
-// Method to share document
-documentSchema.methods.shareWith = function(userId, permission = 'view') {
-  // Remove existing share if present
-  this.sharedWith = this.sharedWith.filter(share => 
-    !share.user.equals(userId)
+// Method to share document. Updates the one share entry in place (or
+// appends it) and upserts the matching access row; no array rewrite.
+documentSchema.methods.shareWith = async function(userId, permission = 'view', grantedBy = null) {
+  const DocumentAccess = mongoose.model('DocumentAccess');
+  const sharedAt = new Date();
+
+  const updated = await this.constructor.updateOne(
+    { _id: this._id, 'sharedWith.user': userId },
+    { $set: { 'sharedWith.$.permission': permission, 'sharedWith.$.sharedAt': sharedAt } }
   );
+  if (!updated.matchedCount) {
+    await this.constructor.updateOne(
+      { _id: this._id, 'sharedWith.user': { $ne: userId } },
+      { $push: { sharedWith: { user: userId, permission, sharedAt } } }
+    );
+  }
+
+  if (!this.uploadedBy || !this.uploadedBy.equals(userId)) {
+    await DocumentAccess.grant(this._id, userId, permission, grantedBy);
+  }
+  return this;
+};
 
-  // Add new share
-  this.sharedWith.push({
-    user: userId,
-    permission: permission,
-    sharedAt: new Date()
-  });
+// Method to stop sharing document with a user
+documentSchema.methods.unshareWith = async function(userId) {
+  const DocumentAccess = mongoose.model('DocumentAccess');
 
-  return this.save();
+  await this.constructor.updateOne({ _id: this._id }, { $pull: { sharedWith: { user: userId } } });
+  await DocumentAccess.revoke(this._id, userId);
+  return this;
+};
+
+// Method to change visibility; public documents get an "everyone" access row
+documentSchema.methods.setVisibility = async function(visibility, grantedBy = null) {
+  const DocumentAccess = mongoose.model('DocumentAccess');
+
+  await this.constructor.updateOne({ _id: this._id }, { $set: { visibility } }, { runValidators: true });
+  if (visibility === 'public') {
+    await DocumentAccess.grant(this._id, null, 'view', grantedBy);
+  } else {
+    await DocumentAccess.revoke(this._id, null);
+  }
+  this.visibility = visibility;
+  return this;
 };
 
 // Method to move to folder
 documentSchema.methods.moveToFolder = function(folder) {
+  // The recycle bin tracks where items came from and takes their contents along
+  if (folder === 'recycle') return this.constructor.recycle(this._id);
+  if (this.folder === 'recycle') return this.constructor.restore(this._id);
+
   this.folder = folder;
   return this.save();
 };
 
-// Method to increment download count
+// Method to increment download count. Buffered and flushed in batches,
+// so a download never saves (or version-conflicts on) the whole document.
 documentSchema.methods.incrementDownload = function(userId = null) {
-  this.downloadCount += 1;
-  if (userId) {
-    this.lastAccessedBy = userId;
-    this.lastAccessedAt = new Date();
-  }
-  return this.save();
+  recordDownload(this._id, userId);
+  return Promise.resolve(this);
 };
 
+// Method to get a user's effective permission, including shares on any
+// folder above the document (one indexed lookup on the access index)
+documentSchema.methods.permissionFor = async function(user) {
+  if (['Administrator', 'HR Manager'].includes(user.role)) return 'admin';
+  return mongoose.model('DocumentAccess').resolvePermission(user._id, this);
+};
+
+// Method to check whether a user may read this document
+documentSchema.methods.canBeReadBy = function(user) {
+  if (['Administrator', 'HR Manager'].includes(user.role)) return true;
+  if (this.visibility === 'public') return true;
+  if (this.uploadedBy && this.uploadedBy.equals(user._id)) return true;
+  return this.sharedWith.some(share => share.user && share.user.equals(user._id));
+};
+
+// Method to check whether a user may change or move this document
+documentSchema.methods.canBeEditedBy = function(user) {
+  if (['Administrator', 'HR Manager'].includes(user.role)) return true;
+  if (this.uploadedBy && this.uploadedBy.equals(user._id)) return true;
+  return this.sharedWith.some(share =>
+    share.user && share.user.equals(user._id) && ['edit', 'admin'].includes(share.permission)
+  );
+};
+
+// Keep prefix-search keywords in step with name and tags
+documentSchema.pre('validate', function(next) {
+  if (this.isNew || this.isModified('name') || this.isModified('tags')) {
+    this.keywords = documentSearch.buildKeywords(this.name, this.tags);
+  }
+  next();
+});
+
+// Derive the materialized path for new documents from their parent folder
+documentSchema.pre('validate', async function() {
+  if (!this.isNew) {
+    if (this.isModified('parentFolder')) {
+      this.invalidate('parentFolder', 'Use Document.moveTo to change the parent folder');
+    }
+    return;
+  }
+
+  this.ancestors = [];
+  if (this.parentFolder) {
+    const parent = await this.constructor.findById(this.parentFolder).select('isFolder ancestors');
+    if (!parent || !parent.isFolder) {
+      this.invalidate('parentFolder', 'Parent folder not found');
+      return;
+    }
+    this.ancestors = [...parent.ancestors, parent._id];
+  }
+});
+
 // Pre-save middleware to format file size
 documentSchema.pre('save', function(next) {
   if (this.isModified('size') && this.size) {
-    const bytes = this.size;
-    const sizes = ['Bytes', 'KB', 'MB', 'GB'];
-    if (bytes === 0) {
-      this.formattedSize = '0 Bytes';
-    } else {
-      const i = Math.floor(Math.log(bytes) / Math.log(1024));
-      this.formattedSize = `${Math.round(bytes / Math.pow(1024, i) * 100) / 100} ${sizes[i]}`;
-    }
+    this.formattedSize = formatSize(this.size);
   }
+  this.$locals.wasNew = this.isNew;
+  this.$locals.accessChanged = !this.isNew &&
+    (this.isModified('sharedWith') || this.isModified('visibility') || this.isModified('uploadedBy'));
   next();
 });
 
+// Count new documents into their parent and ancestor folders and record
+// the first version of new files
+documentSchema.post('save', function(doc) {
+  // Whole-document saves that touched sharing re-derive this document's access rows
+  if (doc.$locals.accessChanged) {
+    const DocumentAccess = mongoose.model('DocumentAccess');
+    return syncDerived(DocumentAccess.removeDocuments([doc._id])
+      .then(() => DocumentAccess.syncDocuments([doc])));
+  }
+  if (!doc.$locals.wasNew) return;
+
+  const operations = folderCounterOps(doc.parentFolder, doc.ancestors, 1, subtreeBytes(doc));
+  return Promise.all([
+    operations.length && syncDerived(doc.constructor.bulkWrite(operations, { ordered: false })),
+    syncDerived(mongoose.model('DocumentAccess').syncDocuments([doc])),
+    !doc.isFolder && syncDerived(mongoose.model('DocumentVersion').updateOne(
+      { document: doc._id, version: doc.version },
+      {
+        $setOnInsert: {
+          filename: doc.filename,
+          originalName: doc.originalName,
+          digest: doc.digest,
+          size: doc.size,
+          mimetype: doc.mimetype,
+          uploadedBy: doc.uploadedBy,
+          uploadedAt: doc.createdAt
+        }
+      },
+      { upsert: true }
+    ))
+  ]);
+});
+
+// Take single deletes back out of their folders and the access index
+// (removeTree handles subtrees)
+documentSchema.post('findOneAndDelete', function(doc) {
+  if (!doc) return;
+
+  const operations = folderCounterOps(doc.parentFolder, doc.ancestors || [], -1, subtreeBytes(doc));
+  return Promise.all([
+    operations.length && syncDerived(doc.constructor.bulkWrite(operations, { ordered: false })),
+    syncDerived(mongoose.model('DocumentAccess').removeDocuments([doc._id]))
+  ]);
+});
+
+// Any write through the model drops cached search results (bulk counter
+// flushes bypass middleware and don't affect what search returns)
+documentSchema.post('save', () => documentSearch.invalidate());
+documentSchema.post(
+  ['updateOne', 'updateMany', 'findOneAndUpdate', 'deleteOne', 'deleteMany', 'findOneAndDelete'],
+  () => documentSearch.invalidate()
+);
+
 // Transform output
 documentSchema.methods.toJSON = function() {
   const documentObject = this.toObject({ virtuals: true });
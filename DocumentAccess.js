@@ -0,0 +1,206 @@
+// src/models/DocumentAccess.js - Per-user document access index
+const mongoose = require('mongoose');
+
+// Permission levels, weakest first
+const PERMISSIONS = ['view', 'edit', 'admin', 'owner'];
+
+// Helper to list a permission and everything stronger
+const atLeast = (permission) => PERMISSIONS.slice(PERMISSIONS.indexOf(permission));
+
+const documentAccessSchema = new mongoose.Schema({
+  // null is the "everyone" principal used for public documents
+  user: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    default: null
+  },
+  document: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Document',
+    required: [true, 'Document reference is required']
+  },
+  permission: {
+    type: String,
+    enum: PERMISSIONS,
+    required: [true, 'Permission is required']
+  },
+  grantedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User'
+  },
+  grantedAt: {
+    type: Date,
+    default: Date.now
+  }
+});
+
+// One row per (user, document); share/unshare touch exactly this row
+documentAccessSchema.index({ user: 1, document: 1 }, { unique: true });
+
+// Listings: everything a user can reach at a permission level, newest first
+documentAccessSchema.index({ user: 1, permission: 1, grantedAt: -1, _id: -1 });
+
+// Cleanup when documents are deleted
+documentAccessSchema.index({ document: 1 });
+
+// Helper to get the principals a user acts as
+const principalsFor = (userId) => [userId, null];
+
+// Static method to grant (or change) a user's permission on a document
+documentAccessSchema.statics.grant = function(documentId, userId, permission, grantedBy = null) {
+  return this.updateOne(
+    { user: userId, document: documentId },
+    { $set: { permission, grantedBy, grantedAt: new Date() } },
+    { upsert: true }
+  );
+};
+
+// Static method to revoke a user's access to a document
+documentAccessSchema.statics.revoke = function(documentId, userId) {
+  return this.deleteOne({ user: userId, document: documentId, permission: { $ne: 'owner' } });
+};
+
+// Static method to drop every row for removed documents
+documentAccessSchema.statics.removeDocuments = function(documentIds) {
+  if (!documentIds.length) return null;
+  return this.deleteMany({ document: { $in: documentIds } });
+};
+
+// Static method to build the rows a document implies (owner, shares, public)
+documentAccessSchema.statics.rowsFor = function(doc) {
+  const rows = [];
+  if (doc.uploadedBy) {
+    rows.push({ user: doc.uploadedBy, document: doc._id, permission: 'owner', grantedAt: doc.createdAt });
+  }
+  (doc.sharedWith || []).forEach(share => {
+    if (share.user && !share.user.equals(doc.uploadedBy)) {
+      rows.push({ user: share.user, document: doc._id, permission: share.permission, grantedAt: share.sharedAt });
+    }
+  });
+  if (doc.visibility === 'public') {
+    rows.push({ user: null, document: doc._id, permission: 'view', grantedAt: doc.createdAt });
+  }
+  return rows;
+};
+
+// Static method to write the rows for a set of documents
+documentAccessSchema.statics.syncDocuments = function(docs) {
+  const operations = docs.flatMap(doc => this.rowsFor(doc)).map(row => ({
+    updateOne: {
+      filter: { user: row.user, document: row.document },
+      update: { $set: row },
+      upsert: true
+    }
+  }));
+  if (!operations.length) return null;
+  return this.bulkWrite(operations, { ordered: false });
+};
+
+// Static method to get the strongest permission a user has on a document,
+// directly or through any folder above it
+documentAccessSchema.statics.resolvePermission = async function(userId, doc) {
+  const rows = await this.find({
+    user: { $in: principalsFor(userId) },
+    document: { $in: [doc._id, ...(doc.ancestors || [])] }
+  }).select('permission').lean();
+
+  return rows.reduce((best, row) => (
+    !best || PERMISSIONS.indexOf(row.permission) > PERMISSIONS.indexOf(best) ? row.permission : best
+  ), null);
+};
+
+// Static method to keep only the documents a user can read, checking a
+// whole selection (and every folder above it) in one query
+documentAccessSchema.statics.filterReadable = async function(userId, docs) {
+  const ids = new Set();
+  docs.forEach(doc => {
+    ids.add(String(doc._id));
+    (doc.ancestors || []).forEach(id => ids.add(String(id)));
+  });
+
+  const rows = await this.find({
+    user: { $in: principalsFor(userId) },
+    document: { $in: Array.from(ids) }
+  }).select('document').lean();
+
+  const granted = new Set(rows.map(row => String(row.document)));
+  return docs.filter(doc =>
+    granted.has(String(doc._id)) || (doc.ancestors || []).some(id => granted.has(String(id)))
+  );
+};
+
+// Static method to build a Document filter for everything a user can read:
+// documents granted to them, everything below a folder granted to them, and
+// public documents. Only the user's own grants are expanded; "everyone" rows
+// mirror visibility, so public documents are matched by predicate and the
+// filter stays sized by the user's grants, not the organization's.
+documentAccessSchema.statics.readableFilter = async function(userId) {
+  const granted = await this.find({ user: userId }).distinct('document');
+  return {
+    $or: [
+      { visibility: 'public' },
+      { _id: { $in: granted } },
+      { ancestors: { $in: granted } }
+    ]
+  };
+};
+
+// Static method to page through the documents a user can reach.
+// options: { permission (minimum level), sharedOnly, includePublic, limit, after ({ grantedAt, id }) }
+documentAccessSchema.statics.getAccessible = function(userId, {
+  permission = 'view',
+  sharedOnly = false,
+  includePublic = false,
+  limit = 20,
+  after
+} = {}) {
+  const permissions = atLeast(permission).filter(level => !sharedOnly || level !== 'owner');
+  const query = {
+    user: includePublic ? { $in: principalsFor(userId) } : userId,
+    permission: { $in: permissions }
+  };
+  if (after) {
+    query.$or = [
+      { grantedAt: { $lt: after.grantedAt } },
+      { grantedAt: after.grantedAt, _id: { $lt: after.id } }
+    ];
+  }
+
+  return this.find(query)
+    .populate('document')
+    .sort({ grantedAt: -1, _id: -1 })
+    .limit(limit);
+};
+
+// Static method to rebuild the index from the documents collection
+documentAccessSchema.statics.rebuild = async function() {
+  const Document = mongoose.model('Document');
+
+  await this.deleteMany({});
+
+  const cursor = Document.find()
+    .select('uploadedBy sharedWith visibility createdAt')
+    .cursor();
+
+  let batch = [];
+  let total = 0;
+  for await (const doc of cursor) {
+    batch.push(doc);
+    if (batch.length >= 500) {
+      await this.syncDocuments(batch);
+      total += batch.length;
+      batch = [];
+    }
+  }
+  if (batch.length) {
+    await this.syncDocuments(batch);
+    total += batch.length;
+  }
+
+  return total;
+};
+
+documentAccessSchema.statics.PERMISSIONS = PERMISSIONS;
+documentAccessSchema.statics.atLeast = atLeast;
+
+module.exports = mongoose.model('DocumentAccess', documentAccessSchema);
@@ -0,0 +1,119 @@
+// src/models/DocumentVersion.js - Full revision history for documents
+const mongoose = require('mongoose');
+
+// Retention defaults: always keep the latest N versions; older ones are
+// pruned once they pass the age limit (0 disables the age limit)
+const KEEP_LATEST_VERSIONS = parseInt(process.env.DOCUMENT_VERSION_KEEP) || 20;
+const MAX_VERSION_AGE_DAYS = parseInt(process.env.DOCUMENT_VERSION_MAX_AGE_DAYS) || 0;
+
+const documentVersionSchema = new mongoose.Schema({
+  document: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Document',
+    required: [true, 'Document reference is required']
+  },
+  version: {
+    type: Number,
+    required: [true, 'Version number is required'],
+    min: [1, 'Version must be at least 1']
+  },
+  filename: String,
+  originalName: String,
+  digest: String,
+  size: {
+    type: Number,
+    min: [0, 'File size cannot be negative']
+  },
+  mimetype: String,
+  uploadedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User'
+  },
+  uploadedAt: {
+    type: Date,
+    default: Date.now
+  },
+  changes: String,
+  // Set once this version's upload has been counted in FileBlob.refCount;
+  // only such versions release a reference when pruned
+  referenced: {
+    type: Boolean,
+    default: false
+  }
+});
+
+// One row per (document, version); also serves newest-first history pages
+documentVersionSchema.index({ document: 1, version: -1 }, { unique: true });
+
+// Helper to build the small summary kept inline on the document
+const toSummary = (version) => ({
+  version: version.version,
+  filename: version.filename,
+  size: version.size,
+  uploadedBy: version.uploadedBy,
+  uploadedAt: version.uploadedAt,
+  changes: version.changes
+});
+
+// Static method to page through a document's history, newest first.
+// `before` is the last version number already shown.
+documentVersionSchema.statics.getHistory = function(documentId, { limit = 20, before } = {}) {
+  const query = { document: documentId };
+  if (before) query.version = { $lt: before };
+
+  return this.find(query)
+    .populate('uploadedBy', 'name')
+    .sort({ version: -1 })
+    .limit(limit);
+};
+
+// Static method to record that a version's blob reference has been counted
+documentVersionSchema.statics.markReferenced = function(documentId, version) {
+  return this.updateOne({ document: documentId, version }, { $set: { referenced: true } });
+};
+
+// Static method to prune old versions of one document (or all documents
+// when no id is given). The current version is never removed.
+// Returns the digests of removed versions that held a blob reference, so
+// those references can be released.
+documentVersionSchema.statics.applyRetention = async function(documentId = null, {
+  keep = KEEP_LATEST_VERSIONS,
+  maxAgeDays = MAX_VERSION_AGE_DAYS
+} = {}) {
+  const match = documentId ? { document: documentId } : {};
+
+  // Cut-off version per document: everything at or below it is past the keep window
+  const cutoffs = await this.aggregate([
+    { $match: match },
+    { $group: { _id: '$document', latest: { $max: '$version' } } },
+    { $match: { latest: { $gt: keep } } },
+    { $project: { cutoff: { $subtract: ['$latest', keep] } } }
+  ]);
+  if (!cutoffs.length) return { removed: 0, digests: [] };
+
+  const olderThan = maxAgeDays ? new Date(Date.now() - maxAgeDays * 24 * 60 * 60 * 1000) : null;
+  let removed = 0;
+  const digests = [];
+
+  // A few hundred documents per delete keeps each $or small
+  for (let i = 0; i < cutoffs.length; i += 500) {
+    const filter = {
+      $or: cutoffs.slice(i, i + 500).map(row => ({ document: row._id, version: { $lte: row.cutoff } }))
+    };
+    if (olderThan) filter.uploadedAt = { $lt: olderThan };
+
+    const expired = await this.find(filter).select('digest referenced').lean();
+    if (!expired.length) continue;
+
+    await this.deleteMany({ _id: { $in: expired.map(row => row._id) } });
+    removed += expired.length;
+    expired.forEach(row => row.referenced && row.digest && digests.push(row.digest));
+  }
+
+  return { removed, digests };
+};
+
+documentVersionSchema.statics.toSummary = toSummary;
+documentVersionSchema.statics.KEEP_LATEST_VERSIONS = KEEP_LATEST_VERSIONS;
+
+module.exports = mongoose.model('DocumentVersion', documentVersionSchema);
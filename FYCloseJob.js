@@ -0,0 +1,86 @@
+// src/models/FYCloseJob.js - Financial year close job with partition checkpoints
+const mongoose = require('mongoose');
+
+const fyCloseJobSchema = new mongoose.Schema({
+  financialYear: {
+    type: String,
+    required: [true, 'Financial year is required'],
+    match: [/^\d{4}-\d{4}$/, 'Financial year must be in format YYYY-YYYY'],
+    unique: true
+  },
+  status: {
+    type: String,
+    enum: ['Running', 'Completed', 'Failed'],
+    default: 'Running'
+  },
+  // Declarations without proof documents are rejected at close when true
+  requireProof: {
+    type: Boolean,
+    default: true
+  },
+
+  // Employees are split into contiguous _id ranges; each range is a checkpoint
+  partitions: [{
+    index: Number,
+    firstEmployee: mongoose.Schema.Types.ObjectId,
+    lastEmployee: mongoose.Schema.Types.ObjectId,
+    employeeCount: Number,
+    status: {
+      type: String,
+      enum: ['Pending', 'Done'],
+      default: 'Pending'
+    },
+    // Percent reported by the worker while the partition runs
+    progress: {
+      type: Number,
+      default: 0
+    },
+    verified: Number,
+    rejected: Number,
+    completedAt: Date
+  }],
+
+  totalEmployees: {
+    type: Number,
+    default: 0
+  },
+  processedEmployees: {
+    type: Number,
+    default: 0
+  },
+
+  // Lease so only one process drives the job at a time
+  lockedBy: String,
+  lockedUntil: Date,
+
+  startedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    required: [true, 'Starter is required']
+  },
+  startedAt: {
+    type: Date,
+    default: Date.now
+  },
+  completedAt: Date,
+  lastError: String
+}, {
+  timestamps: true
+});
+
+// Virtual for progress percentage, counting partitions still running
+fyCloseJobSchema.virtual('progress').get(function() {
+  if (!this.totalEmployees) return this.status === 'Completed' ? 100 : 0;
+  const running = (this.partitions || [])
+    .filter(partition => partition.status !== 'Done')
+    .reduce((sum, partition) => sum + (partition.employeeCount || 0) * (partition.progress || 0) / 100, 0);
+  return Math.min(Math.round(((this.processedEmployees + running) / this.totalEmployees) * 100), 100);
+});
+
+// Transform output
+fyCloseJobSchema.methods.toJSON = function() {
+  const jobObject = this.toObject({ virtuals: true });
+  return jobObject;
+};
+
+module.exports = mongoose.model('FYCloseJob', fyCloseJobSchema);
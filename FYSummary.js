@@ -0,0 +1,85 @@
+// src/models/FYSummary.js - Immutable per-employee financial year declaration summary
+const mongoose = require('mongoose');
+
+const fySummarySchema = new mongoose.Schema({
+  employee: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Employee',
+    required: [true, 'Employee reference is required'],
+    immutable: true
+  },
+  employeeId: {
+    type: String,
+    immutable: true
+  },
+  employeeName: {
+    type: String,
+    immutable: true
+  },
+  financialYear: {
+    type: String,
+    required: [true, 'Financial year is required'],
+    match: [/^\d{4}-\d{4}$/, 'Financial year must be in format YYYY-YYYY'],
+    immutable: true
+  },
+  limitsVersion: {
+    type: String,
+    immutable: true
+  },
+
+  // Per section: { declared, cap, eligible, declarations }
+  sections: {
+    type: mongoose.Schema.Types.Mixed,
+    default: {},
+    immutable: true
+  },
+  totalDeclared: {
+    type: Number,
+    default: 0,
+    immutable: true
+  },
+  totalEligible: {
+    type: Number,
+    default: 0,
+    immutable: true
+  },
+  verifiedCount: {
+    type: Number,
+    default: 0,
+    immutable: true
+  },
+  rejectedCount: {
+    type: Number,
+    default: 0,
+    immutable: true
+  },
+
+  closeJob: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'FYCloseJob',
+    immutable: true
+  },
+  closedAt: {
+    type: Date,
+    default: Date.now,
+    immutable: true
+  }
+}, {
+  timestamps: { createdAt: true, updatedAt: false }
+});
+
+// One summary per employee and year; re-inserting on restart is a no-op
+fySummarySchema.index({ employee: 1, financialYear: 1 }, { unique: true });
+fySummarySchema.index({ financialYear: 1, employeeId: 1 });
+
+// Summaries are write-once records
+const rejectUpdate = function(next) {
+  next(new Error('FY summaries are immutable'));
+};
+fySummarySchema.pre(['updateOne', 'updateMany', 'findOneAndUpdate', 'replaceOne'], rejectUpdate);
+fySummarySchema.pre('save', function(next) {
+  if (!this.isNew) return rejectUpdate(next);
+  next();
+});
+
+module.exports = mongoose.model('FYSummary', fySummarySchema);
@@ -0,0 +1,92 @@
+// src/models/FileBlob.js - Content-addressed file blob metadata
+const mongoose = require('mongoose');
+
+const fileBlobSchema = new mongoose.Schema({
+  // SHA-256 hex digest of the content, also the blob's storage key
+  _id: {
+    type: String,
+    match: [/^[a-f0-9]{64}$/, 'Digest must be a SHA-256 hex string']
+  },
+  size: {
+    type: Number,
+    required: [true, 'Blob size is required'],
+    min: [0, 'Blob size cannot be negative']
+  },
+  mimetype: String,
+
+  // Number of attachments/documents pointing at this blob
+  refCount: {
+    type: Number,
+    default: 0
+  },
+  lastReferencedAt: Date
+}, {
+  timestamps: true
+});
+
+// Unreferenced blobs are candidates for purging
+fileBlobSchema.index({ refCount: 1, updatedAt: 1 });
+
+// Virtual for the digest
+fileBlobSchema.virtual('digest').get(function() {
+  return this._id;
+});
+
+// Static method to register references to stored blobs (creating the
+// metadata rows on first use). `files` are upload results with
+// { digest, size, mimetype }.
+fileBlobSchema.statics.addReferences = function(files) {
+  if (!files.length) return null;
+
+  // Fold repeats of the same content into one upsert per blob
+  const byDigest = new Map();
+  files.forEach(file => {
+    const entry = byDigest.get(file.digest) || { file, count: 0 };
+    entry.count += 1;
+    byDigest.set(file.digest, entry);
+  });
+
+  const now = new Date();
+  return this.bulkWrite(Array.from(byDigest.values()).map(({ file, count }) => ({
+    updateOne: {
+      filter: { _id: file.digest },
+      update: {
+        $inc: { refCount: count },
+        $set: { lastReferencedAt: now },
+        $setOnInsert: { size: file.size, mimetype: file.mimetype }
+      },
+      upsert: true
+    }
+  })), { ordered: false });
+};
+
+// Static method to record a blob written to the store. New rows start
+// unreferenced, so content no caller goes on to reference is purged once
+// the grace period passes; an existing row is touched, restarting its grace
+// period while the caller registers its reference.
+fileBlobSchema.statics.recordStored = function(file) {
+  return this.updateOne(
+    { _id: file.digest },
+    { $setOnInsert: { size: file.size, mimetype: file.mimetype, refCount: 0 } },
+    { upsert: true }
+  );
+};
+
+// Static method to drop references to blobs (never below zero)
+fileBlobSchema.statics.releaseReferences = function(digests) {
+  if (!digests.length) return null;
+
+  const counts = digests.reduce((acc, digest) => {
+    acc[digest] = (acc[digest] || 0) + 1;
+    return acc;
+  }, {});
+
+  return this.bulkWrite(Object.entries(counts).map(([digest, count]) => ({
+    updateOne: {
+      filter: { _id: digest },
+      update: [{ $set: { refCount: { $max: [{ $subtract: [{ $ifNull: ['$refCount', 0] }, count] }, 0] } } }]
+    }
+  })), { ordered: false });
+};
+
+module.exports = mongoose.model('FileBlob', fileBlobSchema);
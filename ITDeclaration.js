@@ -1,5 +1,7 @@
 // src/models/ITDeclaration.js - IT Declaration model for tax management
 const mongoose = require('mongoose');
+const ApprovalQueueItem = require('./ApprovalQueueItem');
+const { getSectionLimit } = require('../utils/taxLimits');
 
 const itDeclarationSchema = new mongoose.Schema({
   employeeId: {
@@ -69,17 +71,8 @@ const itDeclarationSchema = new mongoose.Schema({
   maxLimit: {
     type: Number,
     default: function() {
-      // Set default limits based on section
-      switch(this.section) {
-        case '80C': return 150000;
-        case '80D': return 25000;
-        case '80E': return null; // No limit
-        case '80G': return null; // Varies
-        case '24B': return 200000;
-        case '80EE': return 50000;
-        case '80TTA': return 10000;
-        default: return null;
-      }
+      // Section cap from the versioned limits table for this financial year
+      return getSectionLimit(this.section, this.financialYear);
     }
   },
   status: {
@@ -100,6 +93,8 @@ const itDeclarationSchema = new mongoose.Schema({
     path: String,
     size: Number,
     mimetype: String,
+    // SHA-256 of the content in the blob store
+    digest: String,
     uploadedAt: {
       type: Date,
       default: Date.now
@@ -114,6 +109,9 @@ const itDeclarationSchema = new mongoose.Schema({
   verifiedAt: Date,
   verificationComments: String,
 
+  // Set by the financial year close job; closed declarations are frozen
+  fyClosedAt: Date,
+
   // System fields
   submittedBy: {
     type: mongoose.Schema.Types.ObjectId,
@@ -138,6 +136,9 @@ itDeclarationSchema.index({ createdAt: -1 });
 // Compound index for employee and financial year
 itDeclarationSchema.index({ employee: 1, financialYear: 1 });
 
+// Change fingerprint per financial year for the tax computation cache
+itDeclarationSchema.index({ financialYear: 1, updatedAt: -1 });
+
 // Virtual for formatted amount
 itDeclarationSchema.virtual('formattedAmount').get(function() {
   return new Intl.NumberFormat('en-IN', {
@@ -148,7 +149,7 @@ itDeclarationSchema.virtual('formattedAmount').get(function() {
 
 // Virtual to check if within limit
 itDeclarationSchema.virtual('withinLimit').get(function() {
-  if (!this.maxLimit) return true;
+  if (this.maxLimit === null || this.maxLimit === undefined) return true;
   return this.amount <= this.maxLimit;
 });
 
@@ -195,6 +196,14 @@ itDeclarationSchema.methods.reject = function(verifierId, comments = '') {
   return this.save();
 };
 
+// Declarations are frozen once their financial year is closed
+itDeclarationSchema.pre('save', function(next) {
+  if (!this.isNew && this.fyClosedAt && !this.isModified('fyClosedAt')) {
+    return next(new Error('Declaration is frozen after financial year close'));
+  }
+  next();
+});
+
 // Pre-save middleware to set total amount
 itDeclarationSchema.pre('save', function(next) {
   if (!this.totalAmount) {
@@ -203,6 +212,39 @@ itDeclarationSchema.pre('save', function(next) {
   next();
 });
 
+// Method to summarize the declaration for the approval queue
+itDeclarationSchema.methods.toQueueEntry = function() {
+  return {
+    itemType: 'ITDeclaration',
+    item: this._id,
+    submittedAt: this.createdAt || new Date(),
+    title: `${this.section} declaration (${this.financialYear})`,
+    employee: this.employee,
+    employeeName: this.employeeName,
+    amount: this.amount,
+    currency: 'INR',
+    status: this.status
+  };
+};
+
+// Keep the approval queue in step with submissions and verification
+itDeclarationSchema.pre('save', function(next) {
+  this.$locals.queueChanged = this.isNew || this.isModified('status') || this.isModified('amount');
+  next();
+});
+
+itDeclarationSchema.post('save', function(doc) {
+  if (!doc.$locals.queueChanged) return;
+
+  const sync = ['Pending', 'Under Review'].includes(doc.status)
+    ? ApprovalQueueItem.enqueue([doc.toQueueEntry()])
+    : ApprovalQueueItem.dequeue('ITDeclaration', [doc._id]);
+
+  return sync.catch(error => {
+    console.error('Approval queue sync error:', error);
+  });
+});
+
 // Transform output
 itDeclarationSchema.methods.toJSON = function() {
   const declarationObject = this.toObject({ virtuals: true });
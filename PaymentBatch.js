@@ -0,0 +1,51 @@
+// src/models/PaymentBatch.js - Batch of reimbursements paid together in a payment run
+const mongoose = require('mongoose');
+
+const paymentBatchSchema = new mongoose.Schema({
+  run: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'PaymentRun',
+    required: [true, 'Payment run is required']
+  },
+  sequence: {
+    type: Number,
+    required: [true, 'Batch sequence is required']
+  },
+  // Deterministic per run and sequence, so re-running a step is idempotent
+  reference: {
+    type: String,
+    required: [true, 'Batch reference is required'],
+    unique: true
+  },
+  status: {
+    type: String,
+    enum: ['Open', 'Reserved', 'Exported', 'Paid'],
+    default: 'Open'
+  },
+  claims: [{
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Reimbursement'
+  }],
+  claimCount: {
+    type: Number,
+    default: 0
+  },
+  amount: {
+    type: Number,
+    default: 0
+  },
+  currency: String,
+
+  // Bank file export
+  exportFile: String,
+  exportChecksum: String,
+  exportedAt: Date,
+  paidAt: Date
+}, {
+  timestamps: true
+});
+
+paymentBatchSchema.index({ run: 1, sequence: 1 }, { unique: true });
+paymentBatchSchema.index({ run: 1, status: 1 });
+
+module.exports = mongoose.model('PaymentBatch', paymentBatchSchema);
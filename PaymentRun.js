@@ -0,0 +1,79 @@
+// src/models/PaymentRun.js - Reimbursement payment run with progress checkpoints
+const mongoose = require('mongoose');
+
+const paymentRunSchema = new mongoose.Schema({
+  // Client-supplied or derived key; starting a run with the same key resumes it
+  runKey: {
+    type: String,
+    required: [true, 'Run key is required'],
+    unique: true,
+    trim: true
+  },
+  status: {
+    type: String,
+    enum: ['Selecting', 'Exporting', 'Completed'],
+    default: 'Selecting'
+  },
+  // Only claims approved up to this instant are picked up
+  cutoff: {
+    type: Date,
+    required: [true, 'Cutoff date is required']
+  },
+  batchSize: {
+    type: Number,
+    default: 200,
+    min: [1, 'Batch size must be at least 1'],
+    max: [5000, 'Batch size cannot be more than 5000']
+  },
+
+  // Progress / checkpoint
+  batchCount: {
+    type: Number,
+    default: 0
+  },
+  paidBatchCount: {
+    type: Number,
+    default: 0
+  },
+  claimCount: {
+    type: Number,
+    default: 0
+  },
+  totalAmount: {
+    type: Number,
+    default: 0
+  },
+
+  // Lease so only one process drives a run at a time
+  lockedBy: String,
+  lockedUntil: Date,
+
+  startedAt: Date,
+  completedAt: Date,
+  lastError: String,
+
+  createdBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    required: [true, 'Creator is required']
+  }
+}, {
+  timestamps: true
+});
+
+paymentRunSchema.index({ status: 1, createdAt: -1 });
+
+// Virtual for progress percentage
+paymentRunSchema.virtual('progress').get(function() {
+  if (this.status === 'Completed') return 100;
+  if (!this.batchCount) return 0;
+  return Math.round((this.paidBatchCount / this.batchCount) * 100);
+});
+
+// Transform output
+paymentRunSchema.methods.toJSON = function() {
+  const runObject = this.toObject({ virtuals: true });
+  return runObject;
+};
+
+module.exports = mongoose.model('PaymentRun', paymentRunSchema);
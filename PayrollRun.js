@@ -0,0 +1,75 @@
+// src/models/PayrollRun.js - One monthly payroll computation and its totals
+const mongoose = require('mongoose');
+
+const payrollRunSchema = new mongoose.Schema({
+  // Pay month, "YYYY-MM"
+  period: {
+    type: String,
+    required: [true, 'Payroll period is required'],
+    match: [/^\d{4}-(0[1-9]|1[0-2])$/, 'Payroll period must be in format YYYY-MM']
+  },
+  financialYear: {
+    type: String,
+    match: [/^\d{4}-\d{4}$/, 'Financial year must be in format YYYY-YYYY']
+  },
+  status: {
+    type: String,
+    enum: ['Running', 'Completed', 'Failed'],
+    default: 'Running'
+  },
+
+  // Inputs: where compensation came from, and a sha256 over every input row
+  // (compensation, eligible deductions and tax rules), so a re-run can be
+  // checked against the original
+  inputSource: {
+    type: String,
+    enum: ['live', 'snapshot'],
+    default: 'live'
+  },
+  inputChecksum: String,
+  salaryLock: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'SalaryLock'
+  },
+  limitsVersion: String,
+
+  // Results
+  employeeCount: {
+    type: Number,
+    default: 0
+  },
+  totals: {
+    gross: { type: Number, default: 0 },
+    deductions: { type: Number, default: 0 },
+    incomeTax: { type: Number, default: 0 },
+    net: { type: Number, default: 0 }
+  },
+
+  action: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Action'
+  },
+  startedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User'
+  },
+  startedAt: {
+    type: Date,
+    default: Date.now
+  },
+  completedAt: Date,
+  durationMs: Number,
+  lastError: String
+}, {
+  timestamps: true
+});
+
+payrollRunSchema.index({ period: 1, createdAt: -1 });
+payrollRunSchema.index({ status: 1, createdAt: -1 });
+
+// Static method to get the latest completed run for a period
+payrollRunSchema.statics.getLatestCompleted = function(period) {
+  return this.findOne({ period, status: 'Completed' }).sort({ completedAt: -1 });
+};
+
+module.exports = mongoose.model('PayrollRun', payrollRunSchema);
@@ -0,0 +1,49 @@
+// src/models/Payslip.js - Per-employee payslip written by a payroll run
+const mongoose = require('mongoose');
+
+const payslipSchema = new mongoose.Schema({
+  run: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'PayrollRun',
+    required: [true, 'Payroll run is required']
+  },
+  period: {
+    type: String,
+    required: [true, 'Payroll period is required']
+  },
+  employee: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Employee',
+    required: [true, 'Employee reference is required']
+  },
+  employeeId: String,
+  employeeName: String,
+  department: String,
+
+  // Monthly amounts
+  earnings: {
+    fixed: Number,
+    variable: Number,
+    gross: Number
+  },
+  deductions: {
+    providentFund: Number,
+    professionalTax: Number,
+    incomeTax: Number,
+    total: Number
+  },
+  netPay: Number,
+
+  // Annual figures behind the monthly tax
+  declaredDeductions: Number,
+  annualTaxable: Number,
+
+  generatedAt: Date
+}, {
+  versionKey: false
+});
+
+payslipSchema.index({ run: 1, employee: 1 }, { unique: true });
+payslipSchema.index({ employee: 1, period: -1 });
+
+module.exports = mongoose.model('Payslip', payslipSchema);
@@ -1,5 +1,9 @@
 // src/models/Reimbursement.js - Reimbursement model for expense management
+const crypto = require('crypto');
 const mongoose = require('mongoose');
+const ReimbursementRollup = require('./ReimbursementRollup');
+const ApprovalQueueItem = require('./ApprovalQueueItem');
+const { toBaseCurrency } = require('../utils/currency');
 
 const reimbursementSchema = new mongoose.Schema({
   employeeId: {
@@ -16,6 +20,7 @@ const reimbursementSchema = new mongoose.Schema({
     type: String,
     required: [true, 'Employee name is required']
   },
+  department: String,
   category: {
     type: String,
     required: [true, 'Category is required'],
@@ -43,6 +48,17 @@ const reimbursementSchema = new mongoose.Schema({
     default: 'INR',
     enum: ['INR', 'USD', 'EUR', 'GBP']
   },
+
+  // Amount normalized to the base currency at write time
+  baseAmount: {
+    type: Number,
+    min: [0, 'Base amount cannot be negative']
+  },
+  baseCurrency: String,
+  fxRate: Number,
+  fxRateDate: Date,
+  fxRateVersion: String,
+
   date: {
     type: Date,
     required: [true, 'Expense date is required'],
@@ -75,6 +91,8 @@ const reimbursementSchema = new mongoose.Schema({
     path: String,
     size: Number,
     mimetype: String,
+    // SHA-256 of the content in the blob store
+    digest: String,
     uploadedAt: {
       type: Date,
       default: Date.now
@@ -105,6 +123,7 @@ const reimbursementSchema = new mongoose.Schema({
   },
   approvedAt: Date,
   approvalComments: String,
+  decisionBatch: String,
 
   // Payment Information
   paymentStatus: {
@@ -114,6 +133,7 @@ const reimbursementSchema = new mongoose.Schema({
   },
   paymentDate: Date,
   paymentReference: String,
+  paymentBatch: String,
 
   // System fields
   submittedBy: {
@@ -135,6 +155,14 @@ reimbursementSchema.index({ category: 1 });
 reimbursementSchema.index({ status: 1 });
 reimbursementSchema.index({ date: -1 });
 reimbursementSchema.index({ createdAt: -1 });
+reimbursementSchema.index({ decisionBatch: 1 }, { sparse: true });
+
+// Covers base-currency totals by status and date range
+reimbursementSchema.index({ status: 1, date: -1, baseAmount: 1 });
+
+// Payment runs pick approved, unpaid claims oldest approval first
+reimbursementSchema.index({ status: 1, paymentStatus: 1, approvedAt: 1 });
+reimbursementSchema.index({ paymentBatch: 1 }, { sparse: true });
 
 // Virtual for formatted amount
 reimbursementSchema.virtual('formattedAmount').get(function() {
@@ -169,40 +197,200 @@ reimbursementSchema.statics.getByDateRange = function(startDate, endDate) {
   }).populate('employee', 'firstName lastName employeeId');
 };
 
+// Rollups and the approval queue are derived data and can always be
+// rebuilt, so a failed write is logged rather than failing the claim operation
+const syncDerived = (promise) => promise.catch(error => {
+  console.error('Reimbursement derived data sync error:', error);
+});
+
+// Normalize the amount whenever amount, currency or date change
+reimbursementSchema.pre('validate', function(next) {
+  if (this.isNew || this.isModified('amount') || this.isModified('currency') || this.isModified('date')) {
+    try {
+      Object.assign(this, toBaseCurrency(this.amount, this.currency, this.date));
+    } catch (error) {
+      return next(error);
+    }
+  }
+  next();
+});
+
+// Keep rollups and the approval queue in step with submissions and removals
+reimbursementSchema.pre('save', function(next) {
+  this.$locals.wasNew = this.isNew;
+  next();
+});
+
+reimbursementSchema.post('save', function(doc) {
+  if (doc.$locals.wasNew) {
+    return Promise.all([
+      syncDerived(ReimbursementRollup.recordTransition(doc, null, doc.status)),
+      doc.status === 'Pending' && syncDerived(ApprovalQueueItem.enqueue([doc.toQueueEntry()]))
+    ]);
+  }
+});
+
+reimbursementSchema.post('findOneAndDelete', function(doc) {
+  if (doc) {
+    return Promise.all([
+      syncDerived(ReimbursementRollup.recordTransition(doc, doc.status, null)),
+      syncDerived(ApprovalQueueItem.dequeue('Reimbursement', [doc._id]))
+    ]);
+  }
+});
+
+// Build the atomic update applied when an approver acts on a claim
+const buildDecisionUpdate = (action, approverId, approverName, comments = '', batchId = null) => {
+  const now = new Date();
+  return {
+    $set: {
+      status: action,
+      approvedBy: approverId,
+      approvedAt: now,
+      approvalComments: comments,
+      decisionBatch: batchId
+    },
+    $push: {
+      approvalHistory: {
+        approver: approverId,
+        approverName: approverName,
+        action: action,
+        comments: comments,
+        actionDate: now
+      }
+    }
+  };
+};
+
+// Static method to approve/decline a single claim. The `status: 'Pending'`
+// precondition makes concurrent approvers race safely: only one update
+// matches, the loser gets null back.
+reimbursementSchema.statics.decide = async function(id, action, approverId, approverName, comments = '') {
+  const reimbursement = await this.findOneAndUpdate(
+    { _id: id, status: 'Pending' },
+    buildDecisionUpdate(action, approverId, approverName, comments),
+    { new: true, runValidators: true }
+  );
+
+  if (reimbursement) {
+    await Promise.all([
+      syncDerived(ReimbursementRollup.recordTransition(reimbursement, 'Pending', action)),
+      syncDerived(ApprovalQueueItem.dequeue('Reimbursement', [reimbursement._id]))
+    ]);
+  }
+
+  return reimbursement;
+};
+
+// Static method to approve/decline many claims in a single round trip.
+// `items` is an array of { id, comments }.
+reimbursementSchema.statics.decideMany = async function(items, action, approverId, approverName) {
+  if (!items.length) {
+    return { requested: 0, matched: 0, modified: 0 };
+  }
+
+  // Tag every claim this batch wins so rollups only count those
+  const batchId = crypto.randomUUID();
+  const operations = items.map(item => ({
+    updateOne: {
+      filter: { _id: item.id, status: 'Pending' },
+      update: buildDecisionUpdate(action, approverId, approverName, item.comments || '', batchId)
+    }
+  }));
+
+  const result = await this.bulkWrite(operations, { ordered: false });
+
+  if (result.modifiedCount) {
+    const decided = await this.find({ decisionBatch: batchId })
+      .select('date category employee employeeId employeeName department amount currency baseAmount')
+      .lean();
+
+    const deltas = [];
+    decided.forEach(claim => {
+      const amount = ReimbursementRollup.baseAmountOf(claim);
+      deltas.push({ claim, status: 'Pending', count: -1, amount: -amount });
+      deltas.push({ claim, status: action, count: 1, amount });
+    });
+    await Promise.all([
+      syncDerived(ReimbursementRollup.applyDeltas(deltas)),
+      syncDerived(ApprovalQueueItem.dequeue('Reimbursement', decided.map(claim => claim._id)))
+    ]);
+  }
+
+  return {
+    requested: items.length,
+    matched: result.matchedCount,
+    modified: result.modifiedCount
+  };
+};
+
+// Static method to compute the normalized fields for an update that
+// touches amount, currency or date (atomic updates skip document hooks)
+reimbursementSchema.statics.normalizeUpdate = function(current, updates) {
+  if (updates.amount === undefined && updates.currency === undefined && updates.date === undefined) {
+    return updates;
+  }
+  const merged = { ...current, ...updates };
+  return { ...updates, ...toBaseCurrency(Number(merged.amount), merged.currency, merged.date) };
+};
+
+// Static method to normalize claims written before base amounts existed,
+// in bounded bulkWrite batches
+reimbursementSchema.statics.backfillBaseAmounts = async function(batchSize = 500) {
+  const cursor = this.find({ baseAmount: { $exists: false } })
+    .select('amount currency date')
+    .lean()
+    .cursor();
+
+  let operations = [];
+  let updated = 0;
+
+  for await (const claim of cursor) {
+    operations.push({
+      updateOne: {
+        filter: { _id: claim._id },
+        update: { $set: toBaseCurrency(claim.amount, claim.currency, claim.date) }
+      }
+    });
+
+    if (operations.length >= batchSize) {
+      await this.bulkWrite(operations, { ordered: false });
+      updated += operations.length;
+      operations = [];
+    }
+  }
+
+  if (operations.length) {
+    await this.bulkWrite(operations, { ordered: false });
+    updated += operations.length;
+  }
+
+  return updated;
+};
+
+// Method to summarize the claim for the approval queue
+reimbursementSchema.methods.toQueueEntry = function() {
+  return {
+    itemType: 'Reimbursement',
+    item: this._id,
+    submittedAt: this.createdAt || new Date(),
+    title: `${this.category} reimbursement`,
+    employee: this.employee,
+    employeeName: this.employeeName,
+    amount: this.baseAmount,
+    currency: this.baseCurrency,
+    status: this.status
+  };
+};
+
 // Method to approve reimbursement
 reimbursementSchema.methods.approve = function(approverId, approverName, comments = '') {
-  this.status = 'Approved';
-  this.approvedBy = approverId;
-  this.approvedAt = new Date();
-  this.approvalComments = comments;
-
-  this.approvalHistory.push({
-    approver: approverId,
-    approverName: approverName,
-    action: 'Approved',
-    comments: comments,
-    actionDate: new Date()
-  });
-
-  return this.save();
+  return this.constructor.decide(this._id, 'Approved', approverId, approverName, comments);
 };
 
 // Method to decline reimbursement
 reimbursementSchema.methods.decline = function(approverId, approverName, comments = '') {
-  this.status = 'Declined';
-  this.approvedBy = approverId;
-  this.approvedAt = new Date();
-  this.approvalComments = comments;
-
-  this.approvalHistory.push({
-    approver: approverId,
-    approverName: approverName,
-    action: 'Declined',
-    comments: comments,
-    actionDate: new Date()
-  });
-
-  return this.save();
+  return this.constructor.decide(this._id, 'Declined', approverId, approverName, comments);
 };
 
 // Transform output
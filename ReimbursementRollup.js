@@ -0,0 +1,232 @@
+// src/models/ReimbursementRollup.js - Monthly reimbursement spend rollups for analytics
+const mongoose = require('mongoose');
+const { toBaseCurrency } = require('../utils/currency');
+
+const STATUSES = ['Pending', 'Approved', 'Declined', 'Processing'];
+
+// Count and amount bucket kept per claim status
+const statusBucket = {
+  count: { type: Number, default: 0 },
+  amount: { type: Number, default: 0 }
+};
+
+const reimbursementRollupSchema = new mongoose.Schema({
+  // Bucket key: month (YYYY-MM of the expense date) x category x employee
+  month: {
+    type: String,
+    required: [true, 'Month is required'],
+    match: [/^\d{4}-\d{2}$/, 'Month must be in format YYYY-MM']
+  },
+  category: {
+    type: String,
+    required: [true, 'Category is required']
+  },
+  employee: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Employee',
+    required: [true, 'Employee reference is required']
+  },
+
+  // Denormalized for grouping without lookups
+  employeeId: String,
+  employeeName: String,
+  department: String,
+
+  byStatus: STATUSES.reduce((buckets, status) => {
+    buckets[status] = statusBucket;
+    return buckets;
+  }, {}),
+
+  rebuiltAt: Date
+}, {
+  timestamps: true
+});
+
+// Unique bucket key, also used as the $merge target on rebuild
+reimbursementRollupSchema.index({ month: 1, category: 1, employee: 1 }, { unique: true });
+reimbursementRollupSchema.index({ department: 1, month: 1 });
+reimbursementRollupSchema.index({ employee: 1, month: 1 });
+
+// Helper to compute the month bucket of an expense date
+const toMonth = (date) => new Date(date).toISOString().slice(0, 7);
+
+// Static method to apply count/amount deltas to rollup buckets.
+// Amounts are in the base currency (claim.baseAmount).
+// Each delta is { claim, status, count, amount }; deltas for the same
+// bucket are folded together so the write is one bulkWrite. Touched buckets
+// are stamped with rebuiltAt, so a rebuild running meanwhile keeps them.
+reimbursementRollupSchema.statics.applyDeltas = async function(deltas) {
+  const buckets = new Map();
+
+  deltas.forEach(({ claim, status, count, amount }) => {
+    const month = toMonth(claim.date);
+    const key = `${month}|${claim.category}|${claim.employee}`;
+
+    if (!buckets.has(key)) {
+      buckets.set(key, {
+        filter: { month, category: claim.category, employee: claim.employee },
+        details: {
+          employeeId: claim.employeeId,
+          employeeName: claim.employeeName,
+          department: claim.department
+        },
+        inc: {}
+      });
+    }
+
+    const inc = buckets.get(key).inc;
+    inc[`byStatus.${status}.count`] = (inc[`byStatus.${status}.count`] || 0) + count;
+    inc[`byStatus.${status}.amount`] = (inc[`byStatus.${status}.amount`] || 0) + amount;
+  });
+
+  if (!buckets.size) return null;
+
+  const now = new Date();
+  const operations = Array.from(buckets.values()).map(({ filter, details, inc }) => ({
+    updateOne: {
+      filter,
+      update: { $inc: inc, $set: { ...details, rebuiltAt: now } },
+      upsert: true
+    }
+  }));
+
+  return this.bulkWrite(operations, { ordered: false });
+};
+
+// Helper to get a claim's base-currency amount, converting claims saved
+// before base amounts existed (backfillBaseAmounts only runs on rebuild)
+const baseAmountOf = (claim) => (typeof claim.baseAmount === 'number'
+  ? claim.baseAmount
+  : toBaseCurrency(claim.amount, claim.currency, claim.date).baseAmount);
+
+// Static method to record a single claim moving between statuses
+// (fromStatus null = newly submitted, toStatus null = removed)
+reimbursementRollupSchema.statics.recordTransition = async function(claim, fromStatus, toStatus) {
+  const deltas = [];
+  const amount = baseAmountOf(claim);
+  if (fromStatus) deltas.push({ claim, status: fromStatus, count: -1, amount: -amount });
+  if (toStatus) deltas.push({ claim, status: toStatus, count: 1, amount });
+  return this.applyDeltas(deltas);
+};
+
+// Static method to record an edit of a claim that stayed in the same status
+reimbursementRollupSchema.statics.recordEdit = async function(before, after) {
+  return this.applyDeltas([
+    { claim: before, status: before.status, count: -1, amount: -baseAmountOf(before) },
+    { claim: after, status: before.status, count: 1, amount: baseAmountOf(after) }
+  ]);
+};
+
+// Static method to rebuild every bucket from the claims collection via $merge.
+// Buckets neither rebuilt nor changed by a delta since the rebuild started
+// no longer have claims and are dropped.
+reimbursementRollupSchema.statics.rebuild = async function() {
+  const Reimbursement = mongoose.model('Reimbursement');
+  const rebuiltAt = new Date();
+
+  // Claims from before write-time normalization need a base amount first
+  await Reimbursement.backfillBaseAmounts();
+
+  await Reimbursement.aggregate([
+    {
+      $group: {
+        _id: {
+          month: { $dateToString: { format: '%Y-%m', date: '$date' } },
+          category: '$category',
+          employee: '$employee',
+          status: '$status'
+        },
+        count: { $sum: 1 },
+        amount: { $sum: '$baseAmount' },
+        employeeId: { $last: '$employeeId' },
+        employeeName: { $last: '$employeeName' },
+        department: { $last: '$department' }
+      }
+    },
+    {
+      $group: {
+        _id: {
+          month: '$_id.month',
+          category: '$_id.category',
+          employee: '$_id.employee'
+        },
+        statuses: { $push: { k: '$_id.status', v: { count: '$count', amount: '$amount' } } },
+        employeeId: { $last: '$employeeId' },
+        employeeName: { $last: '$employeeName' },
+        department: { $last: '$department' }
+      }
+    },
+    {
+      $project: {
+        _id: 0,
+        month: '$_id.month',
+        category: '$_id.category',
+        employee: '$_id.employee',
+        employeeId: 1,
+        employeeName: 1,
+        department: 1,
+        byStatus: { $arrayToObject: '$statuses' },
+        rebuiltAt: { $literal: rebuiltAt },
+        createdAt: { $literal: rebuiltAt },
+        updatedAt: { $literal: rebuiltAt }
+      }
+    },
+    {
+      $merge: {
+        into: this.collection.name,
+        on: ['month', 'category', 'employee'],
+        whenMatched: 'replace',
+        whenNotMatched: 'insert'
+      }
+    }
+  ]);
+
+  const stale = await this.deleteMany({
+    $or: [{ rebuiltAt: { $lt: rebuiltAt } }, { rebuiltAt: { $exists: false } }]
+  });
+
+  return { rebuiltAt, removed: stale.deletedCount };
+};
+
+// Static method to answer spend charts from rollup rows.
+// groupBy is any combination of month, category, employee and department;
+// status is one of the claim statuses or 'all'.
+reimbursementRollupSchema.statics.getSpend = function({ from, to, groupBy = ['month'], status = 'Approved', filters = {} }) {
+  const match = { ...filters };
+  if (from || to) {
+    match.month = {};
+    if (from) match.month.$gte = from;
+    if (to) match.month.$lte = to;
+  }
+
+  const statuses = status === 'all' ? STATUSES : [status];
+  const sumOf = (field) => ({
+    $sum: { $add: statuses.map(s => ({ $ifNull: [`$byStatus.${s}.${field}`, 0] })) }
+  });
+
+  const groupId = {};
+  groupBy.forEach(dimension => {
+    groupId[dimension] = `$${dimension}`;
+  });
+  if (groupBy.includes('employee')) {
+    groupId.employeeName = '$employeeName';
+  }
+
+  return this.aggregate([
+    { $match: match },
+    {
+      $group: {
+        _id: groupId,
+        count: sumOf('count'),
+        amount: sumOf('amount')
+      }
+    },
+    { $sort: { '_id.month': 1, amount: -1 } }
+  ]);
+};
+
+reimbursementRollupSchema.statics.STATUSES = STATUSES;
+
+reimbursementRollupSchema.statics.baseAmountOf = baseAmountOf;
+
+module.exports = mongoose.model('ReimbursementRollup', reimbursementRollupSchema);
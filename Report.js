@@ -0,0 +1,71 @@
+// src/models/Report.js - Generated report files, cached by definition, parameters and data version
+const mongoose = require('mongoose');
+
+const reportSchema = new mongoose.Schema({
+  // sha256 of (definition, definition version, params, format, data version)
+  key: {
+    type: String,
+    required: [true, 'Cache key is required']
+  },
+  definition: {
+    type: String,
+    required: [true, 'Report definition is required']
+  },
+  params: {
+    type: mongoose.Schema.Types.Mixed,
+    default: {}
+  },
+  format: {
+    type: String,
+    enum: ['csv', 'xlsx'],
+    default: 'csv'
+  },
+  // Fingerprint of the source data the report was requested against
+  dataVersion: String,
+
+  status: {
+    type: String,
+    enum: ['Generating', 'Ready', 'Failed'],
+    default: 'Generating'
+  },
+  // The generated file, registered as a document in the Reports category
+  document: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Document'
+  },
+  rowCount: {
+    type: Number,
+    default: 0
+  },
+  size: {
+    type: Number,
+    default: 0
+  },
+
+  // The 'Generate Report' action producing the file
+  action: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Action'
+  },
+  requestedBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    required: [true, 'Requester is required']
+  },
+  hits: {
+    type: Number,
+    default: 0
+  },
+  generatedAt: Date,
+  durationMs: Number,
+  lastError: String
+}, {
+  timestamps: true
+});
+
+// One report per cache key; a repeated request finds it here
+reportSchema.index({ key: 1 }, { unique: true });
+reportSchema.index({ definition: 1, createdAt: -1 });
+reportSchema.index({ requestedBy: 1, createdAt: -1 });
+
+module.exports = mongoose.model('Report', reportSchema);
@@ -0,0 +1,57 @@
+// src/models/SalaryLock.js - Header of a locked monthly compensation snapshot
+const mongoose = require('mongoose');
+
+const salaryLockSchema = new mongoose.Schema({
+  // Pay month, "YYYY-MM"; one lock per month
+  period: {
+    type: String,
+    required: [true, 'Period is required'],
+    unique: true,
+    match: [/^\d{4}-(0[1-9]|1[0-2])$/, 'Period must be in format YYYY-MM']
+  },
+  status: {
+    type: String,
+    enum: ['Locking', 'Locked'],
+    default: 'Locking'
+  },
+
+  // sha256 over the snapshot rows in employee order (see SalarySnapshot.checksumLine)
+  checksum: String,
+  employeeCount: {
+    type: Number,
+    default: 0
+  },
+  totals: {
+    salary: { type: Number, default: 0 },
+    incentives: { type: Number, default: 0 },
+    bonus: { type: Number, default: 0 }
+  },
+
+  action: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Action'
+  },
+  createdBy: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User'
+  },
+  lockedAt: Date,
+
+  // Lease while the snapshot is being written
+  lockedBy: String,
+  lockedUntil: Date
+}, {
+  timestamps: true
+});
+
+salaryLockSchema.index({ status: 1, period: -1 });
+
+// Transform output
+salaryLockSchema.methods.toJSON = function() {
+  const lockObject = this.toObject();
+  delete lockObject.lockedBy;
+  delete lockObject.lockedUntil;
+  return lockObject;
+};
+
+module.exports = mongoose.model('SalaryLock', salaryLockSchema);
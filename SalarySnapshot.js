@@ -0,0 +1,75 @@
+// src/models/SalarySnapshot.js - Compact per-employee compensation row of a locked month
+const mongoose = require('mongoose');
+const crypto = require('crypto');
+
+const salarySnapshotSchema = new mongoose.Schema({
+  period: {
+    type: String,
+    required: [true, 'Period is required']
+  },
+  employee: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Employee',
+    required: [true, 'Employee reference is required']
+  },
+  employeeId: String,
+  employeeName: String,
+  department: String,
+  role: String,
+
+  salary: Number,
+  ctc: Number,
+  incentives: Number,
+  bonus: Number,
+  providentFund: Boolean
+}, {
+  versionKey: false
+});
+
+// Rows of a month in employee order (also what payroll reads)
+salarySnapshotSchema.index({ period: 1, employee: 1 }, { unique: true });
+salarySnapshotSchema.index({ period: 1, department: 1 });
+
+// Canonical text of a row for the lock checksum
+const checksumLine = (row) => [
+  row.employee, row.employeeId, row.department, row.salary || 0, row.ctc || 0,
+  row.incentives || 0, row.bonus || 0, row.providentFund ? 1 : 0
+].join('|');
+
+// Static method to recompute a month's checksum from its rows
+salarySnapshotSchema.statics.computeChecksum = async function(period) {
+  const hash = crypto.createHash('sha256');
+  let count = 0;
+  const cursor = this.find({ period }).sort({ employee: 1 }).lean().cursor({ batchSize: 5000 });
+  for await (const row of cursor) {
+    hash.update(`${checksumLine(row)}\n`);
+    count += 1;
+  }
+  return { checksum: hash.digest('hex'), count };
+};
+
+// Static method to summarize a locked month by department or role
+salarySnapshotSchema.statics.summarize = function(period, groupBy = 'department') {
+  return this.aggregate([
+    { $match: { period } },
+    {
+      $group: {
+        _id: `$${groupBy}`,
+        headcount: { $sum: 1 },
+        salary: { $sum: '$salary' },
+        incentives: { $sum: '$incentives' },
+        bonus: { $sum: '$bonus' }
+      }
+    },
+    {
+      $addFields: {
+        monthlyGross: { $add: ['$salary', { $divide: [{ $add: ['$incentives', '$bonus'] }, 12] }] }
+      }
+    },
+    { $sort: { _id: 1 } }
+  ]);
+};
+
+salarySnapshotSchema.statics.checksumLine = checksumLine;
+
+module.exports = mongoose.model('SalarySnapshot', salarySnapshotSchema);
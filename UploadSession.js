@@ -0,0 +1,84 @@
+// src/models/UploadSession.js - Resumable upload session model
+const mongoose = require('mongoose');
+
+const uploadSessionSchema = new mongoose.Schema({
+  user: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    required: [true, 'User is required']
+  },
+  filename: {
+    type: String,
+    required: [true, 'File name is required'],
+    trim: true
+  },
+  mimetype: String,
+  size: {
+    type: Number,
+    required: [true, 'File size is required'],
+    min: [1, 'File size must be positive']
+  },
+  // Optional sha256 (hex) of the whole file, checked on completion
+  sha256: {
+    type: String,
+    lowercase: true,
+    match: [/^[a-f0-9]{64}$/, 'sha256 must be 64 hex characters']
+  },
+
+  // Bytes safely on disk, always a contiguous prefix of the file
+  received: {
+    type: Number,
+    default: 0
+  },
+  status: {
+    type: String,
+    enum: ['Open', 'Completed'],
+    default: 'Open'
+  },
+
+  // Where the finished Document goes
+  documentFields: {
+    name: String,
+    parentFolder: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: 'Document'
+    },
+    folder: String,
+    category: String,
+    description: String,
+    tags: [String]
+  },
+  document: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'Document'
+  },
+
+  // Single-writer lock while a chunk is being received
+  lockedUntil: Date,
+
+  // Session (and its partial file) expire unless chunks keep arriving
+  expiresAt: {
+    type: Date,
+    required: true
+  }
+}, {
+  timestamps: true
+});
+
+// TTL: MongoDB removes expired sessions; their partial files are swept separately
+uploadSessionSchema.index({ expiresAt: 1 }, { expireAfterSeconds: 0 });
+uploadSessionSchema.index({ user: 1, status: 1 });
+
+// Virtual for upload progress percentage
+uploadSessionSchema.virtual('progress').get(function() {
+  return this.size ? Math.floor((this.received / this.size) * 100) : 0;
+});
+
+// Transform output
+uploadSessionSchema.methods.toJSON = function() {
+  const sessionObject = this.toObject({ virtuals: true });
+  delete sessionObject.lockedUntil;
+  return sessionObject;
+};
+
+module.exports = mongoose.model('UploadSession', uploadSessionSchema);
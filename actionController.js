@@ -0,0 +1,277 @@
+// src/controllers/actionController.js - Action management controller
+const mongoose = require('mongoose');
+const Action = require('../models/Action');
+const ActionLog = require('../models/ActionLog');
+const actionScheduler = require('../jobs/actionScheduler');
+const actionPool = require('../services/actionPool');
+const overdueTracker = require('../services/overdueTracker');
+
+// Roles that see every action rather than only their own
+const OVERSEER_ROLES = ['Administrator', 'HR Manager', 'Manager'];
+
+// @desc    Get the action scheduler state on this node
+// @route   GET /api/actions/scheduler
+// @access  Private (Admin)
+const getSchedulerStatus = async (req, res) => {
+  try {
+    const [due, running] = await Promise.all([
+      Action.countDocuments({ dueAt: { $lte: new Date() } }),
+      Action.countDocuments({ lockedUntil: { $gt: new Date() } })
+    ]);
+
+    res.status(200).json({
+      success: true,
+      data: {
+        node: actionScheduler.status(),
+        workers: actionPool.status(),
+        cluster: { due, running }
+      }
+    });
+
+  } catch (error) {
+    console.error('Get scheduler status error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Fill due times for actions created before the scheduler and reload
+// @route   POST /api/actions/scheduler/backfill
+// @access  Private (Admin)
+const backfillSchedule = async (req, res) => {
+  try {
+    const result = await Action.backfillDueAt();
+    await actionScheduler.refill();
+
+    res.status(200).json({
+      success: true,
+      message: 'Action schedule backfilled',
+      data: { updated: result.modifiedCount }
+    });
+
+  } catch (error) {
+    console.error('Backfill action schedule error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// Helper to encode/decode the log paging cursor (timestamp|id)
+const encodeLogCursor = (entry) => `${entry.timestamp.toISOString()}|${entry._id}`;
+const decodeLogCursor = (cursor) => {
+  const [timestamp, id] = String(cursor).split('|');
+  const date = new Date(timestamp);
+  if (isNaN(date) || !mongoose.isValidObjectId(id)) return null;
+  return { timestamp: date, id: new mongoose.Types.ObjectId(id) };
+};
+
+// @desc    Get an action's execution log, oldest first
+// @route   GET /api/actions/:id/logs
+// @access  Private (Admin/HR, creator or assignee)
+const getActionLogs = async (req, res) => {
+  try {
+    const { level, limit = 100, cursor } = req.query;
+
+    const action = await Action.findById(req.params.id).select('createdBy assignedTo');
+    if (!action) {
+      return res.status(404).json({
+        success: false,
+        message: 'Action not found'
+      });
+    }
+
+    const userId = String(req.user._id);
+    const privileged = ['Administrator', 'HR Manager'].includes(req.user.role);
+    if (!privileged && String(action.createdBy) !== userId && String(action.assignedTo) !== userId) {
+      return res.status(403).json({
+        success: false,
+        message: 'Access denied'
+      });
+    }
+
+    const after = cursor ? decodeLogCursor(cursor) : null;
+    if (cursor && !after) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid cursor'
+      });
+    }
+
+    const pageSize = Math.min(parseInt(limit) || 100, 500);
+    const entries = await ActionLog.getForAction(action._id, { limit: pageSize, after, level });
+
+    res.status(200).json({
+      success: true,
+      data: entries,
+      count: entries.length,
+      nextCursor: entries.length === pageSize ? encodeLogCursor(entries[entries.length - 1]) : null
+    });
+
+  } catch (error) {
+    console.error('Get action logs error:', error);
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Action not found'
+      });
+    }
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get overdue actions, oldest deadline first
+// @route   GET /api/actions/overdue
+// @access  Private (all overdue for Admin/HR/Manager, otherwise own)
+const getOverdueActions = async (req, res) => {
+  try {
+    const { mine, page = 1, limit = 20 } = req.query;
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const pageNumber = Math.max(parseInt(page) || 1, 1);
+    const assignedTo = mine === 'true' || !OVERSEER_ROLES.includes(req.user.role) ? req.user._id : null;
+
+    let actions;
+    let total;
+    if (overdueTracker.isReady()) {
+      const overdue = overdueTracker.list({ assignedTo, limit: pageSize, skip: (pageNumber - 1) * pageSize });
+      const ids = overdue.entries.map(entry => entry.id);
+      const found = await Action.find({ _id: { $in: ids } }).populate('assignedTo', 'name email');
+      const byId = new Map(found.map(action => [String(action._id), action]));
+      actions = ids.map(id => byId.get(id)).filter(Boolean);
+      total = overdue.total;
+    } else {
+      const query = { deadlineAt: { $lt: new Date() } };
+      if (assignedTo) query.assignedTo = assignedTo;
+      [actions, total] = await Promise.all([
+        Action.getOverdueActions(assignedTo).skip((pageNumber - 1) * pageSize).limit(pageSize),
+        Action.countDocuments(query)
+      ]);
+    }
+
+    res.status(200).json({
+      success: true,
+      data: actions,
+      pagination: {
+        page: pageNumber,
+        limit: pageSize,
+        total,
+        pages: Math.ceil(total / pageSize)
+      }
+    });
+
+  } catch (error) {
+    console.error('Get overdue actions error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get overdue badge counts
+// @route   GET /api/actions/overdue/counts
+// @access  Private
+const getOverdueCounts = async (req, res) => {
+  try {
+    let counts;
+    if (overdueTracker.isReady()) {
+      counts = overdueTracker.counts(req.user._id);
+    } else {
+      const now = new Date();
+      const [total, mine] = await Promise.all([
+        Action.countDocuments({ deadlineAt: { $lt: now } }),
+        Action.countDocuments({ assignedTo: req.user._id, deadlineAt: { $lt: now } })
+      ]);
+      counts = { total, mine };
+    }
+
+    if (!OVERSEER_ROLES.includes(req.user.role)) delete counts.total;
+
+    res.status(200).json({
+      success: true,
+      data: counts
+    });
+
+  } catch (error) {
+    console.error('Get overdue counts error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Move logs embedded in action documents into the log collection
+// @route   POST /api/actions/logs/migrate
+// @access  Private (Admin)
+const migrateActionLogs = async (req, res) => {
+  try {
+    const result = await ActionLog.migrateEmbedded();
+
+    res.status(200).json({
+      success: true,
+      message: 'Action logs migrated',
+      data: result
+    });
+
+  } catch (error) {
+    console.error('Migrate action logs error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Start a set of linked actions; dependents run as their prerequisites settle
+// @route   POST /api/actions/graph/start
+// @access  Private (Admin/HR)
+const startActionGraph = async (req, res) => {
+  try {
+    const { actions } = req.body;
+
+    if (!Array.isArray(actions) || !actions.length || actions.length > 500) {
+      return res.status(400).json({
+        success: false,
+        message: 'Provide between 1 and 500 action ids'
+      });
+    }
+    if (!actions.every(id => mongoose.isValidObjectId(id))) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid action id'
+      });
+    }
+
+    const plan = await Action.startGraph(actions);
+
+    res.status(200).json({
+      success: true,
+      message: `Started ${plan.triggered} root action(s)`,
+      data: plan
+    });
+
+  } catch (error) {
+    console.error('Start action graph error:', error);
+    res.status(error.status || 500).json({
+      success: false,
+      message: error.status ? error.message : 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  getOverdueActions,
+  getOverdueCounts,
+  getActionLogs,
+  migrateActionLogs,
+  startActionGraph,
+  getSchedulerStatus,
+  backfillSchedule
+};
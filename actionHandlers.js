@@ -0,0 +1,55 @@
+// src/services/actionHandlers.js - Registry of executors for scheduled actions
+// A handler is `async (action, context) => result`, where context has
+// `progress(percent)` and `log(level, message, details)`. The returned value
+// is stored as action.result; throwing fails the run (and may be retried).
+const Action = require('../models/Action');
+const { WORKER_TYPES, runsInWorker, runInWorker } = require('./actionPool');
+const { abandonRuns } = require('./payrollEngine');
+
+const handlers = new Map();
+
+// Register the executor for an action type (replaces any earlier one)
+const registerHandler = (type, handler) => {
+  if (typeof handler !== 'function') {
+    throw new Error(`Handler for ${type} must be a function`);
+  }
+  handlers.set(type, handler);
+};
+
+// Get the executor for an action type, or undefined
+const getHandler = (type) => handlers.get(type);
+
+// Message-only actions: nothing to compute, the run itself is the delivery
+const deliver = async (action, { log }) => {
+  await log('info', `${action.type}: ${action.target}`, { description: action.description });
+  return { success: true, message: `${action.type} sent` };
+};
+
+registerHandler('Send Notification', deliver);
+registerHandler('Send Reminder', deliver);
+
+// CPU-heavy types run on worker threads, off the API event loop
+Object.keys(WORKER_TYPES).filter(runsInWorker).forEach(type => registerHandler(type, runInWorker));
+
+// A payroll worker killed by the pool can't clean up after itself; its run
+// is failed and its partial payslips removed from here
+registerHandler('Process Payroll', async (action, context) => {
+  try {
+    return await runInWorker(action, context);
+  } catch (error) {
+    await abandonRuns(action._id, error.message).catch(cleanupError => {
+      console.error('Payroll run cleanup error:', cleanupError);
+    });
+    throw error;
+  }
+});
+
+// Action.SCHEDULED_TYPES is what gets a dueAt; each of them needs a handler here
+Action.SCHEDULED_TYPES.filter(type => !handlers.has(type)).forEach(type => {
+  console.error(`Action type ${type} is scheduled but has no handler`);
+});
+
+module.exports = {
+  registerHandler,
+  getHandler
+};
@@ -0,0 +1,90 @@
+// src/services/actionLogger.js - Batching writer for action execution logs
+const mongoose = require('mongoose');
+
+// Entries are buffered and written with one insertMany per interval, or
+// early once the buffer fills. A crash loses at most one interval of logs.
+const FLUSH_INTERVAL_MS = parseInt(process.env.ACTION_LOG_FLUSH_MS) || 1000;
+const MAX_PENDING_ENTRIES = 500;
+
+// Past this (e.g. while the database is unreachable) the oldest entries are dropped
+const MAX_BUFFERED_ENTRIES = 20000;
+
+let pending = [];
+let timer = null;
+let flushing = null;
+let dropped = 0;
+
+// Record one log entry for an action
+const log = (actionId, level, message, details = null) => {
+  pending.push({
+    _id: new mongoose.Types.ObjectId(),
+    action: actionId,
+    timestamp: new Date(),
+    level,
+    message,
+    details
+  });
+  start();
+
+  if (pending.length > MAX_BUFFERED_ENTRIES) {
+    dropped += pending.length - MAX_BUFFERED_ENTRIES;
+    pending = pending.slice(-MAX_BUFFERED_ENTRIES);
+  }
+  if (pending.length >= MAX_PENDING_ENTRIES) {
+    flush().catch(() => {});
+  }
+};
+
+// Write everything pending as plain inserts. Entries carry their own _id,
+// so a batch retried after a partial failure doesn't write duplicates.
+const flush = async () => {
+  if (flushing) return flushing;
+  if (!pending.length) return null;
+
+  const batch = pending;
+  pending = [];
+
+  if (dropped) {
+    console.error(`Action log buffer full, dropped ${dropped} entr${dropped === 1 ? 'y' : 'ies'}`);
+    dropped = 0;
+  }
+
+  flushing = mongoose.model('ActionLog')
+    .insertMany(batch, { ordered: false, lean: true })
+    .catch(error => {
+      const errors = error.writeErrors || [];
+      if (error.code === 11000 || (errors.length && errors.every(err => err.code === 11000))) return;
+      console.error('Action log flush error:', error.message);
+      pending = batch.concat(pending);
+    })
+    .finally(() => {
+      flushing = null;
+    });
+
+  return flushing;
+};
+
+// Start the periodic flush (on first use); the timer doesn't keep the process alive
+function start() {
+  if (timer) return;
+  timer = setInterval(() => {
+    flush().catch(() => {});
+  }, FLUSH_INTERVAL_MS);
+  timer.unref();
+}
+
+// Stop the periodic flush and write whatever is still pending
+const stop = async () => {
+  clearInterval(timer);
+  timer = null;
+  if (flushing) await flushing;
+  await flush();
+};
+
+module.exports = {
+  FLUSH_INTERVAL_MS,
+  log,
+  flush,
+  start,
+  stop
+};
@@ -0,0 +1,99 @@
+// src/services/actionPool.js - Runs CPU-heavy action types on worker threads
+// Each type gets its own pool, created on first use and closed when idle,
+// so a payroll run can't starve report generation (or the API) of CPU.
+const path = require('path');
+const { WorkerPool } = require('../utils/workerPool');
+const { hasTask } = require('./actionTasks');
+
+const WORKER_FILE = path.join(__dirname, '../jobs/actionWorker.js');
+const IDLE_CLOSE_MS = 5 * 60 * 1000;
+const MINUTE_MS = 60 * 1000;
+
+// Per type: concurrent runs (pool size), run timeout and worker heap limit
+const WORKER_TYPES = {
+  'Generate Report': { concurrency: 2, timeoutMs: 15 * MINUTE_MS, memoryMb: 512 },
+  'Process Payroll': { concurrency: 1, timeoutMs: 30 * MINUTE_MS, memoryMb: 1024 },
+  'Backup Data': { concurrency: 1, timeoutMs: 60 * MINUTE_MS, memoryMb: 256 },
+  'Lock Salary': { concurrency: 1, timeoutMs: 15 * MINUTE_MS, memoryMb: 256 }
+};
+
+// Errors a retry won't fix
+const PERMANENT_CODES = ['ERR_WORKER_OUT_OF_MEMORY'];
+
+// type -> { pool, idleTimer }
+const pools = new Map();
+
+// Whether an action type is executed on a worker thread
+const runsInWorker = (type) => Boolean(WORKER_TYPES[type]) && hasTask(type);
+
+// Helper to get (or create) a type's pool and keep it from closing
+const acquire = (type) => {
+  let entry = pools.get(type);
+  if (!entry) {
+    const limits = WORKER_TYPES[type];
+    entry = {
+      pool: new WorkerPool(WORKER_FILE, {
+        size: limits.concurrency,
+        resourceLimits: { maxOldGenerationSizeMb: limits.memoryMb }
+      }),
+      idleTimer: null
+    };
+    pools.set(type, entry);
+  }
+  clearTimeout(entry.idleTimer);
+  return entry;
+};
+
+// Helper to close a type's pool once nothing has used it for a while
+const release = (type, entry) => {
+  if (entry.pool.pending) return;
+  entry.idleTimer = setTimeout(() => {
+    if (entry.pool.pending || pools.get(type) !== entry) return;
+    pools.delete(type);
+    entry.pool.close().catch(() => {});
+  }, IDLE_CLOSE_MS);
+  entry.idleTimer.unref();
+};
+
+// Action handler: run the action's task on its type's pool, passing
+// progress reports through to the scheduler
+const runInWorker = async (action, { progress }) => {
+  const limits = WORKER_TYPES[action.type];
+  const entry = acquire(action.type);
+
+  try {
+    return await entry.pool.run(
+      { type: action.type, action: JSON.parse(JSON.stringify(action)) },
+      { timeout: limits.timeoutMs, onProgress: progress }
+    );
+  } catch (error) {
+    if (PERMANENT_CODES.includes(error.code)) error.permanent = true;
+    throw error;
+  } finally {
+    release(action.type, entry);
+  }
+};
+
+// Pool state per type
+const status = () => Object.fromEntries(Object.entries(WORKER_TYPES).map(([type, limits]) => [type, {
+  ...limits,
+  enabled: runsInWorker(type),
+  active: pools.has(type),
+  pending: pools.has(type) ? pools.get(type).pool.pending : 0
+}]));
+
+// Close every pool (running tasks are failed)
+const stop = async () => {
+  const entries = [...pools.values()];
+  pools.clear();
+  entries.forEach(entry => clearTimeout(entry.idleTimer));
+  await Promise.all(entries.map(entry => entry.pool.close()));
+};
+
+module.exports = {
+  WORKER_TYPES,
+  runsInWorker,
+  runInWorker,
+  status,
+  stop
+};
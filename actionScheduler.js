@@ -0,0 +1,354 @@
+// src/jobs/actionScheduler.js - Lease-based scheduler for due actions
+// Each node keeps the actions due soon in a min-heap ordered by dueAt and
+// arms a single timer for the earliest one. Running an action first takes a
+// lease on it with a guarded findOneAndUpdate, so however many nodes hold the
+// same entry, only one executes each occurrence. The heap is refilled from
+// the dueAt index (never a collection scan), which also catches up on
+// everything that fell due while no node was running. Dependent actions
+// become due the moment their prerequisites settle (see
+// Action.settleDependents), so a linked pipeline runs in critical-path time.
+const os = require('os');
+const Action = require('../models/Action');
+const { MinHeap } = require('../utils/minHeap');
+const { getHandler } = require('../services/actionHandlers');
+const actionLogger = require('../services/actionLogger');
+
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+
+// A run holds its lease this long, renewed by a heartbeat while it runs
+const LEASE_MS = 5 * 60 * 1000;
+const HEARTBEAT_MS = LEASE_MS / 3;
+
+// Heap holds actions due within the lookahead, refilled on an interval
+const LOOKAHEAD_MS = 5 * 60 * 1000;
+const REFILL_INTERVAL_MS = 60 * 1000;
+const REFILL_LIMIT = 1000;
+
+const CONCURRENCY = parseInt(process.env.ACTION_SCHEDULER_CONCURRENCY) || 4;
+
+// Per-category caps, e.g. "payroll=1,reports=2"; other categories share CONCURRENCY
+const parseLimits = (value = '') => new Map(value.split(',')
+  .map(pair => pair.split('=').map(part => part.trim()))
+  .filter(([category, limit]) => category && parseInt(limit) > 0)
+  .map(([category, limit]) => [category, parseInt(limit)]));
+const CATEGORY_LIMITS = parseLimits(process.env.ACTION_CATEGORY_CONCURRENCY);
+
+const MAX_ATTEMPTS = 3;
+const RETRY_BASE_MS = 60 * 1000;
+
+// Progress is written at most this often per run
+const PROGRESS_INTERVAL_MS = 1000;
+
+// setTimeout can't wait longer than this
+const MAX_TIMER_MS = 2 ** 31 - 1;
+
+const heap = new MinHeap();
+// id -> category of runs in progress
+const running = new Map();
+const runs = new Set();
+// Due entries held back while their category is at its cap
+const parked = new Map();
+let timer = null;
+let refillTimer = null;
+let started = false;
+
+// Query for actions whose lease is free
+const leaseFree = (now) => ({ $or: [{ lockedUntil: null }, { lockedUntil: { $lt: now } }] });
+
+// Put an action in (or take it out of) the local heap
+const track = (id, dueAt, category) => {
+  const key = String(id);
+  parked.delete(key);
+  if (!dueAt || dueAt.getTime() > Date.now() + LOOKAHEAD_MS) {
+    heap.remove(key);
+  } else {
+    heap.push({ key, priority: dueAt.getTime(), category });
+  }
+  arm();
+};
+
+const runningIn = (category) => {
+  let count = 0;
+  running.forEach(value => {
+    if (value === category) count += 1;
+  });
+  return count;
+};
+
+const categoryFull = (category) => CATEGORY_LIMITS.has(category) &&
+  runningIn(category) >= CATEGORY_LIMITS.get(category);
+
+// Return parked entries of a category to the heap once it has room
+const unpark = (category) => {
+  parked.forEach((entry, key) => {
+    if (entry.category !== category) return;
+    parked.delete(key);
+    heap.push(entry);
+  });
+};
+
+// Arm the timer for the earliest entry; when at capacity the next finishing
+// run dispatches instead
+const arm = () => {
+  clearTimeout(timer);
+  timer = null;
+  if (!started || running.size >= CONCURRENCY) return;
+
+  const top = heap.peek();
+  if (!top) return;
+
+  const delay = Math.min(Math.max(top.priority - Date.now(), 0), MAX_TIMER_MS);
+  timer = setTimeout(dispatch, delay);
+  timer.unref();
+};
+
+// Load actions due within the lookahead from the dueAt index. Overdue
+// actions come first; when a whole batch is overdue another refill follows
+// as soon as the heap drains.
+let refilling = null;
+let backlog = false;
+const refill = () => {
+  if (refilling) return refilling;
+
+  refilling = (async () => {
+    const now = new Date();
+    const due = await Action.find({
+      dueAt: { $lte: new Date(now.getTime() + LOOKAHEAD_MS) },
+      type: { $in: Action.SCHEDULED_TYPES },
+      ...leaseFree(now)
+    })
+      .select('dueAt category')
+      .sort({ dueAt: 1 })
+      .limit(REFILL_LIMIT)
+      .lean();
+
+    due.forEach(action => {
+      const key = String(action._id);
+      if (!running.has(key) && !parked.has(key)) {
+        heap.push({ key, priority: action.dueAt.getTime(), category: action.category });
+      }
+    });
+    backlog = due.length === REFILL_LIMIT;
+    arm();
+    return due.length;
+  })().finally(() => {
+    refilling = null;
+  });
+
+  return refilling;
+};
+
+const refillSafely = () => refill().catch(error => {
+  console.error('Action scheduler refill error:', error);
+});
+
+// Start every due entry the concurrency limit allows
+const dispatch = () => {
+  timer = null;
+  const now = Date.now();
+
+  while (started && running.size < CONCURRENCY) {
+    const top = heap.peek();
+    if (!top || top.priority > now) break;
+    heap.pop();
+    if (running.has(top.key)) continue;
+    if (categoryFull(top.category)) {
+      parked.set(top.key, top);
+      continue;
+    }
+
+    const run = execute(top.key)
+      .catch(error => {
+        console.error('Action scheduler run error:', error);
+      })
+      .finally(() => {
+        running.delete(top.key);
+        runs.delete(run);
+        unpark(top.category);
+        if (started) dispatch();
+      });
+    running.set(top.key, top.category);
+    runs.add(run);
+  }
+
+  if (started && backlog && !heap.size) refillSafely();
+  arm();
+};
+
+// Claim one occurrence; null when it isn't due, changed, or another node has it
+const claim = (id) => {
+  const now = new Date();
+  return Action.findOneAndUpdate(
+    { _id: id, dueAt: { $lte: now }, type: { $in: Action.SCHEDULED_TYPES }, ...leaseFree(now) },
+    {
+      $set: {
+        lockedBy: WORKER_ID,
+        lockedUntil: new Date(now.getTime() + LEASE_MS),
+        status: 'In Progress',
+        startedAt: now,
+        lastRunAt: now,
+        progress: 10,
+        triggeredAt: null
+      },
+      $inc: { attempts: 1 }
+    },
+    { new: true }
+  );
+};
+
+// Write the outcome and the next due time, only while still holding the
+// lease, then move the dependency graph on
+const finish = async (action, fields, nextDueAt) => {
+  const result = await Action.updateOne(
+    { _id: action._id, lockedBy: WORKER_ID },
+    { $set: { ...fields, dueAt: nextDueAt, lockedBy: null, lockedUntil: null } }
+  );
+  if (!result.modifiedCount) return;
+
+  track(action._id, nextDueAt, action.category);
+  if (fields.status === 'Completed') {
+    Action.announceDeadlines([{ _id: action._id, deadlineAt: null }]);
+  }
+  if (fields.status !== 'Pending') {
+    await Action.settleDependents(action._id, fields.status);
+  }
+};
+
+// Run a claimed action through its handler
+const execute = async (id) => {
+  const action = await claim(id);
+  if (!action) return;
+  actionLogger.log(action._id, 'info', 'Action started', { worker: WORKER_ID, attempt: action.attempts });
+
+  const heartbeat = setInterval(() => {
+    Action.updateOne(
+      { _id: action._id, lockedBy: WORKER_ID },
+      { $set: { lockedUntil: new Date(Date.now() + LEASE_MS) } }
+    ).catch(error => {
+      console.error('Action lease renewal error:', error);
+    });
+  }, HEARTBEAT_MS);
+  heartbeat.unref();
+
+  let progressAt = 0;
+  const context = {
+    progress: (percent) => {
+      const now = Date.now();
+      if (now - progressAt < PROGRESS_INTERVAL_MS) return Promise.resolve();
+      progressAt = now;
+      return Action.updateOne(
+        { _id: action._id, lockedBy: WORKER_ID },
+        { $set: { progress: Math.min(Math.max(Math.round(percent), 0), 99) } }
+      ).catch(error => {
+        console.error('Action progress error:', error.message);
+      });
+    },
+    log: (level, message, details = null) => actionLogger.log(action._id, level, message, details)
+  };
+
+  // Recurring actions move to the first occurrence after now, stepping from
+  // the one just run so missed occurrences aren't replayed one by one
+  const recurring = action.isRecurring && action.recurringPattern;
+  const nextRun = recurring ? Action.nextOccurrence(action.recurringPattern, action.dueAt) : null;
+
+  try {
+    const handler = getHandler(action.type);
+    if (!handler) {
+      throw Object.assign(new Error(`No handler registered for ${action.type}`), { permanent: true });
+    }
+
+    const value = await handler(action, context);
+    const completedAt = new Date();
+    const result = value && typeof value === 'object' && 'success' in value
+      ? value
+      : { success: true, message: 'Action completed', data: value };
+
+    actionLogger.log(action._id, 'info', 'Action completed', { completedAt });
+    await finish(action, {
+      status: 'Completed',
+      completedAt,
+      deadlineAt: null,
+      progress: 100,
+      result,
+      attempts: 0,
+      ...(recurring && { nextRunAt: nextRun })
+    }, nextRun);
+
+  } catch (error) {
+    const retry = !error.permanent && action.attempts < MAX_ATTEMPTS;
+    const failure = {
+      result: { success: false, message: error.message || 'Action failed' }
+    };
+    actionLogger.log(
+      action._id,
+      'error',
+      retry ? `Attempt ${action.attempts} failed, retrying` : 'Action failed',
+      { error: error.message || String(error) }
+    );
+
+    if (retry) {
+      const retryAt = new Date(Date.now() + RETRY_BASE_MS * 2 ** (action.attempts - 1));
+      failure.status = 'Pending';
+      await finish(action, failure, retryAt);
+    } else {
+      failure.status = 'Failed';
+      failure.attempts = 0;
+      if (recurring) failure.nextRunAt = nextRun;
+      await finish(action, failure, nextRun);
+    }
+
+  } finally {
+    clearInterval(heartbeat);
+  }
+};
+
+// Follow schedule changes saved on this node
+const onScheduled = ({ id, dueAt, category }) => {
+  if (!running.has(id)) track(id, dueAt, category);
+};
+
+// Start scheduling on this node: catch up on anything overdue, then keep
+// the heap topped up
+const start = () => {
+  if (started) return;
+  started = true;
+
+  Action.scheduleEvents.on('scheduled', onScheduled);
+  refillSafely();
+  refillTimer = setInterval(refillSafely, REFILL_INTERVAL_MS);
+  refillTimer.unref();
+};
+
+// Stop taking new work and wait for running actions to finish
+const stop = async () => {
+  started = false;
+  Action.scheduleEvents.off('scheduled', onScheduled);
+  clearInterval(refillTimer);
+  clearTimeout(timer);
+  refillTimer = null;
+  timer = null;
+  await Promise.allSettled([...runs]);
+};
+
+// Scheduler state on this node
+const status = () => {
+  const next = heap.peek();
+  return {
+    workerId: WORKER_ID,
+    started,
+    concurrency: CONCURRENCY,
+    categoryLimits: Object.fromEntries(CATEGORY_LIMITS),
+    queued: heap.size,
+    parked: parked.size,
+    running: [...running.keys()],
+    nextDueAt: next ? new Date(next.priority) : null
+  };
+};
+
+module.exports = {
+  WORKER_ID,
+  refill,
+  start,
+  stop,
+  status
+};
@@ -0,0 +1,136 @@
+// src/services/actionTasks.js - CPU-heavy action tasks, run on worker threads
+// A task is `async (action, { progress }) => result`. It runs inside
+// src/jobs/actionWorker.js with the worker's own database connection;
+// `action` is a plain JSON copy of the Action document.
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const { Readable } = require('stream');
+const { pipeline } = require('stream/promises');
+const mongoose = require('mongoose');
+const { runPayroll } = require('./payrollEngine');
+const { lockSalaries } = require('./salaryLock');
+const { generateReport } = require('./reportEngine');
+
+const { EJSON } = mongoose.mongo.BSON;
+const BACKUP_DIR = process.env.BACKUP_DIR || path.join(__dirname, '../../backups');
+
+const tasks = new Map();
+
+// Register the worker-side task for an action type
+const registerTask = (type, task) => {
+  tasks.set(type, task);
+};
+
+const getTask = (type) => tasks.get(type);
+const hasTask = (type) => tasks.has(type);
+
+// Back up collections as gzipped extended-JSON lines, one file per collection.
+// The action target is a comma-separated list of collections, or "all".
+const backupData = async (action, { progress }) => {
+  const db = mongoose.connection.db;
+  const requested = String(action.target || '').split(',').map(name => name.trim()).filter(Boolean);
+  const everything = !requested.length || requested.some(name => ['all', '*'].includes(name.toLowerCase()));
+
+  const existing = (await db.listCollections({}, { nameOnly: true }).toArray())
+    .map(collection => collection.name)
+    .filter(name => !name.startsWith('system.'));
+  const names = (everything ? existing : requested).sort();
+
+  const unknown = names.filter(name => !existing.includes(name));
+  if (unknown.length) {
+    throw Object.assign(new Error(`Unknown collection(s): ${unknown.join(', ')}`), { permanent: true });
+  }
+
+  const directory = path.join(BACKUP_DIR, `${new Date().toISOString().replace(/[:.]/g, '-')}-${action._id}`);
+  await fs.promises.mkdir(directory, { recursive: true });
+
+  const counts = await Promise.all(names.map(name => db.collection(name).estimatedDocumentCount()));
+  const total = Math.max(counts.reduce((sum, count) => sum + count, 0), 1);
+  let written = 0;
+  let reported = 0;
+
+  const collections = [];
+  for (const name of names) {
+    const file = path.join(directory, `${name}.ndjson.gz`);
+    let documents = 0;
+
+    const lines = async function* () {
+      for await (const doc of db.collection(name).find({}, { batchSize: 1000 })) {
+        documents += 1;
+        written += 1;
+        const percent = Math.floor((written / total) * 100);
+        if (percent > reported) {
+          reported = percent;
+          progress(percent);
+        }
+        yield `${EJSON.stringify(doc, { relaxed: false })}\n`;
+      }
+    };
+
+    await pipeline(Readable.from(lines()), zlib.createGzip(), fs.createWriteStream(file));
+    const { size } = await fs.promises.stat(file);
+    collections.push({ collection: name, documents, bytes: size });
+  }
+
+  return {
+    success: true,
+    message: `Backed up ${collections.length} collection(s)`,
+    data: { directory, collections }
+  };
+};
+
+// Compute payroll for the period named by the action target
+const processPayroll = async (action, { progress }) => {
+  const run = await runPayroll({
+    period: action.target,
+    userId: action.createdBy,
+    actionId: action._id,
+    progress
+  });
+
+  return {
+    success: true,
+    message: `Payroll for ${run.period} computed for ${run.employeeCount} employee(s)`,
+    data: { run: String(run._id), period: run.period, totals: run.totals, inputChecksum: run.inputChecksum }
+  };
+};
+
+// Lock compensation for the period named by the action target
+const lockSalary = async (action, { progress }) => {
+  const lock = await lockSalaries({
+    period: action.target,
+    userId: action.createdBy,
+    actionId: action._id,
+    progress
+  });
+
+  return {
+    success: true,
+    message: `Salaries for ${lock.period} locked for ${lock.employeeCount} employee(s)`,
+    data: { lock: String(lock._id), period: lock.period, checksum: lock.checksum, totals: lock.totals }
+  };
+};
+
+// Generate the report whose id is the action target
+const generateReportFile = async (action, { progress }) => {
+  const report = await generateReport({ reportId: action.target, actionId: action._id, progress });
+
+  return {
+    success: true,
+    message: `${report.definition} report ready with ${report.rowCount} row(s)`,
+    data: { report: String(report._id), document: report.document && String(report.document) }
+  };
+};
+
+registerTask('Backup Data', backupData);
+registerTask('Generate Report', generateReportFile);
+registerTask('Lock Salary', lockSalary);
+registerTask('Process Payroll', processPayroll);
+
+module.exports = {
+  BACKUP_DIR,
+  registerTask,
+  getTask,
+  hasTask
+};
@@ -0,0 +1,26 @@
+// src/jobs/actionWorker.js - Worker thread that runs CPU-heavy action tasks
+const mongoose = require('mongoose');
+const { serveTasks } = require('../utils/workerPool');
+const { getTask } = require('../services/actionTasks');
+
+// Each worker thread has its own module registry and needs its own connection
+let connection = null;
+const connect = () => {
+  if (!connection) {
+    connection = mongoose.connect(process.env.MONGODB_URI || 'mongodb://127.0.0.1:27017/leancircle-hr', {
+      maxPoolSize: 2,
+      serverSelectionTimeoutMS: 5000
+    });
+  }
+  return connection;
+};
+
+serveTasks(async ({ type, action }, { progress }) => {
+  const task = getTask(type);
+  if (!task) {
+    throw Object.assign(new Error(`No worker task for ${type}`), { permanent: true });
+  }
+
+  await connect();
+  return task(action, { progress });
+});
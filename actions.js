@@ -1,5 +1,14 @@
 // src/routes/actions.js - Action management routes
 const express = require('express');
+const {
+  getOverdueActions,
+  getOverdueCounts,
+  getActionLogs,
+  migrateActionLogs,
+  startActionGraph,
+  getSchedulerStatus,
+  backfillSchedule
+} = require('../controllers/actionController');
 const { authenticate, authorize } = require('../middleware/auth');
 
 const router = express.Router();
@@ -23,4 +32,15 @@ router.post('/', (req, res) => {
   });
 });
 
+router.get('/overdue', getOverdueActions);
+router.get('/overdue/counts', getOverdueCounts);
+router.post('/graph/start', authorize('Administrator', 'HR Manager'), startActionGraph);
+
+// Admin only routes
+router.get('/scheduler', authorize('Administrator'), getSchedulerStatus);
+router.post('/scheduler/backfill', authorize('Administrator'), backfillSchedule);
+router.post('/logs/migrate', authorize('Administrator'), migrateActionLogs);
+
+router.get('/:id/logs', getActionLogs);
+
 module.exports = router;
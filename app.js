@@ -14,6 +14,9 @@ const reimbursementRoutes = require('./routes/reimbursements');
 const declarationRoutes = require('./routes/declarations');
 const documentRoutes = require('./routes/documents');
 const actionRoutes = require('./routes/actions');
+const approvalRoutes = require('./routes/approvals');
+const payrollRoutes = require('./routes/payroll');
+const reportRoutes = require('./routes/reports');
 
 // Initialize Express app
 const app = express();
@@ -51,7 +54,17 @@ const corsOptions = {
   },
   credentials: true,
   methods: ['GET', 'POST', 'PUT', 'DELETE', 'PATCH'],
-  allowedHeaders: ['Content-Type', 'Authorization']
+  allowedHeaders: [
+    'Content-Type',
+    'Authorization',
+    'Range',
+    'If-Range',
+    'If-None-Match',
+    'Content-Range',
+    'Upload-Offset',
+    'Upload-Checksum'
+  ],
+  exposedHeaders: ['Content-Disposition', 'Content-Range', 'ETag', 'Upload-Offset', 'Upload-Length']
 };
 
 app.use(cors(corsOptions));
@@ -63,6 +76,8 @@ const limiter = rateLimit({
   message: {
     error: 'Too many requests from this IP, please try again later.',
   },
+  // Chunks of one resumable upload shouldn't use up the request budget
+  skip: (req) => req.method === 'PUT' && req.path.startsWith('/documents/uploads/'),
 });
 
 // Apply rate limiting to API routes only
@@ -110,6 +125,9 @@ app.use('/api/reimbursements', reimbursementRoutes);
 app.use('/api/declarations', declarationRoutes);
 app.use('/api/documents', documentRoutes);
 app.use('/api/actions', actionRoutes);
+app.use('/api/approvals', approvalRoutes);
+app.use('/api/payroll', payrollRoutes);
+app.use('/api/reports', reportRoutes);
 
 // Serve frontend for all non-API routes
 app.get('*', (req, res) => {
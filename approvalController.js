@@ -0,0 +1,108 @@
+// src/controllers/approvalController.js - Approver inbox controller
+const mongoose = require('mongoose');
+const ApprovalQueueItem = require('../models/ApprovalQueueItem');
+
+// Helper to encode/decode the inbox paging cursor (submittedAt|id)
+const encodeCursor = (item) => `${item.submittedAt.toISOString()}|${item._id}`;
+const decodeCursor = (cursor) => {
+  const [submittedAt, id] = String(cursor).split('|');
+  const date = new Date(submittedAt);
+  if (isNaN(date) || !mongoose.isValidObjectId(id)) return null;
+  return { submittedAt: date, id: new mongoose.Types.ObjectId(id) };
+};
+
+// @desc    Get everything pending that the user can act on, oldest first
+// @route   GET /api/approvals
+// @access  Private (Admin/HR/Manager)
+const getInbox = async (req, res) => {
+  try {
+    const { type, limit = 20, cursor } = req.query;
+
+    if (type && !ApprovalQueueItem.APPROVER_SCOPES[type]) {
+      return res.status(400).json({
+        success: false,
+        message: `Type must be one of: ${Object.keys(ApprovalQueueItem.APPROVER_SCOPES).join(', ')}`
+      });
+    }
+
+    const after = cursor ? decodeCursor(cursor) : null;
+    if (cursor && !after) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid cursor'
+      });
+    }
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const items = await ApprovalQueueItem.getInbox(req.user, {
+      itemType: type,
+      limit: pageSize,
+      after
+    });
+
+    res.status(200).json({
+      success: true,
+      data: items,
+      count: items.length,
+      nextCursor: items.length === pageSize ? encodeCursor(items[items.length - 1]) : null
+    });
+
+  } catch (error) {
+    console.error('Get approval inbox error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get pending approval badge counts
+// @route   GET /api/approvals/counts
+// @access  Private (Admin/HR/Manager)
+const getPendingCounts = async (req, res) => {
+  try {
+    const counts = await ApprovalQueueItem.getPendingCounts(req.user);
+
+    res.status(200).json({
+      success: true,
+      data: counts
+    });
+
+  } catch (error) {
+    console.error('Get approval counts error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Rebuild the approval queue from claims, declarations and actions
+// @route   POST /api/approvals/rebuild
+// @access  Private (Admin only)
+const rebuildQueue = async (req, res) => {
+  try {
+    const total = await ApprovalQueueItem.rebuild();
+
+    console.log(`Approval queue rebuilt by ${req.user.name}: ${total} items`);
+
+    res.status(200).json({
+      success: true,
+      message: 'Approval queue rebuilt successfully',
+      data: { total }
+    });
+
+  } catch (error) {
+    console.error('Rebuild approval queue error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  getInbox,
+  getPendingCounts,
+  rebuildQueue
+};
@@ -0,0 +1,22 @@
+// src/routes/approvals.js - Approver inbox routes
+const express = require('express');
+const {
+  getInbox,
+  getPendingCounts,
+  rebuildQueue
+} = require('../controllers/approvalController');
+const { authenticate, authorize } = require('../middleware/auth');
+
+const router = express.Router();
+
+// All routes require an approver
+router.use(authenticate);
+router.use(authorize('Administrator', 'HR Manager', 'Manager'));
+
+router.get('/', getInbox);
+router.get('/counts', getPendingCounts);
+
+// Admin only routes
+router.post('/rebuild', authorize('Administrator'), rebuildQueue);
+
+module.exports = router;
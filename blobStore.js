@@ -0,0 +1,151 @@
+// src/services/blobStore.js - Local content-addressed blob storage
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { Transform } = require('stream');
+const { pipeline } = require('stream/promises');
+const FileBlob = require('../models/FileBlob');
+
+const UPLOAD_DIR = process.env.UPLOAD_DIR || path.join(__dirname, '../../uploads');
+const BLOB_DIR = path.join(UPLOAD_DIR, 'blobs');
+const TMP_DIR = path.join(UPLOAD_DIR, 'tmp');
+
+const MAX_FILE_SIZE = parseInt(process.env.MAX_FILE_SIZE) || 10 * 1024 * 1024;
+const ALLOWED_FILE_TYPES = (process.env.ALLOWED_FILE_TYPES || 'pdf,doc,docx,jpg,jpeg,png')
+  .split(',')
+  .map(type => type.trim().toLowerCase())
+  .filter(Boolean);
+
+// Leading bytes expected for the formats we can recognise cheaply
+const FILE_SIGNATURES = {
+  pdf: [Buffer.from('%PDF')],
+  png: [Buffer.from([0x89, 0x50, 0x4e, 0x47])],
+  jpg: [Buffer.from([0xff, 0xd8, 0xff])],
+  jpeg: [Buffer.from([0xff, 0xd8, 0xff])],
+  docx: [Buffer.from([0x50, 0x4b, 0x03, 0x04])],
+  xlsx: [Buffer.from([0x50, 0x4b, 0x03, 0x04])],
+  doc: [Buffer.from([0xd0, 0xcf, 0x11, 0xe0])],
+  xls: [Buffer.from([0xd0, 0xcf, 0x11, 0xe0])]
+};
+
+// Helper to build an HTTP-aware error
+const uploadError = (message, status) => Object.assign(new Error(message), { status });
+
+// Helper to get the lowercase extension of a file name
+const getExtension = (filename = '') => path.extname(filename).slice(1).toLowerCase();
+
+// Check the declared file name against ALLOWED_FILE_TYPES
+const isAllowedType = (filename) => ALLOWED_FILE_TYPES.includes(getExtension(filename));
+
+// Sharded on-disk location of a blob: blobs/ab/cd/abcd...
+const blobPath = (digest) => path.join(BLOB_DIR, digest.slice(0, 2), digest.slice(2, 4), digest);
+
+// Transform that hashes, counts and sniffs bytes as they pass through,
+// failing as soon as the size limit is crossed or the content does not
+// match the declared extension
+class HashingMeter extends Transform {
+  constructor({ maxSize, extension }) {
+    super();
+    this.hash = crypto.createHash('sha256');
+    this.size = 0;
+    this.maxSize = maxSize;
+    this.signatures = FILE_SIGNATURES[extension];
+    this.head = Buffer.alloc(0);
+  }
+
+  _transform(chunk, encoding, callback) {
+    this.size += chunk.length;
+    if (this.size > this.maxSize) {
+      return callback(uploadError(`File exceeds the maximum size of ${this.maxSize} bytes`, 413));
+    }
+
+    if (this.signatures && this.head.length < 8) {
+      this.head = Buffer.concat([this.head, chunk]).subarray(0, 8);
+      const longest = Math.max(...this.signatures.map(sig => sig.length));
+      if (this.head.length >= longest &&
+          !this.signatures.some(sig => this.head.subarray(0, sig.length).equals(sig))) {
+        return callback(uploadError('File content does not match its type', 415));
+      }
+    }
+
+    this.hash.update(chunk);
+    callback(null, chunk);
+  }
+
+  digest() {
+    return this.hash.digest('hex');
+  }
+}
+
+// Stream a file into the store. Bytes are hashed while being written to a
+// temp file; the temp file is then renamed to its digest path, or dropped
+// when identical content is already stored. Every stored blob gets a
+// FileBlob row, so one the caller never references is still purged.
+const ingest = async (stream, { filename, mimetype, maxSize = MAX_FILE_SIZE } = {}) => {
+  await fs.promises.mkdir(TMP_DIR, { recursive: true });
+
+  const tmpPath = path.join(TMP_DIR, `${Date.now()}-${crypto.randomBytes(8).toString('hex')}`);
+  const meter = new HashingMeter({ maxSize, extension: getExtension(filename) });
+
+  try {
+    await pipeline(stream, meter, fs.createWriteStream(tmpPath, { flags: 'wx' }));
+  } catch (error) {
+    await fs.promises.rm(tmpPath, { force: true });
+    throw error;
+  }
+
+  const digest = meter.digest();
+  const target = blobPath(digest);
+
+  let deduplicated = false;
+  try {
+    await fs.promises.access(target);
+    deduplicated = true;
+    await fs.promises.rm(tmpPath, { force: true });
+  } catch (error) {
+    await fs.promises.mkdir(path.dirname(target), { recursive: true });
+    // Identical concurrent uploads rename the same bytes, so last one wins safely
+    await fs.promises.rename(tmpPath, target);
+  }
+
+  await FileBlob.recordStored({ digest, size: meter.size, mimetype });
+
+  return { digest, size: meter.size, deduplicated };
+};
+
+// Open a stored blob for reading
+const openBlob = (digest, options) => fs.createReadStream(blobPath(digest), options);
+
+// Build the attachment subdocument that references an uploaded blob
+const toAttachment = (file) => ({
+  filename: file.digest,
+  originalName: file.originalName,
+  size: file.size,
+  mimetype: file.mimetype,
+  digest: file.digest,
+  uploadedAt: new Date()
+});
+
+// Hash a file already on disk without reading it into memory
+const hashFile = async (filePath) => {
+  const hash = crypto.createHash('sha256');
+  await pipeline(fs.createReadStream(filePath), hash);
+  return hash.digest('hex');
+};
+
+// Remove a stored blob from disk
+const removeBlob = (digest) => fs.promises.rm(blobPath(digest), { force: true });
+
+module.exports = {
+  UPLOAD_DIR,
+  MAX_FILE_SIZE,
+  ALLOWED_FILE_TYPES,
+  getExtension,
+  isAllowedType,
+  blobPath,
+  ingest,
+  openBlob,
+  toAttachment,
+  hashFile,
+  removeBlob
+};
@@ -0,0 +1,68 @@
+// src/utils/currency.js - Base-currency normalization from the versioned FX table
+const fs = require('fs');
+const path = require('path');
+
+const FX_RATES_FILE = process.env.FX_RATES_FILE || path.join(__dirname, '../config/fxRates.json');
+
+// Cached FX table, loaded on first use
+let fxTable = null;
+
+// Load (or reload) the FX table from disk
+const loadFxTable = () => {
+  const raw = JSON.parse(fs.readFileSync(FX_RATES_FILE, 'utf8'));
+
+  if (!raw.baseCurrency || !Array.isArray(raw.versions) || !raw.versions.length) {
+    throw new Error(`Invalid FX rates file: ${FX_RATES_FILE}`);
+  }
+
+  const versions = raw.versions
+    .map(v => ({
+      version: v.version,
+      effectiveFrom: new Date(v.effectiveFrom),
+      rates: v.rates
+    }))
+    .sort((a, b) => a.effectiveFrom - b.effectiveFrom);
+
+  fxTable = { baseCurrency: raw.baseCurrency, versions };
+  return fxTable;
+};
+
+const getFxTable = () => fxTable || loadFxTable();
+
+// Find the table version in effect on a date (earliest version for older dates)
+const getRateVersion = (date) => {
+  const { versions } = getFxTable();
+  const when = new Date(date);
+
+  let selected = versions[0];
+  for (const version of versions) {
+    if (version.effectiveFrom > when) break;
+    selected = version;
+  }
+  return selected;
+};
+
+// Convert an amount into the base currency as of the expense date
+const toBaseCurrency = (amount, currency, date) => {
+  const { baseCurrency } = getFxTable();
+  const version = getRateVersion(date || new Date());
+  const rate = version.rates[currency || baseCurrency];
+
+  if (typeof rate !== 'number') {
+    throw new Error(`No FX rate for ${currency} in table version ${version.version}`);
+  }
+
+  return {
+    baseAmount: Math.round(amount * rate * 100) / 100,
+    baseCurrency,
+    fxRate: rate,
+    fxRateDate: version.effectiveFrom,
+    fxRateVersion: version.version
+  };
+};
+
+module.exports = {
+  loadFxTable,
+  getRateVersion,
+  toBaseCurrency
+};
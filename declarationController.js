@@ -0,0 +1,282 @@
+// src/controllers/declarationController.js - IT Declaration management controller
+const ITDeclaration = require('../models/ITDeclaration');
+const Employee = require('../models/Employee');
+const FileBlob = require('../models/FileBlob');
+const FYCloseJob = require('../models/FYCloseJob');
+const FYSummary = require('../models/FYSummary');
+const { toAttachment } = require('../services/blobStore');
+const { computeDeductions, getEmployeeDeductions } = require('../services/taxComputation');
+const { startFYClose, runFYClose } = require('../jobs/fyClose');
+
+const VERIFIER_ROLES = ['Administrator', 'HR Manager'];
+
+// Helper to check whether the logged-in user owns or verifies a declaration
+const canAccessDeclaration = async (user, declaration) => {
+  if (VERIFIER_ROLES.includes(user.role)) return true;
+  const employee = await Employee.findOne({ email: user.email });
+  return Boolean(employee && declaration.employee.equals(employee._id));
+};
+
+// @desc    Attach proof documents to a declaration
+// @route   POST /api/declarations/:id/documents
+// @access  Private
+const addDeclarationDocuments = async (req, res) => {
+  try {
+    const existing = await ITDeclaration.findById(req.params.id);
+
+    if (!existing || !(await canAccessDeclaration(req.user, existing))) {
+      return res.status(404).json({
+        success: false,
+        message: 'Declaration not found'
+      });
+    }
+
+    const documents = req.files.map(toAttachment);
+
+    // Proofs can be added until the declaration is verified or rejected
+    const declaration = await ITDeclaration.findOneAndUpdate(
+      { _id: req.params.id, status: { $in: ['Pending', 'Under Review'] }, fyClosedAt: null },
+      { $push: { documents: { $each: documents } } },
+      { new: true }
+    );
+
+    if (!declaration) {
+      return res.status(409).json({
+        success: false,
+        message: 'Documents cannot be added to a closed declaration'
+      });
+    }
+
+    await FileBlob.addReferences(req.files);
+
+    res.status(201).json({
+      success: true,
+      message: `${documents.length} document(s) added`,
+      data: declaration.documents,
+      deduplicated: req.files.filter(file => file.deduplicated).length
+    });
+
+  } catch (error) {
+    console.error('Add declaration documents error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Declaration not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// Helper for the current financial year (April to March)
+const currentFinancialYear = () => {
+  const now = new Date();
+  const start = now.getMonth() >= 3 ? now.getFullYear() : now.getFullYear() - 1;
+  return `${start}-${start + 1}`;
+};
+
+// @desc    Get eligible deductions for every employee in a financial year
+// @route   GET /api/declarations/tax-computation
+// @access  Private (Admin/HR only)
+const getTaxComputation = async (req, res) => {
+  try {
+    const { financialYear = currentFinancialYear(), basis = 'declared', employee } = req.query;
+
+    const data = employee
+      ? await getEmployeeDeductions(financialYear, employee, { basis })
+      : await computeDeductions(financialYear, { basis });
+
+    res.status(200).json({
+      success: true,
+      data
+    });
+
+  } catch (error) {
+    console.error('Get tax computation error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get the logged-in employee's eligible deductions
+// @route   GET /api/declarations/tax-computation/me
+// @access  Private
+const getMyTaxComputation = async (req, res) => {
+  try {
+    const { financialYear = currentFinancialYear(), basis = 'declared' } = req.query;
+    const employee = await Employee.findOne({ email: req.user.email });
+
+    if (!employee) {
+      return res.status(404).json({
+        success: false,
+        message: 'No employee record found for this user'
+      });
+    }
+
+    const data = await getEmployeeDeductions(financialYear, employee._id, { basis });
+
+    res.status(200).json({
+      success: true,
+      data
+    });
+
+  } catch (error) {
+    console.error('Get my tax computation error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Start or resume the financial year close
+// @route   POST /api/declarations/fy-close
+// @access  Private (Admin/HR only)
+const closeFinancialYear = async (req, res) => {
+  try {
+    const { financialYear, requireProof = true, partitionSize } = req.body;
+
+    if (!/^\d{4}-\d{4}$/.test(financialYear || '')) {
+      return res.status(400).json({
+        success: false,
+        message: 'Financial year must be in format YYYY-YYYY'
+      });
+    }
+
+    const job = await startFYClose({
+      financialYear,
+      userId: req.user._id,
+      requireProof,
+      partitionSize: partitionSize ? parseInt(partitionSize) : undefined
+    });
+
+    if (job.status === 'Completed') {
+      return res.status(200).json({
+        success: true,
+        message: 'Financial year already closed',
+        data: job
+      });
+    }
+
+    // Run in the background; progress is read from the job document
+    setImmediate(() => {
+      runFYClose(job._id).catch(error => {
+        console.error(`FY close ${financialYear} error:`, error);
+      });
+    });
+
+    console.log(`FY close ${financialYear} started by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: 'Financial year close started',
+      data: job
+    });
+
+  } catch (error) {
+    console.error('Close financial year error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get financial year close progress
+// @route   GET /api/declarations/fy-close/:financialYear
+// @access  Private (Admin/HR only)
+const getFYCloseStatus = async (req, res) => {
+  try {
+    const job = await FYCloseJob.findOne({ financialYear: req.params.financialYear })
+      .populate('startedBy', 'name');
+
+    if (!job) {
+      return res.status(404).json({
+        success: false,
+        message: 'No close job for this financial year'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      data: job
+    });
+
+  } catch (error) {
+    console.error('Get FY close status error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get per-employee financial year summaries
+// @route   GET /api/declarations/fy-summaries
+// @access  Private (Admin/HR only)
+const getFYSummaries = async (req, res) => {
+  try {
+    const { financialYear, employeeId, page = 1, limit = 50 } = req.query;
+
+    const query = {};
+    if (financialYear) query.financialYear = financialYear;
+    if (employeeId) query.employeeId = employeeId;
+
+    const summaries = await FYSummary.find(query)
+      .sort({ financialYear: -1, employeeId: 1 })
+      .limit(parseInt(limit))
+      .skip((parseInt(page) - 1) * parseInt(limit));
+
+    const total = await FYSummary.countDocuments(query);
+
+    res.status(200).json({
+      success: true,
+      data: summaries,
+      pagination: {
+        page: parseInt(page),
+        limit: parseInt(limit),
+        total,
+        pages: Math.ceil(total / parseInt(limit))
+      }
+    });
+
+  } catch (error) {
+    console.error('Get FY summaries error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  addDeclarationDocuments,
+  closeFinancialYear,
+  getFYCloseStatus,
+  getFYSummaries,
+  getTaxComputation,
+  getMyTaxComputation
+};
@@ -1,12 +1,30 @@
 // src/routes/declarations.js - IT Declaration management routes
 const express = require('express');
+const {
+  addDeclarationDocuments,
+  closeFinancialYear,
+  getFYCloseStatus,
+  getFYSummaries,
+  getTaxComputation,
+  getMyTaxComputation
+} = require('../controllers/declarationController');
 const { authenticate, authorize } = require('../middleware/auth');
+const { receiveFiles } = require('../middleware/upload');
 
 const router = express.Router();
 
 // All routes require authentication
 router.use(authenticate);
 
+// Tax computation routes
+router.get('/tax-computation/me', getMyTaxComputation);
+router.get('/tax-computation', authorize('Administrator', 'HR Manager'), getTaxComputation);
+
+// Financial year close routes
+router.post('/fy-close', authorize('Administrator', 'HR Manager'), closeFinancialYear);
+router.get('/fy-close/:financialYear', authorize('Administrator', 'HR Manager'), getFYCloseStatus);
+router.get('/fy-summaries', authorize('Administrator', 'HR Manager'), getFYSummaries);
+
 // Placeholder routes - implement controllers as needed
 router.get('/', (req, res) => {
   res.status(200).json({
@@ -23,4 +41,6 @@ router.post('/', (req, res) => {
   });
 });
 
+router.post('/:id/documents', receiveFiles(), addDeclarationDocuments);
+
 module.exports = router;
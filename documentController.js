@@ -0,0 +1,1341 @@
+// src/controllers/documentController.js - Document management controller
+const fs = require('fs');
+const path = require('path');
+const { pipeline } = require('stream');
+const Document = require('../models/Document');
+const DocumentVersion = require('../models/DocumentVersion');
+const DocumentAccess = require('../models/DocumentAccess');
+const FileBlob = require('../models/FileBlob');
+const { UPLOAD_DIR, blobPath, hashFile } = require('../services/blobStore');
+const { recordAccess } = require('../services/documentCounters');
+const documentSearch = require('../services/documentSearch');
+const resumableUploads = require('../services/resumableUploads');
+const { runRetention } = require('../jobs/documentRetention');
+const { serveFile, contentDisposition } = require('../utils/serveFile');
+const { createZipStream } = require('../utils/zipStream');
+
+// Limits for archive downloads
+const MAX_ZIP_SELECTION = 500;
+const MAX_ZIP_ENTRIES = 10000;
+const ARCHIVE_FIELDS = 'name originalName path digest isFolder folder ancestors updatedAt visibility uploadedBy sharedWith';
+
+// Helper to check a permission level: the document's own owner/share
+// fields first, then the access index (which covers shared parent folders)
+const hasPermission = async (user, document, permission) => {
+  if (document.uploadedBy && document.uploadedBy.equals(user._id)) return true;
+  if (permission === 'view' && document.canBeReadBy(user)) return true;
+  if (permission === 'edit' && document.canBeEditedBy(user)) return true;
+
+  const effective = await document.permissionFor(user);
+  return Boolean(effective) && DocumentAccess.atLeast(permission).includes(effective);
+};
+
+// Helper to parse a grantedAt|id listing cursor
+const parseCursor = (cursor) => {
+  if (!cursor) return undefined;
+  const [grantedAt, id] = String(cursor).split('|');
+  return { grantedAt: new Date(grantedAt), id };
+};
+
+// Helper to locate a document's bytes: blob store first, then the legacy path
+const resolveFilePath = (document) => {
+  if (document.digest) return blobPath(document.digest);
+  if (!document.path) return null;
+  return path.isAbsolute(document.path) ? document.path : path.join(UPLOAD_DIR, document.path);
+};
+
+// Helper to get the content hash, hashing legacy files once and remembering it
+const ensureDigest = async (document, filePath) => {
+  if (document.digest) return document.digest;
+
+  const digest = await hashFile(filePath);
+  await Document.updateOne({ _id: document._id, digest: null }, { $set: { digest } });
+  document.digest = digest;
+  return digest;
+};
+
+// Helper to drop path separators from a name used inside an archive
+const archiveName = (name) => String(name || 'untitled').replace(/[\\/]/g, '_');
+
+// Helper to check a whole selection at once; returns the ids the user can't read
+const findUnreadable = async (user, documents) => {
+  if (['Administrator', 'HR Manager'].includes(user.role)) return [];
+
+  const pending = documents.filter(doc => !doc.canBeReadBy(user));
+  if (!pending.length) return [];
+
+  const readable = new Set((await DocumentAccess.filterReadable(user._id, pending)).map(doc => String(doc._id)));
+  return pending.filter(doc => !readable.has(String(doc._id))).map(doc => doc._id);
+};
+
+// Helper to expand selected documents into archive entries: files keep their
+// name, folders bring their whole subtree under their own name. Selections
+// over MAX_ZIP_ENTRIES files are rejected (413) before anything is loaded.
+const collectArchiveFiles = async (roots) => {
+  const folderIds = roots.filter(doc => doc.isFolder).map(doc => doc._id);
+  const subtree = { ancestors: { $in: folderIds }, folder: { $ne: 'recycle' } };
+
+  const fileCount = roots.filter(doc => !doc.isFolder).length +
+    (folderIds.length ? await Document.countDocuments({ ...subtree, isFolder: false }) : 0);
+  if (fileCount > MAX_ZIP_ENTRIES) {
+    throw Object.assign(new Error(`Archives are limited to ${MAX_ZIP_ENTRIES} files`), { status: 413 });
+  }
+
+  const descendants = folderIds.length
+    ? await Document.find(subtree).select(ARCHIVE_FIELDS)
+    : [];
+
+  const folderNames = new Map();
+  [...roots, ...descendants]
+    .filter(doc => doc.isFolder)
+    .forEach(doc => folderNames.set(String(doc._id), archiveName(doc.name)));
+
+  const rootIds = new Set(folderIds.map(String));
+  const files = [];
+  const usedNames = new Set();
+
+  const addFile = (doc, segments) => {
+    let name = [...segments, archiveName(doc.name)].join('/');
+    // Same name twice in one folder: "report.pdf", "report (2).pdf", ...
+    for (let n = 2; usedNames.has(name); n++) {
+      const extension = path.extname(doc.name);
+      name = [...segments, `${archiveName(path.basename(doc.name, extension))} (${n})${extension}`].join('/');
+    }
+    usedNames.add(name);
+    files.push({ doc, name });
+  };
+
+  roots.filter(doc => !doc.isFolder).forEach(doc => addFile(doc, []));
+  descendants.filter(doc => !doc.isFolder).forEach(doc => {
+    // Path from the selected folder down to this file
+    const ancestors = doc.ancestors.map(String);
+    const start = ancestors.findIndex(id => rootIds.has(id));
+    addFile(doc, ancestors.slice(start).map(id => folderNames.get(id) || '_'));
+  });
+
+  return files.sort((a, b) => a.name.localeCompare(b.name));
+};
+
+// Helper to stream files as a ZIP straight into the response
+const sendArchive = (res, filename, files) => {
+  async function* entries() {
+    for (const { doc, name } of files) {
+      const filePath = resolveFilePath(doc);
+      try {
+        if (!filePath) continue;
+        await fs.promises.access(filePath);
+      } catch (error) {
+        console.error(`Archive skipped missing file for document ${doc._id}`);
+        continue;
+      }
+      yield { name, date: doc.updatedAt, source: () => fs.createReadStream(filePath) };
+    }
+  }
+
+  res.status(200).set({
+    'Content-Type': 'application/zip',
+    'Content-Disposition': contentDisposition(filename),
+    'Cache-Control': 'private, no-transform'
+  });
+
+  pipeline(createZipStream(entries()), res, (error) => {
+    if (error && error.code !== 'ERR_STREAM_PREMATURE_CLOSE') {
+      console.error('Archive stream error:', error.message);
+    }
+  });
+};
+
+// @desc    Download a folder as a ZIP archive
+// @route   GET /api/documents/:id/zip
+// @access  Private
+const downloadFolderArchive = async (req, res) => {
+  try {
+    const folder = await Document.findById(req.params.id).select(ARCHIVE_FIELDS);
+
+    if (!folder || !folder.isFolder) {
+      return res.status(404).json({
+        success: false,
+        message: 'Folder not found'
+      });
+    }
+
+    if ((await findUnreadable(req.user, [folder])).length) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to download this folder'
+      });
+    }
+
+    const files = await collectArchiveFiles([folder]);
+
+    sendArchive(res, `${archiveName(folder.name)}.zip`, files);
+
+  } catch (error) {
+    console.error('Download folder archive error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Folder not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Download selected documents and folders as one ZIP archive
+// @route   POST /api/documents/zip
+// @access  Private
+const downloadSelectionArchive = async (req, res) => {
+  try {
+    const { ids, name = 'documents' } = req.body;
+
+    if (!Array.isArray(ids) || !ids.length || ids.length > MAX_ZIP_SELECTION) {
+      return res.status(400).json({
+        success: false,
+        message: `Select between 1 and ${MAX_ZIP_SELECTION} documents`
+      });
+    }
+
+    const selected = await Document.find({ _id: { $in: ids } }).select(ARCHIVE_FIELDS);
+
+    if (selected.length !== new Set(ids.map(String)).size) {
+      return res.status(404).json({
+        success: false,
+        message: 'One or more documents not found'
+      });
+    }
+
+    // Check the whole selection before a single byte is sent
+    const denied = await findUnreadable(req.user, selected);
+    if (denied.length) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to download some of the selected documents',
+        denied
+      });
+    }
+
+    // A folder's subtree already covers anything selected inside it
+    const selectedIds = new Set(selected.map(doc => String(doc._id)));
+    const roots = selected.filter(doc =>
+      !doc.ancestors.some(id => selectedIds.has(String(id)))
+    );
+
+    const files = await collectArchiveFiles(roots);
+
+    sendArchive(res, `${archiveName(name)}.zip`, files);
+
+  } catch (error) {
+    console.error('Download selection archive error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Download a document (supports Range and conditional requests)
+// @route   GET /api/documents/:id/download
+// @access  Private
+const downloadDocument = async (req, res) => {
+  try {
+    const document = await Document.findById(req.params.id)
+      .select('name originalName path digest mimetype isFolder visibility uploadedBy sharedWith updatedAt ancestors');
+
+    if (!document || document.isFolder) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'view'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to download this document'
+      });
+    }
+
+    const filePath = resolveFilePath(document);
+    if (!filePath) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document file not found'
+      });
+    }
+
+    const digest = await ensureDigest(document, filePath);
+
+    await serveFile(req, res, filePath, {
+      etag: `"${digest}"`,
+      mimetype: document.mimetype,
+      filename: document.originalName || document.name,
+      inline: req.query.inline === 'true',
+      onComplete: ({ start }) => {
+        // Count a download once, not once per resumed range
+        if (start === 0) document.incrementDownload(req.user._id);
+      }
+    });
+
+  } catch (error) {
+    console.error('Download document error:', error);
+
+    if (res.headersSent) {
+      return res.destroy();
+    }
+
+    if (error.name === 'CastError' || error.code === 'ENOENT') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get a folder with its breadcrumbs and everything below it
+// @route   GET /api/documents/:id/tree
+// @access  Private
+const getFolderTree = async (req, res) => {
+  try {
+    const folder = await Document.findById(req.params.id);
+
+    if (!folder || !folder.isFolder) {
+      return res.status(404).json({
+        success: false,
+        message: 'Folder not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, folder, 'view'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to view this folder'
+      });
+    }
+
+    recordAccess(folder._id, req.user._id);
+
+    const [breadcrumbs, descendants] = await Promise.all([
+      Document.getBreadcrumbs(folder),
+      Document.getSubtree(folder._id, { foldersOnly: req.query.foldersOnly === 'true' })
+    ]);
+
+    res.status(200).json({
+      success: true,
+      data: {
+        folder,
+        breadcrumbs,
+        // Access to a folder carries to everything inside it
+        descendants
+      }
+    });
+
+  } catch (error) {
+    console.error('Get folder tree error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Folder not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Move a document or folder under another folder (or to the root)
+// @route   PATCH /api/documents/:id/move
+// @access  Private
+const moveDocument = async (req, res) => {
+  try {
+    const { parentFolder = null } = req.body;
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'edit'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to move this document'
+      });
+    }
+
+    if (parentFolder) {
+      const target = await Document.findById(parentFolder).select('isFolder uploadedBy sharedWith ancestors');
+      if (!target || !target.isFolder) {
+        return res.status(400).json({
+          success: false,
+          message: 'Target folder not found'
+        });
+      }
+      if (!(await hasPermission(req.user, target, 'edit'))) {
+        return res.status(403).json({
+          success: false,
+          message: 'Not authorized to move documents into this folder'
+        });
+      }
+    }
+
+    const moved = await Document.moveTo(document._id, parentFolder);
+
+    console.log(`Document ${document._id} moved by ${req.user.name}`);
+
+    res.status(200).json({
+      success: true,
+      message: 'Document moved successfully',
+      data: moved
+    });
+
+  } catch (error) {
+    console.error('Move document error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Rebuild folder paths, item counts and sizes
+// @route   POST /api/documents/folders/rebuild
+// @access  Private (Admin only)
+const rebuildFolderStats = async (req, res) => {
+  try {
+    const result = await Document.rebuildFolderStats();
+
+    res.status(200).json({
+      success: true,
+      message: 'Folder stats rebuilt successfully',
+      data: result
+    });
+
+  } catch (error) {
+    console.error('Rebuild folder stats error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get a document's version history, newest first
+// @route   GET /api/documents/:id/versions
+// @access  Private
+const getDocumentVersions = async (req, res) => {
+  try {
+    const { limit = 20, before } = req.query;
+    const document = await Document.findById(req.params.id)
+      .select('version isFolder visibility uploadedBy sharedWith ancestors');
+
+    if (!document || document.isFolder) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'view'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to view this document'
+      });
+    }
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const versions = await DocumentVersion.getHistory(document._id, {
+      limit: pageSize,
+      before: before ? parseInt(before) : undefined
+    });
+
+    res.status(200).json({
+      success: true,
+      data: versions,
+      pagination: {
+        limit: pageSize,
+        currentVersion: document.version,
+        nextBefore: versions.length === pageSize ? versions[versions.length - 1].version : null
+      }
+    });
+
+  } catch (error) {
+    console.error('Get document versions error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Upload a new version of a document
+// @route   POST /api/documents/:id/versions
+// @access  Private
+const addDocumentVersion = async (req, res) => {
+  try {
+    const [file] = req.files;
+
+    if (!file) {
+      return res.status(400).json({
+        success: false,
+        message: 'A file is required'
+      });
+    }
+
+    const existing = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors');
+
+    if (!existing) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, existing, 'edit'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to update this document'
+      });
+    }
+
+    const document = await Document.addVersion(existing._id, file, {
+      uploadedBy: req.user._id,
+      changes: req.body.changes
+    });
+
+    await FileBlob.addReferences([file]);
+    await DocumentVersion.markReferenced(document._id, document.version);
+
+    // Retention runs after the response path; pruned blobs are released
+    setImmediate(() => {
+      DocumentVersion.applyRetention(document._id)
+        .then(({ digests }) => FileBlob.releaseReferences(digests))
+        .catch(error => console.error('Document version retention error:', error));
+    });
+
+    console.log(`Document ${document._id} v${document.version} uploaded by ${req.user.name}`);
+
+    res.status(201).json({
+      success: true,
+      message: 'New version uploaded successfully',
+      data: document
+    });
+
+  } catch (error) {
+    console.error('Add document version error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Move embedded history out and apply version retention everywhere
+// @route   POST /api/documents/versions/prune
+// @access  Private (Admin only)
+const pruneDocumentVersions = async (req, res) => {
+  try {
+    const { trimmed } = await Document.migrateVersionHistory();
+    const { removed, digests } = await DocumentVersion.applyRetention();
+    await FileBlob.releaseReferences(digests);
+
+    res.status(200).json({
+      success: true,
+      message: 'Document versions pruned successfully',
+      data: { trimmed, removed }
+    });
+
+  } catch (error) {
+    console.error('Prune document versions error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get documents the user can reach (owned, shared and optionally public)
+// @route   GET /api/documents
+// @access  Private
+const getDocuments = async (req, res) => {
+  try {
+    const { permission = 'view', includePublic, limit = 20, after } = req.query;
+
+    if (!DocumentAccess.PERMISSIONS.includes(permission)) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid permission filter'
+      });
+    }
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const rows = await DocumentAccess.getAccessible(req.user._id, {
+      permission,
+      includePublic: includePublic === 'true',
+      limit: pageSize,
+      after: parseCursor(after)
+    });
+
+    const last = rows[rows.length - 1];
+
+    res.status(200).json({
+      success: true,
+      data: rows.filter(row => row.document).map(row => ({
+        ...row.document.toJSON(),
+        permission: row.permission
+      })),
+      pagination: {
+        limit: pageSize,
+        next: rows.length === pageSize ? `${last.grantedAt.toISOString()}|${last._id}` : null
+      }
+    });
+
+  } catch (error) {
+    console.error('Get documents error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get documents shared with the user
+// @route   GET /api/documents/shared-with-me
+// @access  Private
+const getSharedWithMe = async (req, res) => {
+  try {
+    const { permission = 'view', limit = 20, after } = req.query;
+
+    if (!DocumentAccess.PERMISSIONS.includes(permission)) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid permission filter'
+      });
+    }
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const rows = await DocumentAccess.getAccessible(req.user._id, {
+      permission,
+      sharedOnly: true,
+      limit: pageSize,
+      after: parseCursor(after)
+    });
+
+    const last = rows[rows.length - 1];
+
+    res.status(200).json({
+      success: true,
+      data: rows.filter(row => row.document).map(row => ({
+        ...row.document.toJSON(),
+        permission: row.permission,
+        sharedAt: row.grantedAt
+      })),
+      pagination: {
+        limit: pageSize,
+        next: rows.length === pageSize ? `${last.grantedAt.toISOString()}|${last._id}` : null
+      }
+    });
+
+  } catch (error) {
+    console.error('Get shared documents error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Share a document with a user
+// @route   POST /api/documents/:id/share
+// @access  Private
+const shareDocument = async (req, res) => {
+  try {
+    const { userId, permission = 'view' } = req.body;
+
+    if (!userId || !['view', 'edit', 'admin'].includes(permission)) {
+      return res.status(400).json({
+        success: false,
+        message: 'A user and a view, edit or admin permission are required'
+      });
+    }
+
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'admin'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to share this document'
+      });
+    }
+
+    await document.shareWith(userId, permission, req.user._id);
+
+    res.status(200).json({
+      success: true,
+      message: 'Document shared successfully'
+    });
+
+  } catch (error) {
+    console.error('Share document error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Stop sharing a document with a user
+// @route   DELETE /api/documents/:id/share/:userId
+// @access  Private
+const unshareDocument = async (req, res) => {
+  try {
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'admin'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to change sharing for this document'
+      });
+    }
+
+    await document.unshareWith(req.params.userId);
+
+    res.status(200).json({
+      success: true,
+      message: 'Document unshared successfully'
+    });
+
+  } catch (error) {
+    console.error('Unshare document error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Change a document's visibility
+// @route   PATCH /api/documents/:id/visibility
+// @access  Private
+const updateVisibility = async (req, res) => {
+  try {
+    const { visibility } = req.body;
+
+    if (!['private', 'public', 'restricted'].includes(visibility)) {
+      return res.status(400).json({
+        success: false,
+        message: 'Visibility must be private, public or restricted'
+      });
+    }
+
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors visibility');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'admin'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to change visibility for this document'
+      });
+    }
+
+    await document.setVisibility(visibility, req.user._id);
+
+    res.status(200).json({
+      success: true,
+      message: 'Visibility updated successfully',
+      data: { visibility }
+    });
+
+  } catch (error) {
+    console.error('Update visibility error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Rebuild the document access index
+// @route   POST /api/documents/access/rebuild
+// @access  Private (Admin only)
+const rebuildAccessIndex = async (req, res) => {
+  try {
+    const documents = await DocumentAccess.rebuild();
+
+    res.status(200).json({
+      success: true,
+      message: 'Document access index rebuilt successfully',
+      data: { documents }
+    });
+
+  } catch (error) {
+    console.error('Rebuild access index error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Search documents, best matches first
+// @route   GET /api/documents/search
+// @access  Private
+const searchDocuments = async (req, res) => {
+  try {
+    const { q, folder, category, type, limit, after } = req.query;
+
+    if (!q || !q.trim()) {
+      return res.status(400).json({
+        success: false,
+        message: 'Search query is required'
+      });
+    }
+
+    const { mode, results, next } = await documentSearch.search(req.user, q, {
+      folder,
+      category,
+      type,
+      limit,
+      after
+    });
+
+    res.status(200).json({
+      success: true,
+      data: results,
+      mode,
+      pagination: { next }
+    });
+
+  } catch (error) {
+    console.error('Search documents error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Suggest document names for a partial query
+// @route   GET /api/documents/autocomplete
+// @access  Private
+const autocompleteDocuments = async (req, res) => {
+  try {
+    const { q = '', limit } = req.query;
+    const suggestions = await documentSearch.autocomplete(req.user, q, { limit });
+
+    res.status(200).json({
+      success: true,
+      data: suggestions
+    });
+
+  } catch (error) {
+    console.error('Autocomplete documents error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Fill search keywords for existing documents
+// @route   POST /api/documents/search/reindex
+// @access  Private (Admin only)
+const reindexSearch = async (req, res) => {
+  try {
+    const documents = await Document.backfillKeywords();
+
+    res.status(200).json({
+      success: true,
+      message: 'Search keywords rebuilt successfully',
+      data: { documents }
+    });
+
+  } catch (error) {
+    console.error('Reindex search error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// Helper to answer upload protocol errors with the offset to resume from
+const sendUploadError = (res, error, fallbackMessage) => {
+  if (error.offset !== undefined) res.set('Upload-Offset', String(error.offset));
+
+  if (error.status) {
+    return res.status(error.status).json({
+      success: false,
+      message: error.message,
+      offset: error.offset
+    });
+  }
+
+  if (error.name === 'ValidationError') {
+    const errors = Object.values(error.errors).map(err => err.message);
+    return res.status(400).json({
+      success: false,
+      message: 'Validation Error',
+      errors
+    });
+  }
+
+  if (error.name === 'CastError') {
+    return res.status(404).json({
+      success: false,
+      message: 'Upload session not found'
+    });
+  }
+
+  res.status(500).json({
+    success: false,
+    message: fallbackMessage
+  });
+};
+
+// @desc    Start a resumable upload
+// @route   POST /api/documents/uploads
+// @access  Private
+const createUploadSession = async (req, res) => {
+  try {
+    const { parentFolder } = req.body;
+
+    if (parentFolder) {
+      const folder = await Document.findById(parentFolder).select('isFolder uploadedBy sharedWith ancestors');
+      if (!folder || !folder.isFolder) {
+        return res.status(400).json({
+          success: false,
+          message: 'Parent folder not found'
+        });
+      }
+      if (!(await hasPermission(req.user, folder, 'edit'))) {
+        return res.status(403).json({
+          success: false,
+          message: 'Not authorized to upload into this folder'
+        });
+      }
+    }
+
+    const session = await resumableUploads.createSession(req.user, {
+      ...req.body,
+      size: parseInt(req.body.size)
+    });
+
+    res.set('Upload-Offset', '0');
+    res.status(201).json({
+      success: true,
+      message: 'Upload session created',
+      data: session
+    });
+
+  } catch (error) {
+    console.error('Create upload session error:', error);
+    sendUploadError(res, error, 'Server error');
+  }
+};
+
+// @desc    Get an upload session and the offset to resume from
+// @route   GET /api/documents/uploads/:uploadId
+// @access  Private
+const getUploadSession = async (req, res) => {
+  try {
+    const session = await resumableUploads.getSession(req.user, req.params.uploadId);
+
+    res.set({
+      'Upload-Offset': String(session.received),
+      'Upload-Length': String(session.size),
+      'Cache-Control': 'no-store'
+    });
+    res.status(200).json({
+      success: true,
+      data: session
+    });
+
+  } catch (error) {
+    console.error('Get upload session error:', error);
+    sendUploadError(res, error, 'Server error');
+  }
+};
+
+// @desc    Upload one chunk as the raw request body
+// @route   PUT /api/documents/uploads/:uploadId
+// @access  Private
+// Headers: Upload-Offset (or Content-Range: bytes start-end/total),
+// optional Upload-Checksum: sha256 <base64 digest of the chunk>
+const uploadChunk = async (req, res) => {
+  try {
+    const range = /^bytes (\d+)-\d+\/\d+$/.exec(req.headers['content-range'] || '');
+    const offset = parseInt(req.headers['upload-offset'] || (range && range[1]), 10);
+
+    if (!Number.isInteger(offset) || offset < 0) {
+      return res.status(400).json({
+        success: false,
+        message: 'Upload-Offset header is required'
+      });
+    }
+
+    let checksum;
+    if (req.headers['upload-checksum']) {
+      const [algorithm, value] = req.headers['upload-checksum'].split(' ');
+      if (algorithm !== 'sha256' || !value) {
+        return res.status(400).json({
+          success: false,
+          message: 'Upload-Checksum must be "sha256 <base64>"'
+        });
+      }
+      checksum = value;
+    }
+
+    const session = await resumableUploads.writeChunk(req.user, req.params.uploadId, req, {
+      offset,
+      checksum
+    });
+
+    res.set('Upload-Offset', String(session.received));
+    res.status(200).json({
+      success: true,
+      data: {
+        offset: session.received,
+        size: session.size,
+        progress: session.progress
+      }
+    });
+
+  } catch (error) {
+    console.error('Upload chunk error:', error.message);
+
+    // The client went away mid-chunk; the bytes it sent are already kept
+    if (req.destroyed || res.destroyed) return;
+    sendUploadError(res, error, 'Server error');
+  }
+};
+
+// @desc    Finish a resumable upload and create the document
+// @route   POST /api/documents/uploads/:uploadId/complete
+// @access  Private
+const completeUpload = async (req, res) => {
+  try {
+    const { session, document } = await resumableUploads.completeSession(req.user, req.params.uploadId);
+
+    console.log(`Resumable upload ${session._id} completed by ${req.user.name}`);
+
+    res.status(201).json({
+      success: true,
+      message: 'Upload completed successfully',
+      data: document
+    });
+
+  } catch (error) {
+    console.error('Complete upload error:', error);
+    sendUploadError(res, error, 'Server error');
+  }
+};
+
+// @desc    Abandon a resumable upload
+// @route   DELETE /api/documents/uploads/:uploadId
+// @access  Private
+const abortUpload = async (req, res) => {
+  try {
+    await resumableUploads.abortSession(req.user, req.params.uploadId);
+
+    res.status(200).json({
+      success: true,
+      message: 'Upload cancelled'
+    });
+
+  } catch (error) {
+    console.error('Abort upload error:', error);
+    sendUploadError(res, error, 'Server error');
+  }
+};
+
+// @desc    Move a document (and its contents) to the recycle bin
+// @route   PATCH /api/documents/:id/recycle
+// @access  Private
+const recycleDocument = async (req, res) => {
+  try {
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors folder');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'edit'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to delete this document'
+      });
+    }
+
+    const recycled = await Document.recycle(document._id);
+
+    if (!recycled) {
+      return res.status(409).json({
+        success: false,
+        message: 'Document is already in the recycle bin'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      message: 'Document moved to the recycle bin',
+      data: recycled
+    });
+
+  } catch (error) {
+    console.error('Recycle document error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Restore a document from the recycle bin
+// @route   PATCH /api/documents/:id/restore
+// @access  Private
+const restoreDocument = async (req, res) => {
+  try {
+    const document = await Document.findById(req.params.id).select('uploadedBy sharedWith ancestors folder');
+
+    if (!document) {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    if (!(await hasPermission(req.user, document, 'edit'))) {
+      return res.status(403).json({
+        success: false,
+        message: 'Not authorized to restore this document'
+      });
+    }
+
+    const restored = await Document.restore(document._id);
+
+    if (!restored) {
+      return res.status(409).json({
+        success: false,
+        message: 'Document is not in the recycle bin or is being archived'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      message: 'Document restored successfully',
+      data: restored
+    });
+
+  } catch (error) {
+    console.error('Restore document error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Document not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Run recycle bin archiving and blob purge now
+// @route   POST /api/documents/recycle/purge
+// @access  Private (Admin only)
+const runDocumentRetention = async (req, res) => {
+  try {
+    setImmediate(() => {
+      runRetention({ force: true }).catch(error => {
+        console.error('Document retention error:', error);
+      });
+    });
+
+    console.log(`Document retention started by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: 'Document retention started'
+    });
+
+  } catch (error) {
+    console.error('Run document retention error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  recycleDocument,
+  restoreDocument,
+  runDocumentRetention,
+  createUploadSession,
+  getUploadSession,
+  uploadChunk,
+  completeUpload,
+  abortUpload,
+  downloadFolderArchive,
+  downloadSelectionArchive,
+  searchDocuments,
+  autocompleteDocuments,
+  reindexSearch,
+  getDocuments,
+  getSharedWithMe,
+  shareDocument,
+  unshareDocument,
+  updateVisibility,
+  rebuildAccessIndex,
+  downloadDocument,
+  getDocumentVersions,
+  addDocumentVersion,
+  pruneDocumentVersions,
+  getFolderTree,
+  moveDocument,
+  rebuildFolderStats
+};
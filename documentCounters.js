@@ -0,0 +1,119 @@
+// src/services/documentCounters.js - Write-behind download and access counters for documents
+const mongoose = require('mongoose');
+
+// How often pending counters are written, and how many documents may pile up
+// before an early flush. A crash loses at most one interval of increments.
+const FLUSH_INTERVAL_MS = parseInt(process.env.DOCUMENT_COUNTER_FLUSH_MS) || 5000;
+const MAX_PENDING_DOCUMENTS = 1000;
+
+// documentId -> { downloads, lastAccessedAt, lastAccessedBy }
+let pending = new Map();
+let timer = null;
+let flushing = null;
+
+// Helper to fold one event into the pending entry for a document
+const record = (documentId, userId, downloads) => {
+  const key = String(documentId);
+  const entry = pending.get(key) || { downloads: 0, lastAccessedAt: null, lastAccessedBy: null };
+
+  entry.downloads += downloads;
+  if (userId) {
+    entry.lastAccessedAt = new Date();
+    entry.lastAccessedBy = userId;
+  }
+  pending.set(key, entry);
+  start();
+
+  if (pending.size >= MAX_PENDING_DOCUMENTS) {
+    flush().catch(() => {});
+  }
+};
+
+// Record a completed download
+const recordDownload = (documentId, userId = null) => record(documentId, userId, 1);
+
+// Record a view that should only stamp the last access
+const recordAccess = (documentId, userId) => record(documentId, userId, 0);
+
+// Helper to put a failed batch back so its increments are retried
+const restore = (batch) => {
+  for (const [key, entry] of batch) {
+    const current = pending.get(key);
+    if (!current) {
+      pending.set(key, entry);
+      continue;
+    }
+    current.downloads += entry.downloads;
+    if (!current.lastAccessedAt && entry.lastAccessedAt) {
+      current.lastAccessedAt = entry.lastAccessedAt;
+      current.lastAccessedBy = entry.lastAccessedBy;
+    }
+  }
+};
+
+// Write all pending counters in one bulkWrite. Counts use $inc and the
+// access stamp uses $max, so flushes from several nodes commute; the user
+// is only written when this node's stamp is the one that won.
+const flush = async () => {
+  if (flushing) return flushing;
+  if (!pending.size) return null;
+
+  const batch = pending;
+  pending = new Map();
+
+  const operations = [];
+  for (const [key, entry] of batch) {
+    const _id = new mongoose.Types.ObjectId(key);
+    const update = {};
+    if (entry.downloads) update.$inc = { downloadCount: entry.downloads };
+    if (entry.lastAccessedAt) update.$max = { lastAccessedAt: entry.lastAccessedAt };
+    operations.push({ updateOne: { filter: { _id }, update } });
+
+    if (entry.lastAccessedAt) {
+      operations.push({
+        updateOne: {
+          filter: { _id, lastAccessedAt: entry.lastAccessedAt },
+          update: { $set: { lastAccessedBy: entry.lastAccessedBy } }
+        }
+      });
+    }
+  }
+
+  flushing = mongoose.model('Document')
+    .bulkWrite(operations, { ordered: true })
+    .catch(error => {
+      console.error('Document counter flush error:', error.message);
+      restore(batch);
+    })
+    .finally(() => {
+      flushing = null;
+    });
+
+  return flushing;
+};
+
+// Start the periodic flush (on first use); the timer doesn't keep the process alive
+function start() {
+  if (timer) return;
+  timer = setInterval(() => {
+    flush().catch(() => {});
+  }, FLUSH_INTERVAL_MS);
+  timer.unref();
+}
+
+// Stop the periodic flush and write whatever is still pending
+const stop = async () => {
+  clearInterval(timer);
+  timer = null;
+  if (flushing) await flushing;
+  await flush();
+};
+
+module.exports = {
+  FLUSH_INTERVAL_MS,
+  recordDownload,
+  recordAccess,
+  flush,
+  start,
+  stop
+};
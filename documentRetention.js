@@ -0,0 +1,242 @@
+// src/jobs/documentRetention.js - Recycle bin archiving and blob purge
+const Document = require('../models/Document');
+const DocumentVersion = require('../models/DocumentVersion');
+const ArchivedDocument = require('../models/ArchivedDocument');
+const FileBlob = require('../models/FileBlob');
+const { removeBlob } = require('../services/blobStore');
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Days in the recycle bin before archiving, then days archived before blobs go
+const RECYCLE_RETENTION_DAYS = parseInt(process.env.RECYCLE_RETENTION_DAYS) || 30;
+const ARCHIVE_RETENTION_DAYS = parseInt(process.env.ARCHIVE_RETENTION_DAYS) || 90;
+
+// Unreferenced blobs are kept this long in case the same content comes back
+const BLOB_GRACE_MS = DAY_MS;
+
+// Low-traffic window (server local time), e.g. "01:00-05:00"
+const RETENTION_WINDOW = process.env.DOCUMENT_RETENTION_WINDOW || '01:00-05:00';
+
+const BATCH_SIZE = 100;
+const BATCH_PAUSE_MS = 200;
+const RUN_BUDGET_MS = 20 * 60 * 1000;
+const CHECK_INTERVAL_MS = 15 * 60 * 1000;
+
+let timer = null;
+let running = null;
+let stopping = false;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Helper to parse "HH:MM-HH:MM" into minutes since midnight
+const parseWindow = (value) => {
+  const match = /^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$/.exec(value.trim());
+  if (!match) {
+    throw new Error(`Invalid DOCUMENT_RETENTION_WINDOW: ${value}`);
+  }
+  return {
+    start: parseInt(match[1]) * 60 + parseInt(match[2]),
+    end: parseInt(match[3]) * 60 + parseInt(match[4])
+  };
+};
+
+// Helper to check whether a time falls in the window (which may wrap midnight)
+const inWindow = (date = new Date(), window = parseWindow(RETENTION_WINDOW)) => {
+  const minutes = date.getHours() * 60 + date.getMinutes();
+  return window.start <= window.end
+    ? minutes >= window.start && minutes < window.end
+    : minutes >= window.start || minutes < window.end;
+};
+
+// Archive one recycled item and everything inside it: metadata goes to the
+// archive collection (keeping the blob references its versions hold), then
+// the documents leave the hot collection
+const archiveRoot = async (root) => {
+  const subtree = await Document.find({ $or: [{ _id: root._id }, { ancestors: root._id }] }).lean();
+  const ids = subtree.map(doc => doc._id);
+
+  const versions = await DocumentVersion.find({ document: { $in: ids } })
+    .select('document digest referenced')
+    .lean();
+  const digestsByDocument = new Map();
+  versions.forEach(version => {
+    // Only versions counted in FileBlob.refCount hold a reference to release
+    if (!version.referenced || !version.digest) return;
+    const key = String(version.document);
+    digestsByDocument.set(key, [...(digestsByDocument.get(key) || []), version.digest]);
+  });
+
+  const purgeAfter = new Date(Date.now() + ARCHIVE_RETENTION_DAYS * DAY_MS);
+  try {
+    await ArchivedDocument.insertMany(subtree.map(doc => ({
+      _id: doc._id,
+      snapshot: doc,
+      name: doc.name,
+      uploadedBy: doc.uploadedBy,
+      recycledAt: root.recycledAt,
+      digests: digestsByDocument.get(String(doc._id)) || [],
+      purgeAfter
+    })), { ordered: false });
+  } catch (error) {
+    // Entries left by an interrupted earlier attempt are already archived
+    const errors = error.writeErrors || [];
+    if (error.code !== 11000 && !(errors.length && errors.every(err => err.code === 11000))) {
+      throw error;
+    }
+  }
+
+  await DocumentVersion.deleteMany({ document: { $in: ids } });
+  await Document.removeTree(root._id);
+  return ids.length;
+};
+
+// Archive recycled items older than the recycle retention period
+const archiveRecycled = async ({ batchSize = BATCH_SIZE } = {}) => {
+  const recycledBefore = new Date(Date.now() - RECYCLE_RETENTION_DAYS * DAY_MS);
+  const candidates = await Document.find({ folder: 'recycle', recycledAt: { $lt: recycledBefore } })
+    .select('_id')
+    .limit(batchSize)
+    .lean();
+
+  let roots = 0;
+  let documents = 0;
+  for (const candidate of candidates) {
+    const root = await Document.claimForArchive(candidate._id, recycledBefore);
+    if (!root) continue;
+    documents += await archiveRoot(root);
+    roots += 1;
+  }
+
+  return { roots, documents };
+};
+
+// Release the blob references of archived entries past their retention
+const releaseArchivedBlobs = async ({ batchSize = BATCH_SIZE } = {}) => {
+  const due = await ArchivedDocument.find({ blobsPurgedAt: null, purgeAfter: { $lt: new Date() } })
+    .select('_id')
+    .limit(batchSize)
+    .lean();
+
+  const digests = [];
+  let claimedCount = 0;
+  for (const entry of due) {
+    // Claim first: a crash may leak a reference, but never releases one twice
+    const claimed = await ArchivedDocument.findOneAndUpdate(
+      { _id: entry._id, blobsPurgedAt: null },
+      { $set: { blobsPurgedAt: new Date() } },
+      { new: true }
+    );
+    if (!claimed) continue;
+    digests.push(...claimed.digests);
+    claimedCount += 1;
+  }
+
+  if (digests.length) {
+    await FileBlob.releaseReferences(digests);
+  }
+  return { entries: claimedCount, released: digests.length };
+};
+
+// Delete blobs nothing has referenced for the grace period
+const purgeBlobs = async ({ batchSize = BATCH_SIZE } = {}) => {
+  const unreferenced = await FileBlob.find({
+    refCount: { $lte: 0 },
+    updatedAt: { $lt: new Date(Date.now() - BLOB_GRACE_MS) }
+  })
+    .select('_id')
+    .limit(batchSize)
+    .lean();
+
+  let removed = 0;
+  for (const blob of unreferenced) {
+    // Row first, guarded on the count, so a blob referenced meanwhile survives
+    const deleted = await FileBlob.findOneAndDelete({ _id: blob._id, refCount: { $lte: 0 } });
+    if (!deleted) continue;
+    await removeBlob(blob._id);
+    removed += 1;
+  }
+
+  return { removed };
+};
+
+// Run every phase in bounded batches until there is nothing left, the time
+// budget is spent or (unless forced) the low-traffic window closes
+const runRetention = async ({ force = false, budgetMs = RUN_BUDGET_MS } = {}) => {
+  if (running) return running;
+
+  running = (async () => {
+    const deadline = Date.now() + budgetMs;
+    const keepGoing = () => !stopping && Date.now() < deadline && (force || inWindow());
+    const summary = { archivedRoots: 0, archivedDocuments: 0, releasedReferences: 0, removedBlobs: 0 };
+
+    const phases = [
+      async () => {
+        const result = await archiveRecycled();
+        summary.archivedRoots += result.roots;
+        summary.archivedDocuments += result.documents;
+        return result.roots;
+      },
+      async () => {
+        const result = await releaseArchivedBlobs();
+        summary.releasedReferences += result.released;
+        return result.entries;
+      },
+      async () => {
+        const result = await purgeBlobs();
+        summary.removedBlobs += result.removed;
+        return result.removed;
+      }
+    ];
+
+    // A phase repeats only while it keeps filling whole batches
+    for (const phase of phases) {
+      while (keepGoing()) {
+        const processed = await phase();
+        if (processed < BATCH_SIZE) break;
+        await sleep(BATCH_PAUSE_MS);
+      }
+    }
+
+    if (summary.archivedDocuments || summary.removedBlobs) {
+      console.log(`Document retention: archived ${summary.archivedDocuments} document(s), removed ${summary.removedBlobs} blob(s)`);
+    }
+    return summary;
+  })().finally(() => {
+    running = null;
+  });
+
+  return running;
+};
+
+// Check every few minutes and run inside the window
+const start = () => {
+  if (timer) return;
+  parseWindow(RETENTION_WINDOW);
+  stopping = false;
+
+  timer = setInterval(() => {
+    if (running || !inWindow()) return;
+    runRetention().catch(error => {
+      console.error('Document retention error:', error);
+    });
+  }, CHECK_INTERVAL_MS);
+  timer.unref();
+};
+
+// Stop scheduling and let the current batch finish
+const stop = async () => {
+  stopping = true;
+  clearInterval(timer);
+  timer = null;
+  if (running) await running.catch(() => {});
+};
+
+module.exports = {
+  inWindow,
+  archiveRecycled,
+  releaseArchivedBlobs,
+  purgeBlobs,
+  runRetention,
+  start,
+  stop
+};
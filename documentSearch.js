@@ -0,0 +1,231 @@
+// src/services/documentSearch.js - Ranked document search, autocomplete and result cache
+const mongoose = require('mongoose');
+
+const CACHE_TTL_MS = 30 * 1000;
+const MAX_CACHE_ENTRIES = 500;
+const AUTOCOMPLETE_CANDIDATES = 50;
+
+// Fields returned by search and autocomplete (no paths, passwords or history)
+const RESULT_FIELDS = {
+  name: 1,
+  type: 1,
+  folder: 1,
+  category: 1,
+  tags: 1,
+  size: 1,
+  formattedSize: 1,
+  mimetype: 1,
+  isFolder: 1,
+  parentFolder: 1,
+  uploadedBy: 1,
+  downloadCount: 1,
+  createdAt: 1,
+  updatedAt: 1
+};
+
+// Cached pages: key -> { expiresAt, generation, result }. Any document
+// write on this node bumps the generation; TTL bounds staleness across nodes.
+const cache = new Map();
+let generation = 0;
+
+// Drop every cached result (called from Document write hooks)
+const invalidate = () => {
+  generation += 1;
+  cache.clear();
+};
+
+// Helper to split text into lowercase search keywords
+const tokenize = (text = '') => String(text)
+  .toLowerCase()
+  .split(/[^\p{L}\p{N}]+/u)
+  .filter(Boolean);
+
+// Keywords for prefix matching: name tokens plus whole and tokenized tags
+const buildKeywords = (name, tags = []) => {
+  const keywords = new Set(tokenize(name));
+  tags.forEach(tag => {
+    const lower = String(tag).toLowerCase().trim();
+    if (lower) keywords.add(lower);
+    tokenize(tag).forEach(token => keywords.add(token));
+  });
+  return Array.from(keywords);
+};
+
+// Helper to escape user input for an anchored regex
+const escapeRegex = (text) => text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
+const seesEverything = (user) => ['Administrator', 'HR Manager'].includes(user.role);
+
+// Helper to restrict results to what a user may see, resolved through the
+// access index so folder-inherited grants count
+const accessFilter = (user) => {
+  if (seesEverything(user)) return {};
+  return mongoose.model('DocumentAccess').readableFilter(user._id);
+};
+
+// Helper to get the cache scope of a user's results
+const accessScope = (user) => (seesEverything(user) ? 'all' : String(user._id));
+
+// Helper to build folder/category/type filters
+const buildFilters = ({ folder, category, type }) => {
+  const filters = { folder: { $ne: 'recycle' } };
+  if (folder) filters.folder = folder;
+  if (category) filters.category = category;
+  if (type) filters.type = type;
+  return filters;
+};
+
+// Helper to serve a result from cache or compute and remember it
+const cached = async (key, compute) => {
+  const hit = cache.get(key);
+  if (hit && hit.expiresAt > Date.now() && hit.generation === generation) {
+    return hit.result;
+  }
+
+  const startGeneration = generation;
+  const result = await compute();
+
+  // Don't cache a result computed across an invalidation
+  if (startGeneration === generation) {
+    if (cache.size >= MAX_CACHE_ENTRIES) {
+      cache.delete(cache.keys().next().value);
+    }
+    cache.set(key, { expiresAt: Date.now() + CACHE_TTL_MS, generation, result });
+  }
+  return result;
+};
+
+// Text search ranked by text score, paged with a score|id cursor
+const textPage = async (Document, match, query, limit, after) => {
+  const pipeline = [
+    { $match: { $text: { $search: query }, ...match } },
+    { $addFields: { score: { $meta: 'textScore' } } }
+  ];
+  if (after) {
+    pipeline.push({
+      $match: {
+        $or: [
+          { score: { $lt: after.value } },
+          { score: after.value, _id: { $gt: after.id } }
+        ]
+      }
+    });
+  }
+  pipeline.push(
+    { $sort: { score: -1, _id: 1 } },
+    { $limit: limit },
+    { $project: { ...RESULT_FIELDS, score: 1 } }
+  );
+  return Document.aggregate(pipeline);
+};
+
+// Prefix search on keywords, paged by name|id, used when no whole word matches
+const prefixPage = (Document, match, prefix, limit, after) => {
+  const query = { keywords: { $regex: `^${escapeRegex(prefix)}` }, ...match };
+  if (after) {
+    query.$and = [{
+      $or: [
+        { name: { $gt: after.value } },
+        { name: after.value, _id: { $gt: after.id } }
+      ]
+    }];
+  }
+  return Document.find(query)
+    .select(RESULT_FIELDS)
+    .sort({ name: 1, _id: 1 })
+    .limit(limit)
+    .lean();
+};
+
+// Helper to encode / decode a page cursor: mode|value|id
+const encodeCursor = (mode, value, id) =>
+  Buffer.from(JSON.stringify([mode, value, String(id)])).toString('base64url');
+
+const decodeCursor = (cursor) => {
+  if (!cursor) return null;
+  try {
+    const [mode, value, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString());
+    return { mode, value, id: new mongoose.Types.ObjectId(id) };
+  } catch (error) {
+    throw Object.assign(new Error('Invalid cursor'), { status: 400 });
+  }
+};
+
+// Ranked search. Whole words go through the text index (score-ranked);
+// when nothing matches, the last word is treated as a prefix ("polic").
+// options: { folder, category, type, limit, after }
+const search = async (user, query, options = {}) => {
+  const limit = Math.min(parseInt(options.limit) || 20, 100);
+  const key = JSON.stringify(['search', accessScope(user), query, options.folder, options.category, options.type, limit, options.after || null]);
+
+  return cached(key, async () => {
+    const Document = mongoose.model('Document');
+    const match = { ...buildFilters(options), ...(await accessFilter(user)) };
+    const after = decodeCursor(options.after);
+    const tokens = tokenize(query);
+    if (!tokens.length) return { results: [], next: null, mode: 'text' };
+
+    let mode = after ? after.mode : 'text';
+    let results = [];
+
+    if (mode === 'text') {
+      results = await textPage(Document, match, query, limit, after);
+      // Nothing matched as a whole word: fall back to prefix matching
+      if (!results.length && !after) mode = 'prefix';
+    }
+    if (mode === 'prefix') {
+      results = await prefixPage(Document, match, tokens[tokens.length - 1], limit, after);
+    }
+
+    await Document.populate(results, { path: 'uploadedBy', select: 'name' });
+
+    const last = results[results.length - 1];
+    return {
+      mode,
+      results,
+      next: results.length === limit
+        ? encodeCursor(mode, mode === 'text' ? last.score : last.name, last._id)
+        : null
+    };
+  });
+};
+
+// Name/tag suggestions for the last word typed, most downloaded first
+const autocomplete = async (user, query, { limit = 10 } = {}) => {
+  const tokens = tokenize(query);
+  if (!tokens.length) return [];
+
+  const prefix = tokens[tokens.length - 1];
+  const size = Math.min(parseInt(limit) || 10, 25);
+  const key = JSON.stringify(['autocomplete', accessScope(user), prefix, size]);
+
+  return cached(key, async () => {
+    const Document = mongoose.model('Document');
+
+    // Bounded range scan on the keywords index, ranked in memory
+    const candidates = await Document.find({
+      keywords: { $regex: `^${escapeRegex(prefix)}` },
+      folder: { $ne: 'recycle' },
+      ...(await accessFilter(user))
+    })
+      .select('name type isFolder downloadCount')
+      .limit(AUTOCOMPLETE_CANDIDATES)
+      .lean();
+
+    return candidates
+      .map(doc => ({
+        ...doc,
+        nameMatch: doc.name.toLowerCase().startsWith(prefix)
+      }))
+      .sort((a, b) => (b.nameMatch - a.nameMatch) || (b.downloadCount - a.downloadCount))
+      .slice(0, size)
+      .map(({ nameMatch, downloadCount, ...doc }) => doc);
+  });
+};
+
+module.exports = {
+  buildKeywords,
+  invalidate,
+  search,
+  autocomplete
+};
@@ -1,21 +1,47 @@
 // src/routes/documents.js - Document management routes
 const express = require('express');
 const { authenticate, authorize } = require('../middleware/auth');
+const { receiveFiles } = require('../middleware/upload');
+const {
+  recycleDocument,
+  restoreDocument,
+  runDocumentRetention,
+  createUploadSession,
+  getUploadSession,
+  uploadChunk,
+  completeUpload,
+  abortUpload,
+  downloadFolderArchive,
+  downloadSelectionArchive,
+  searchDocuments,
+  autocompleteDocuments,
+  reindexSearch,
+  getDocuments,
+  getSharedWithMe,
+  shareDocument,
+  unshareDocument,
+  updateVisibility,
+  rebuildAccessIndex,
+  downloadDocument,
+  getDocumentVersions,
+  addDocumentVersion,
+  pruneDocumentVersions,
+  getFolderTree,
+  moveDocument,
+  rebuildFolderStats
+} = require('../controllers/documentController');
 
 const router = express.Router();
 
 // All routes require authentication
 router.use(authenticate);
 
-// Placeholder routes - implement controllers as needed
-router.get('/', (req, res) => {
-  res.status(200).json({
-    success: true,
-    message: 'Document routes not implemented yet',
-    data: []
-  });
-});
+router.get('/', getDocuments);
+router.get('/shared-with-me', getSharedWithMe);
+router.get('/search', searchDocuments);
+router.get('/autocomplete', autocompleteDocuments);
 
+// Placeholder routes - implement controllers as needed
 router.post('/', (req, res) => {
   res.status(201).json({
     success: true,
@@ -23,4 +49,36 @@ router.post('/', (req, res) => {
   });
 });
 
+router.post('/folders/rebuild', authorize('Administrator'), rebuildFolderStats);
+
+router.post('/zip', downloadSelectionArchive);
+
+// Resumable uploads: create a session, PUT raw chunks at offsets, complete
+router.post('/uploads', createUploadSession);
+router.get('/uploads/:uploadId', getUploadSession);
+router.put('/uploads/:uploadId', uploadChunk);
+router.post('/uploads/:uploadId/complete', completeUpload);
+router.delete('/uploads/:uploadId', abortUpload);
+
+router.post('/recycle/purge', authorize('Administrator'), runDocumentRetention);
+router.post('/search/reindex', authorize('Administrator'), reindexSearch);
+router.post('/access/rebuild', authorize('Administrator'), rebuildAccessIndex);
+router.post('/versions/prune', authorize('Administrator'), pruneDocumentVersions);
+
+router.post('/:id/share', shareDocument);
+router.delete('/:id/share/:userId', unshareDocument);
+router.patch('/:id/visibility', updateVisibility);
+router.patch('/:id/recycle', recycleDocument);
+router.patch('/:id/restore', restoreDocument);
+
+router.get('/:id/tree', getFolderTree);
+router.patch('/:id/move', moveDocument);
+
+router.get('/:id/versions', getDocumentVersions);
+router.post('/:id/versions', receiveFiles({ maxFiles: 1 }), addDocumentVersion);
+
+// GET (and HEAD) stream the file; supports Range and If-None-Match
+router.get('/:id/download', downloadDocument);
+router.get('/:id/zip', downloadFolderArchive);
+
 module.exports = router;
@@ -0,0 +1,159 @@
+// src/jobs/fyClose.js - Parallel financial year close for IT declarations
+const os = require('os');
+const path = require('path');
+const ITDeclaration = require('../models/ITDeclaration');
+const FYCloseJob = require('../models/FYCloseJob');
+const { WorkerPool } = require('../utils/workerPool');
+
+const WORKER_FILE = path.join(__dirname, 'fyCloseWorker.js');
+const LEASE_MS = 10 * 60 * 1000;
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+const PARTITION_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Partition progress is written at most this often per partition
+const PROGRESS_INTERVAL_MS = 1000;
+
+// Create the close job for a financial year, or return the existing one.
+// Employees with declarations in the year are split into contiguous
+// _id ranges of `partitionSize`; each range is closed by one worker task.
+const startFYClose = async ({ financialYear, userId, requireProof = true, partitionSize = 500 }) => {
+  const existing = await FYCloseJob.findOne({ financialYear });
+  if (existing) return existing;
+
+  const employees = await ITDeclaration.distinct('employee', { financialYear });
+  employees.sort((a, b) => String(a).localeCompare(String(b)));
+
+  const partitions = [];
+  for (let i = 0; i < employees.length; i += partitionSize) {
+    const slice = employees.slice(i, i + partitionSize);
+    partitions.push({
+      index: partitions.length,
+      firstEmployee: slice[0],
+      lastEmployee: slice[slice.length - 1],
+      employeeCount: slice.length
+    });
+  }
+
+  try {
+    return await FYCloseJob.create({
+      financialYear,
+      requireProof,
+      partitions,
+      totalEmployees: employees.length,
+      startedBy: userId
+    });
+  } catch (error) {
+    // Another request created it first
+    if (error.code === 11000) return FYCloseJob.findOne({ financialYear });
+    throw error;
+  }
+};
+
+// Take (or extend) the lease on a job; null when done or held elsewhere
+const acquireLease = (jobId) => {
+  const now = new Date();
+  return FYCloseJob.findOneAndUpdate(
+    {
+      _id: jobId,
+      status: { $ne: 'Completed' },
+      $or: [
+        { lockedUntil: null },
+        { lockedUntil: { $lt: now } },
+        { lockedBy: WORKER_ID }
+      ]
+    },
+    {
+      $set: {
+        status: 'Running',
+        lockedBy: WORKER_ID,
+        lockedUntil: new Date(now.getTime() + LEASE_MS),
+        lastError: null
+      }
+    },
+    { new: true }
+  );
+};
+
+// Progress callback for one partition: throttled writes of its percentage
+// that also keep the job lease alive while long partitions run
+const partitionProgress = (jobId, index) => {
+  let writtenAt = 0;
+  return (value) => {
+    const now = Date.now();
+    if (now - writtenAt < PROGRESS_INTERVAL_MS) return;
+    writtenAt = now;
+    FYCloseJob.updateOne(
+      { _id: jobId, lockedBy: WORKER_ID, partitions: { $elemMatch: { index, status: { $ne: 'Done' } } } },
+      {
+        $set: {
+          'partitions.$.progress': Math.min(Math.max(Math.round(value), 0), 100),
+          lockedUntil: new Date(now + LEASE_MS)
+        }
+      }
+    ).catch(error => {
+      console.error('FY close progress error:', error.message);
+    });
+  };
+};
+
+// Close every partition not yet checkpointed, spread over a worker pool
+const runFYClose = async (jobId) => {
+  const job = await acquireLease(jobId);
+  if (!job) return null;
+
+  const pending = job.partitions.filter(partition => partition.status !== 'Done');
+  const pool = pending.length
+    ? new WorkerPool(WORKER_FILE, { size: Math.max(1, Math.min(pending.length, os.cpus().length - 1, 4)) })
+    : null;
+
+  try {
+    // Let every partition finish or fail so all successes get checkpointed
+    const results = await Promise.allSettled(pending.map(partition => pool.run({
+      jobId: String(job._id),
+      financialYear: job.financialYear,
+      firstEmployee: String(partition.firstEmployee),
+      lastEmployee: String(partition.lastEmployee),
+      requireProof: job.requireProof,
+      closedBy: String(job.startedBy)
+    }, {
+      timeout: PARTITION_TIMEOUT_MS,
+      onProgress: partitionProgress(job._id, partition.index)
+    }).then(result => FYCloseJob.updateOne(
+      { _id: job._id, partitions: { $elemMatch: { index: partition.index, status: { $ne: 'Done' } } } },
+      {
+        $set: {
+          'partitions.$.status': 'Done',
+          'partitions.$.progress': 100,
+          'partitions.$.verified': result.verified,
+          'partitions.$.rejected': result.rejected,
+          'partitions.$.completedAt': new Date(),
+          lockedUntil: new Date(Date.now() + LEASE_MS)
+        },
+        $inc: { processedEmployees: partition.employeeCount }
+      }
+    ))));
+
+    const failed = results.find(result => result.status === 'rejected');
+    if (failed) throw failed.reason;
+
+    return await FYCloseJob.findOneAndUpdate(
+      { _id: job._id },
+      { $set: { status: 'Completed', completedAt: new Date(), lockedBy: null, lockedUntil: null } },
+      { new: true }
+    );
+  } catch (error) {
+    // Finished partitions stay checkpointed; a restart picks up the rest
+    await FYCloseJob.updateOne(
+      { _id: job._id },
+      { $set: { status: 'Failed', lastError: error.message, lockedBy: null, lockedUntil: null } }
+    );
+    throw error;
+  } finally {
+    if (pool) await pool.close();
+  }
+};
+
+module.exports = {
+  startFYClose,
+  runFYClose
+};
@@ -0,0 +1,148 @@
+// src/jobs/fyCloseWorker.js - Worker thread that closes one partition of a financial year
+const mongoose = require('mongoose');
+const ITDeclaration = require('../models/ITDeclaration');
+const ApprovalQueueItem = require('../models/ApprovalQueueItem');
+const FYSummary = require('../models/FYSummary');
+const { getLimitsVersion } = require('../utils/taxLimits');
+const { applyCaps } = require('../services/taxComputation');
+const { serveTasks } = require('../utils/workerPool');
+
+// Each worker thread has its own module registry and needs its own connection
+let connection = null;
+const connect = () => {
+  if (!connection) {
+    connection = mongoose.connect(process.env.MONGODB_URI || 'mongodb://127.0.0.1:27017/leancircle-hr', {
+      maxPoolSize: 2,
+      serverSelectionTimeoutMS: 5000
+    });
+  }
+  return connection;
+};
+
+// Helper to ignore duplicate summaries left by an earlier, interrupted attempt
+const isOnlyDuplicates = (error) => {
+  const writeErrors = error.writeErrors || (error.result && error.result.writeErrors) || [];
+  return writeErrors.length > 0 && writeErrors.every(writeError => writeError.code === 11000);
+};
+
+serveTasks(async ({ jobId, financialYear, firstEmployee, lastEmployee, requireProof, closedBy }, { progress }) => {
+  await connect();
+
+  const closedAt = new Date();
+  const range = {
+    financialYear,
+    employee: {
+      $gte: new mongoose.Types.ObjectId(firstEmployee),
+      $lte: new mongoose.Types.ObjectId(lastEmployee)
+    }
+  };
+  const open = { ...range, status: { $in: ['Pending', 'Under Review'] } };
+  const verification = {
+    verifiedBy: new mongoose.Types.ObjectId(closedBy),
+    verifiedAt: closedAt
+  };
+
+  // 1. Verify and freeze every declaration in the partition in one round trip
+  const openIds = await ITDeclaration.find(open).distinct('_id');
+
+  await ITDeclaration.bulkWrite([
+    {
+      updateMany: {
+        filter: requireProof ? { ...open, 'documents.0': { $exists: true } } : open,
+        update: {
+          $set: {
+            ...verification,
+            status: 'Completed',
+            verificationComments: 'Verified at financial year close'
+          }
+        }
+      }
+    },
+    {
+      updateMany: {
+        filter: { ...open, 'documents.0': { $exists: false } },
+        update: {
+          $set: {
+            ...verification,
+            status: 'Rejected',
+            verificationComments: 'No proof submitted by financial year close'
+          }
+        }
+      }
+    },
+    {
+      updateMany: {
+        filter: { ...range, fyClosedAt: null },
+        update: { $set: { fyClosedAt: closedAt } }
+      }
+    }
+  ], { ordered: true });
+
+  await ApprovalQueueItem.dequeue('ITDeclaration', openIds);
+  progress(40);
+
+  // 2. Summarize the partition per employee x section x status
+  const rows = await ITDeclaration.aggregate([
+    { $match: range },
+    {
+      $group: {
+        _id: { employee: '$employee', section: '$section', status: '$status' },
+        employeeId: { $first: '$employeeId' },
+        employeeName: { $first: '$employeeName' },
+        amount: { $sum: '$amount' },
+        declarations: { $sum: 1 }
+      }
+    },
+    { $sort: { '_id.employee': 1, '_id.section': 1 } }
+  ]);
+  progress(70);
+
+  const limitsVersion = getLimitsVersion(financialYear);
+  const completedRows = rows
+    .filter(row => row._id.status === 'Completed')
+    .map(row => ({ ...row, _id: { employee: row._id.employee, section: row._id.section } }));
+  const eligibleByEmployee = new Map(
+    applyCaps(completedRows, limitsVersion).map(entry => [String(entry.employee), entry])
+  );
+
+  const summaries = new Map();
+  rows.forEach(row => {
+    const key = String(row._id.employee);
+    if (!summaries.has(key)) {
+      const eligible = eligibleByEmployee.get(key);
+      summaries.set(key, {
+        employee: row._id.employee,
+        employeeId: row.employeeId,
+        employeeName: row.employeeName,
+        financialYear,
+        limitsVersion: limitsVersion.version,
+        sections: eligible ? eligible.sections : {},
+        totalDeclared: eligible ? eligible.totalDeclared : 0,
+        totalEligible: eligible ? eligible.totalEligible : 0,
+        verifiedCount: 0,
+        rejectedCount: 0,
+        closeJob: jobId,
+        closedAt
+      });
+    }
+    const summary = summaries.get(key);
+    if (row._id.status === 'Completed') summary.verifiedCount += row.declarations;
+    if (row._id.status === 'Rejected') summary.rejectedCount += row.declarations;
+  });
+
+  // 3. Write the immutable summaries; existing ones from a previous attempt stay as they are
+  try {
+    await FYSummary.insertMany(Array.from(summaries.values()), { ordered: false });
+  } catch (error) {
+    if (!isOnlyDuplicates(error)) throw error;
+  }
+  progress(100);
+
+  const totals = Array.from(summaries.values()).reduce((acc, summary) => {
+    acc.verified += summary.verifiedCount;
+    acc.rejected += summary.rejectedCount;
+    return acc;
+  }, { verified: 0, rejected: 0 });
+
+  return { employees: summaries.size, ...totals };
+});
@@ -0,0 +1,116 @@
+// src/utils/minHeap.js - Binary min-heap keyed by a numeric priority
+// Entries are { key, priority, ...data }; a key appears at most once, and
+// pushing an existing key moves it to the new priority.
+class MinHeap {
+  constructor() {
+    this.items = [];
+    this.positions = new Map();
+  }
+
+  get size() {
+    return this.items.length;
+  }
+
+  has(key) {
+    return this.positions.has(key);
+  }
+
+  get(key) {
+    const index = this.positions.get(key);
+    return index === undefined ? undefined : this.items[index];
+  }
+
+  peek() {
+    return this.items[0];
+  }
+
+  push(entry) {
+    const existing = this.positions.get(entry.key);
+    if (existing !== undefined) {
+      const previous = this.items[existing].priority;
+      this.items[existing] = entry;
+      if (entry.priority < previous) this._up(existing);
+      else this._down(existing);
+      return;
+    }
+
+    this.items.push(entry);
+    this.positions.set(entry.key, this.items.length - 1);
+    this._up(this.items.length - 1);
+  }
+
+  pop() {
+    if (!this.items.length) return undefined;
+    const top = this.items[0];
+    this._removeAt(0);
+    return top;
+  }
+
+  remove(key) {
+    const index = this.positions.get(key);
+    if (index === undefined) return false;
+    this._removeAt(index);
+    return true;
+  }
+
+  clear() {
+    this.items = [];
+    this.positions.clear();
+  }
+
+  // Pop every entry with priority <= limit
+  popUntil(limit) {
+    const due = [];
+    while (this.items.length && this.items[0].priority <= limit) {
+      due.push(this.pop());
+    }
+    return due;
+  }
+
+  _removeAt(index) {
+    const removed = this.items[index];
+    const last = this.items.pop();
+    this.positions.delete(removed.key);
+
+    if (index < this.items.length) {
+      this.items[index] = last;
+      this.positions.set(last.key, index);
+      this._up(index);
+      this._down(this.positions.get(last.key));
+    }
+  }
+
+  _swap(a, b) {
+    const items = this.items;
+    [items[a], items[b]] = [items[b], items[a]];
+    this.positions.set(items[a].key, a);
+    this.positions.set(items[b].key, b);
+  }
+
+  _up(index) {
+    while (index > 0) {
+      const parent = (index - 1) >> 1;
+      if (this.items[parent].priority <= this.items[index].priority) break;
+      this._swap(parent, index);
+      index = parent;
+    }
+  }
+
+  _down(index) {
+    const length = this.items.length;
+    for (;;) {
+      const left = index * 2 + 1;
+      const right = left + 1;
+      let smallest = index;
+      if (left < length && this.items[left].priority < this.items[smallest].priority) smallest = left;
+      if (right < length && this.items[right].priority < this.items[smallest].priority) smallest = right;
+      if (smallest === index) break;
+      this._swap(index, smallest);
+      index = smallest;
+    }
+  }
+}
+
+module.exports = {
+  MinHeap
+};
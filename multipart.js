@@ -0,0 +1,209 @@
+// src/utils/multipart.js - Streaming multipart/form-data parser
+const { Writable, Readable } = require('stream');
+
+const CRLF = Buffer.from('\r\n');
+const HEADER_END = Buffer.from('\r\n\r\n');
+
+const STATE = {
+  PREAMBLE: 0,
+  AFTER_BOUNDARY: 1,
+  HEADERS: 2,
+  BODY: 3,
+  END: 4
+};
+
+// Helper to pull the boundary out of a Content-Type header
+const getBoundary = (contentType = '') => {
+  const match = /^multipart\/form-data;.*boundary=(?:"([^"]+)"|([^;]+))/i.exec(contentType);
+  return match ? (match[1] || match[2]).trim() : null;
+};
+
+// Helper to parse part headers into { name, filename, mimeType }
+const parsePartHeaders = (raw) => {
+  const headers = {};
+  raw.split('\r\n').forEach(line => {
+    const colon = line.indexOf(':');
+    if (colon > 0) {
+      headers[line.slice(0, colon).trim().toLowerCase()] = line.slice(colon + 1).trim();
+    }
+  });
+
+  const disposition = headers['content-disposition'] || '';
+  const param = (key) => {
+    const match = new RegExp(`(?:^|;)\\s*${key}="((?:[^"\\\\]|\\\\.)*)"`, 'i').exec(disposition)
+      || new RegExp(`(?:^|;)\\s*${key}=([^;]+)`, 'i').exec(disposition);
+    return match ? match[1].replace(/\\(.)/g, '$1') : undefined;
+  };
+
+  return {
+    name: param('name'),
+    filename: param('filename'),
+    mimeType: (headers['content-type'] || 'application/octet-stream').toLowerCase()
+  };
+};
+
+// Writable that splits a multipart body into parts as bytes arrive.
+// File parts are exposed as Readable streams and honour backpressure:
+// the parser stops consuming input while a file consumer is slow.
+//
+// Events: 'field' (name, value), 'file' (name, stream, info), 'error'
+class MultipartParser extends Writable {
+  constructor(boundary, { maxHeaderSize = 16 * 1024, maxFieldSize = 1024 * 1024, maxFiles = 10 } = {}) {
+    super();
+    this.delimiter = Buffer.from(`\r\n--${boundary}`);
+    this.limits = { maxHeaderSize, maxFieldSize, maxFiles };
+
+    // Prime with CRLF so the first boundary matches the same delimiter
+    this.buffer = CRLF;
+    this.state = STATE.PREAMBLE;
+    this.part = null;
+    this.fileCount = 0;
+    this.waiting = null;
+  }
+
+  _write(chunk, encoding, callback) {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+    this._process(callback);
+  }
+
+  _final(callback) {
+    if (this.state !== STATE.END) {
+      const error = new Error('Unexpected end of multipart body');
+      if (this.part && this.part.stream) this.part.stream.destroy(error);
+      return callback(error);
+    }
+    callback();
+  }
+
+  // Called by a file stream when its consumer wants more data
+  _resume() {
+    if (this.waiting) {
+      const callback = this.waiting;
+      this.waiting = null;
+      this._process(callback);
+    }
+  }
+
+  _process(callback) {
+    try {
+      while (true) {
+        if (this.state === STATE.PREAMBLE) {
+          const index = this.buffer.indexOf(this.delimiter);
+          if (index === -1) {
+            // Keep only what could still be the start of a delimiter
+            this.buffer = this.buffer.subarray(Math.max(0, this.buffer.length - this.delimiter.length));
+            return callback();
+          }
+          this.buffer = this.buffer.subarray(index + this.delimiter.length);
+          this.state = STATE.AFTER_BOUNDARY;
+        }
+
+        if (this.state === STATE.AFTER_BOUNDARY) {
+          if (this.buffer.length < 2) return callback();
+          if (this.buffer[0] === 0x2d && this.buffer[1] === 0x2d) {
+            // Closing delimiter, anything after it is epilogue
+            this.state = STATE.END;
+            this.buffer = Buffer.alloc(0);
+            return callback();
+          }
+          const lineEnd = this.buffer.indexOf(CRLF);
+          if (lineEnd === -1) return callback();
+          this.buffer = this.buffer.subarray(lineEnd + CRLF.length);
+          this.state = STATE.HEADERS;
+        }
+
+        if (this.state === STATE.HEADERS) {
+          // Headers of an empty-header part end immediately with CRLF
+          let headerEnd = this.buffer.indexOf(HEADER_END);
+          let skip = HEADER_END.length;
+          if (this.buffer.subarray(0, 2).equals(CRLF)) {
+            headerEnd = 0;
+            skip = CRLF.length;
+          }
+          if (headerEnd === -1) {
+            if (this.buffer.length > this.limits.maxHeaderSize) {
+              throw Object.assign(new Error('Multipart headers too large'), { status: 400 });
+            }
+            return callback();
+          }
+          const info = parsePartHeaders(this.buffer.subarray(0, headerEnd).toString('utf8'));
+          this.buffer = this.buffer.subarray(headerEnd + skip);
+          this._startPart(info);
+          this.state = STATE.BODY;
+        }
+
+        if (this.state === STATE.BODY) {
+          const index = this.buffer.indexOf(this.delimiter);
+          const safeLength = index === -1
+            ? Math.max(0, this.buffer.length - this.delimiter.length + 1)
+            : index;
+
+          if (safeLength > 0) {
+            const data = this.buffer.subarray(0, safeLength);
+            this.buffer = this.buffer.subarray(safeLength);
+            if (!this._partData(data)) {
+              // Consumer is full; continue once it drains
+              this.waiting = callback;
+              return;
+            }
+          }
+
+          if (index === -1) return callback();
+
+          this.buffer = this.buffer.subarray(this.delimiter.length);
+          this._endPart();
+          this.state = STATE.AFTER_BOUNDARY;
+        }
+
+        if (this.state === STATE.END) {
+          this.buffer = Buffer.alloc(0);
+          return callback();
+        }
+      }
+    } catch (error) {
+      if (this.part && this.part.stream) this.part.stream.destroy(error);
+      callback(error);
+    }
+  }
+
+  _startPart(info) {
+    if (info.filename !== undefined) {
+      this.fileCount += 1;
+      if (this.fileCount > this.limits.maxFiles) {
+        throw Object.assign(new Error(`Too many files (max ${this.limits.maxFiles})`), { status: 413 });
+      }
+      const stream = new Readable({ read: () => this._resume() });
+      this.part = { info, stream };
+      this.emit('file', info.name, stream, info);
+    } else {
+      this.part = { info, chunks: [], size: 0 };
+    }
+  }
+
+  // Returns false when the consumer asked us to stop
+  _partData(data) {
+    if (this.part.stream) {
+      return this.part.stream.push(data);
+    }
+    this.part.size += data.length;
+    if (this.part.size > this.limits.maxFieldSize) {
+      throw Object.assign(new Error(`Field ${this.part.info.name} too large`), { status: 413 });
+    }
+    this.part.chunks.push(data);
+    return true;
+  }
+
+  _endPart() {
+    if (this.part.stream) {
+      this.part.stream.push(null);
+    } else {
+      this.emit('field', this.part.info.name, Buffer.concat(this.part.chunks).toString('utf8'));
+    }
+    this.part = null;
+  }
+}
+
+module.exports = {
+  MultipartParser,
+  getBoundary
+};
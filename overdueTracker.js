@@ -0,0 +1,161 @@
+// src/services/overdueTracker.js - In-memory overdue tracking for actions
+// Open actions with a deadline in the next HORIZON_MS sit in a min-heap; one
+// timer fires as the earliest deadline passes, moving the action into the
+// overdue set and emitting 'overdue'. Overdue lists and counts are served
+// from that set. The database is only read through range queries on the
+// deadline index: at start and on a periodic resync that also picks up
+// changes made on other nodes. Local changes apply immediately.
+const { EventEmitter } = require('events');
+const Action = require('../models/Action');
+const { MinHeap } = require('../utils/minHeap');
+
+const HORIZON_MS = 60 * 60 * 1000;
+const RESYNC_INTERVAL_MS = 5 * 60 * 1000;
+
+// setTimeout can't wait longer than this
+const MAX_TIMER_MS = 2 ** 31 - 1;
+
+// Emits 'overdue' with { id, deadlineAt, assignedTo } as a deadline passes
+const events = new EventEmitter();
+
+const upcoming = new MinHeap();
+// id -> { id, deadlineAt, assignedTo }
+let overdue = new Map();
+let timer = null;
+let resyncTimer = null;
+let started = false;
+let ready = false;
+
+const toEntry = (action) => ({
+  id: String(action._id || action.id),
+  deadlineAt: action.deadlineAt ? new Date(action.deadlineAt) : null,
+  assignedTo: action.assignedTo ? String(action.assignedTo) : null
+});
+
+// Arm the timer for the earliest upcoming deadline
+const arm = () => {
+  clearTimeout(timer);
+  timer = null;
+  const next = upcoming.peek();
+  if (!started || !next) return;
+
+  timer = setTimeout(expire, Math.min(Math.max(next.priority - Date.now(), 0), MAX_TIMER_MS));
+  timer.unref();
+};
+
+// Move every passed deadline into the overdue set
+function expire() {
+  timer = null;
+  upcoming.popUntil(Date.now()).forEach(({ entry }) => {
+    overdue.set(entry.id, entry);
+    events.emit('overdue', entry);
+  });
+  arm();
+}
+
+// Apply one action's current deadline
+const track = (action) => {
+  const entry = toEntry(action);
+  upcoming.remove(entry.id);
+  overdue.delete(entry.id);
+
+  if (entry.deadlineAt) {
+    const at = entry.deadlineAt.getTime();
+    if (at <= Date.now()) {
+      overdue.set(entry.id, entry);
+    } else if (at <= Date.now() + HORIZON_MS) {
+      upcoming.push({ key: entry.id, priority: at, entry });
+    }
+  }
+  arm();
+};
+
+// Reload both sets from the deadline index
+const resync = async () => {
+  const now = Date.now();
+  const [late, soon] = await Promise.all([
+    Action.find({ deadlineAt: { $lt: new Date(now) } }).select('deadlineAt assignedTo').lean(),
+    Action.find({ deadlineAt: { $gte: new Date(now), $lte: new Date(now + HORIZON_MS) } })
+      .select('deadlineAt assignedTo')
+      .lean()
+  ]);
+
+  // Anything already reported stays quiet; newly late ones are announced
+  const previous = overdue;
+  overdue = new Map();
+  late.forEach(action => {
+    const entry = toEntry(action);
+    overdue.set(entry.id, entry);
+    if (ready && !previous.has(entry.id)) events.emit('overdue', entry);
+  });
+
+  upcoming.clear();
+  soon.forEach(action => {
+    const entry = toEntry(action);
+    upcoming.push({ key: entry.id, priority: entry.deadlineAt.getTime(), entry });
+  });
+
+  ready = true;
+  arm();
+};
+
+const resyncSafely = () => resync().catch(error => {
+  console.error('Overdue tracker resync error:', error);
+});
+
+// Overdue entries, oldest deadline first, optionally for one assignee
+const list = ({ assignedTo = null, limit = 50, skip = 0 } = {}) => {
+  const entries = [...overdue.values()]
+    .filter(entry => !assignedTo || entry.assignedTo === String(assignedTo))
+    .sort((a, b) => a.deadlineAt - b.deadlineAt);
+  return { total: entries.length, entries: entries.slice(skip, skip + limit) };
+};
+
+// Overdue counts overall and for one assignee
+const counts = (assignedTo = null) => {
+  let mine = 0;
+  if (assignedTo) {
+    overdue.forEach(entry => {
+      if (entry.assignedTo === String(assignedTo)) mine += 1;
+    });
+  }
+  return { total: overdue.size, mine };
+};
+
+// Whether lists and counts can be served from memory yet
+const isReady = () => ready;
+
+// Follow deadline changes saved on this node
+const onDeadline = (action) => track(action);
+
+// Load from the index, then keep in step
+const start = () => {
+  if (started) return;
+  started = true;
+
+  Action.scheduleEvents.on('deadline', onDeadline);
+  resyncSafely();
+  resyncTimer = setInterval(resyncSafely, RESYNC_INTERVAL_MS);
+  resyncTimer.unref();
+};
+
+// Stop tracking; lists and counts fall back to the database
+const stop = () => {
+  started = false;
+  ready = false;
+  Action.scheduleEvents.off('deadline', onDeadline);
+  clearInterval(resyncTimer);
+  clearTimeout(timer);
+  resyncTimer = null;
+  timer = null;
+};
+
+module.exports = {
+  events,
+  list,
+  counts,
+  isReady,
+  resync,
+  start,
+  stop
+};
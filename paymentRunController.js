@@ -0,0 +1,196 @@
+// src/controllers/paymentRunController.js - Reimbursement payment run controller
+const PaymentRun = require('../models/PaymentRun');
+const PaymentBatch = require('../models/PaymentBatch');
+const { startRun, processRun } = require('../services/paymentRuns');
+
+// Helper to drive a run without holding the request open
+const processInBackground = (runId) => {
+  setImmediate(() => {
+    processRun(runId).catch(error => {
+      console.error(`Payment run ${runId} error:`, error);
+    });
+  });
+};
+
+// @desc    Start (or resume by key) a payment run
+// @route   POST /api/reimbursements/payment-runs
+// @access  Private (Admin/HR only)
+const createPaymentRun = async (req, res) => {
+  try {
+    const { runKey, cutoff, batchSize } = req.body;
+
+    const { run, created } = await startRun({
+      runKey,
+      cutoff,
+      batchSize,
+      userId: req.user._id
+    });
+
+    processInBackground(run._id);
+
+    console.log(`Payment run ${run.runKey} ${created ? 'started' : 'resumed'} by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: created ? 'Payment run started' : 'Payment run resumed',
+      data: run
+    });
+
+  } catch (error) {
+    console.error('Create payment run error:', error);
+
+    if (error.status) {
+      return res.status(error.status).json({
+        success: false,
+        message: error.message
+      });
+    }
+
+    if (error.name === 'ValidationError') {
+      const errors = Object.values(error.errors).map(err => err.message);
+      return res.status(400).json({
+        success: false,
+        message: 'Validation Error',
+        errors
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get payment runs
+// @route   GET /api/reimbursements/payment-runs
+// @access  Private (Admin/HR only)
+const getPaymentRuns = async (req, res) => {
+  try {
+    const { page = 1, limit = 10 } = req.query;
+
+    const runs = await PaymentRun.find()
+      .populate('createdBy', 'name')
+      .sort({ createdAt: -1 })
+      .limit(parseInt(limit))
+      .skip((parseInt(page) - 1) * parseInt(limit));
+
+    const total = await PaymentRun.countDocuments();
+
+    res.status(200).json({
+      success: true,
+      data: runs,
+      pagination: {
+        page: parseInt(page),
+        limit: parseInt(limit),
+        total,
+        pages: Math.ceil(total / parseInt(limit))
+      }
+    });
+
+  } catch (error) {
+    console.error('Get payment runs error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get a payment run with its batches
+// @route   GET /api/reimbursements/payment-runs/:id
+// @access  Private (Admin/HR only)
+const getPaymentRun = async (req, res) => {
+  try {
+    const run = await PaymentRun.findById(req.params.id).populate('createdBy', 'name');
+
+    if (!run) {
+      return res.status(404).json({
+        success: false,
+        message: 'Payment run not found'
+      });
+    }
+
+    const batches = await PaymentBatch.find({ run: run._id })
+      .select('-claims')
+      .sort({ sequence: 1 });
+
+    res.status(200).json({
+      success: true,
+      data: {
+        ...run.toJSON(),
+        batches
+      }
+    });
+
+  } catch (error) {
+    console.error('Get payment run error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Payment run not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Resume an interrupted payment run from its last checkpoint
+// @route   POST /api/reimbursements/payment-runs/:id/resume
+// @access  Private (Admin/HR only)
+const resumePaymentRun = async (req, res) => {
+  try {
+    const run = await PaymentRun.findById(req.params.id);
+
+    if (!run) {
+      return res.status(404).json({
+        success: false,
+        message: 'Payment run not found'
+      });
+    }
+
+    if (run.status === 'Completed') {
+      return res.status(409).json({
+        success: false,
+        message: 'Payment run already completed'
+      });
+    }
+
+    processInBackground(run._id);
+
+    console.log(`Payment run ${run.runKey} resumed by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: 'Payment run resumed',
+      data: run
+    });
+
+  } catch (error) {
+    console.error('Resume payment run error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Payment run not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  createPaymentRun,
+  getPaymentRuns,
+  getPaymentRun,
+  resumePaymentRun
+};
@@ -0,0 +1,349 @@
+// src/services/paymentRuns.js - Batched reimbursement payment processor
+const crypto = require('crypto');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { once } = require('events');
+const Reimbursement = require('../models/Reimbursement');
+const Employee = require('../models/Employee');
+const PaymentRun = require('../models/PaymentRun');
+const PaymentBatch = require('../models/PaymentBatch');
+const { toBaseCurrency } = require('../utils/currency');
+
+const PAYMENT_EXPORT_DIR = process.env.PAYMENT_EXPORT_DIR || path.join(__dirname, '../../exports/payments');
+const LEASE_MS = 5 * 60 * 1000;
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+
+const BANK_FILE_COLUMNS = [
+  'paymentReference',
+  'claimId',
+  'employeeId',
+  'employeeName',
+  'accountNumber',
+  'ifscCode',
+  'bankName',
+  'amount',
+  'currency'
+];
+
+// Helper to quote a CSV field when needed
+const csvField = (value) => {
+  const text = value === undefined || value === null ? '' : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+// Helper for the per-claim payment reference within a batch
+const claimReference = (batch, index) => `${batch.reference}-${String(index + 1).padStart(4, '0')}`;
+
+// Helper to build an HTTP-aware error
+const runError = (message, status) => Object.assign(new Error(message), { status });
+
+// Create a run, or resume the unfinished one with the same key. Without a
+// key, a run with an explicit cutoff is keyed by it and one without by the
+// day. Reusing a key with a different cutoff or batch size, or for a run
+// that already completed, is a conflict. Returns { run, created }.
+const startRun = async ({ runKey, cutoff, batchSize, userId }) => {
+  const cutoffDate = cutoff ? new Date(cutoff) : null;
+  if (cutoffDate && Number.isNaN(cutoffDate.getTime())) {
+    throw runError('Invalid cutoff date', 400);
+  }
+
+  const key = runKey || (cutoffDate
+    ? `PAY-${cutoffDate.toISOString()}`
+    : `PAY-${new Date().toISOString().slice(0, 10)}`);
+
+  const result = await PaymentRun.findOneAndUpdate(
+    { runKey: key },
+    {
+      $setOnInsert: {
+        runKey: key,
+        cutoff: cutoffDate || new Date(),
+        batchSize: batchSize || 200,
+        createdBy: userId,
+        startedAt: new Date()
+      }
+    },
+    { upsert: true, new: true, runValidators: true, setDefaultsOnInsert: true, includeResultMetadata: true }
+  );
+  const run = result.value;
+  if (!result.lastErrorObject.updatedExisting) return { run, created: true };
+
+  if ((cutoffDate && run.cutoff.getTime() !== cutoffDate.getTime()) ||
+      (batchSize && run.batchSize !== Number(batchSize))) {
+    throw runError(`Payment run ${key} was started with a different cutoff or batch size`, 409);
+  }
+  if (run.status === 'Completed') {
+    throw runError(`Payment run ${key} has already completed; use a new run key or cutoff`, 409);
+  }
+  return { run, created: false };
+};
+
+// Take (or extend) the lease on a run. Returns null when the run is done
+// or another process holds a live lease.
+const acquireLease = (runId) => {
+  const now = new Date();
+  return PaymentRun.findOneAndUpdate(
+    {
+      _id: runId,
+      status: { $ne: 'Completed' },
+      $or: [
+        { lockedUntil: null },
+        { lockedUntil: { $lt: now } },
+        { lockedBy: WORKER_ID }
+      ]
+    },
+    { $set: { lockedBy: WORKER_ID, lockedUntil: new Date(now.getTime() + LEASE_MS), lastError: null } },
+    { new: true }
+  );
+};
+
+// Helper to give a claim saved before base amounts existed its converted amount
+const withBaseAmount = (claim) => (typeof claim.baseAmount === 'number'
+  ? claim
+  : { ...claim, ...toBaseCurrency(claim.amount, claim.currency, claim.date) });
+
+// Move the claims listed on a batch to Processing under the batch reference.
+// Safe to repeat: claims already taken (by this or another run) are skipped.
+const reserveBatch = async (batch) => {
+  await Reimbursement.updateMany(
+    { _id: { $in: batch.claims }, status: 'Approved', paymentStatus: 'Pending' },
+    { $set: { paymentStatus: 'Processing', paymentBatch: batch.reference } }
+  );
+
+  const rows = await Reimbursement.find({ paymentBatch: batch.reference })
+    .select('amount currency date baseAmount baseCurrency')
+    .sort({ approvedAt: 1 })
+    .lean();
+  const reserved = rows.map(withBaseAmount);
+
+  // Legacy claims get their base amount stored before they are paid
+  const legacy = reserved.filter((claim, index) => claim !== rows[index]);
+  if (legacy.length) {
+    await Reimbursement.bulkWrite(legacy.map(claim => ({
+      updateOne: {
+        filter: { _id: claim._id, baseAmount: { $exists: false } },
+        update: {
+          $set: {
+            baseAmount: claim.baseAmount,
+            baseCurrency: claim.baseCurrency,
+            fxRate: claim.fxRate,
+            fxRateDate: claim.fxRateDate,
+            fxRateVersion: claim.fxRateVersion
+          }
+        }
+      }
+    })), { ordered: false });
+  }
+
+  batch.claims = reserved.map(claim => claim._id);
+  batch.claimCount = reserved.length;
+  batch.amount = Math.round(reserved.reduce((sum, claim) => sum + claim.baseAmount, 0) * 100) / 100;
+  batch.currency = reserved.length ? reserved[0].baseCurrency : undefined;
+  batch.status = 'Reserved';
+  return batch.save();
+};
+
+// Select approved, unpaid claims up to the cutoff into fixed-size batches
+const selectBatches = async (run) => {
+  // A crash may have left a batch created but not reserved
+  const open = await PaymentBatch.find({ run: run._id, status: 'Open' });
+  for (const batch of open) {
+    await reserveBatch(batch);
+  }
+
+  const last = await PaymentBatch.findOne({ run: run._id }).sort({ sequence: -1 }).select('sequence');
+  let sequence = last ? last.sequence : 0;
+
+  while (true) {
+    const claims = await Reimbursement.find({
+      status: 'Approved',
+      paymentStatus: 'Pending',
+      approvedAt: { $lte: run.cutoff }
+    })
+      .sort({ approvedAt: 1 })
+      .limit(run.batchSize)
+      .select('_id')
+      .lean();
+
+    if (!claims.length) break;
+
+    sequence += 1;
+    const batch = await PaymentBatch.create({
+      run: run._id,
+      sequence,
+      reference: `${run.runKey}-${String(sequence).padStart(4, '0')}`,
+      claims: claims.map(claim => claim._id)
+    });
+
+    await reserveBatch(batch);
+    await PaymentRun.updateOne(
+      { _id: run._id },
+      { $set: { batchCount: sequence, lockedUntil: new Date(Date.now() + LEASE_MS) } }
+    );
+  }
+
+  return PaymentRun.findOneAndUpdate(
+    { _id: run._id },
+    { $set: { status: 'Exporting', batchCount: sequence } },
+    { new: true }
+  );
+};
+
+// Stream a batch's bank file to disk, then move it into place atomically
+const exportBatch = async (batch) => {
+  await fs.promises.mkdir(PAYMENT_EXPORT_DIR, { recursive: true });
+
+  const file = path.join(PAYMENT_EXPORT_DIR, `${batch.reference}.csv`);
+  const partial = `${file}.part`;
+  const hash = crypto.createHash('sha256');
+  const out = fs.createWriteStream(partial);
+
+  const write = async (line) => {
+    hash.update(line);
+    if (!out.write(line)) await once(out, 'drain');
+  };
+
+  // One lookup for all bank details in the batch
+  const claims = await Reimbursement.find({ _id: { $in: batch.claims } })
+    .select('employee employeeId employeeName amount currency date baseAmount baseCurrency')
+    .lean()
+    .then(rows => rows.map(withBaseAmount));
+  const employees = await Employee.find({ _id: { $in: claims.map(claim => claim.employee) } })
+    .select('bankDetails')
+    .lean();
+  const bankDetails = new Map(employees.map(employee => [String(employee._id), employee.bankDetails || {}]));
+  const byId = new Map(claims.map(claim => [String(claim._id), claim]));
+
+  await write(`${BANK_FILE_COLUMNS.join(',')}\n`);
+
+  for (const [index, claimId] of batch.claims.entries()) {
+    const claim = byId.get(String(claimId));
+    if (!claim) continue;
+    const bank = bankDetails.get(String(claim.employee)) || {};
+
+    await write(`${[
+      claimReference(batch, index),
+      claim._id,
+      claim.employeeId,
+      claim.employeeName,
+      bank.accountNumber,
+      bank.ifscCode,
+      bank.bankName,
+      claim.baseAmount.toFixed(2),
+      claim.baseCurrency
+    ].map(csvField).join(',')}\n`);
+  }
+
+  out.end();
+  await once(out, 'finish');
+  await fs.promises.rename(partial, file);
+
+  batch.exportFile = path.basename(file);
+  batch.exportChecksum = hash.digest('hex');
+  batch.exportedAt = new Date();
+  batch.status = 'Exported';
+  return batch.save();
+};
+
+// Mark every claim in an exported batch as paid in one bulkWrite
+const settleBatch = async (batch) => {
+  const paidAt = new Date();
+
+  if (batch.claims.length) {
+    await Reimbursement.bulkWrite(batch.claims.map((claimId, index) => ({
+      updateOne: {
+        filter: { _id: claimId, paymentBatch: batch.reference, paymentStatus: 'Processing' },
+        update: {
+          $set: {
+            paymentStatus: 'Paid',
+            paymentDate: paidAt,
+            paymentReference: claimReference(batch, index)
+          }
+        }
+      }
+    })), { ordered: false });
+  }
+
+  batch.status = 'Paid';
+  batch.paidAt = paidAt;
+  return batch.save();
+};
+
+// Export and settle every unfinished batch in sequence order
+const exportAndSettle = async (run) => {
+  const batches = PaymentBatch.find({ run: run._id, status: { $in: ['Reserved', 'Exported'] } })
+    .sort({ sequence: 1 })
+    .cursor();
+
+  for await (const batch of batches) {
+    if (batch.status === 'Reserved') {
+      await exportBatch(batch);
+    }
+    await settleBatch(batch);
+
+    await PaymentRun.updateOne(
+      { _id: run._id },
+      {
+        $inc: { paidBatchCount: 1 },
+        $set: { lockedUntil: new Date(Date.now() + LEASE_MS) }
+      }
+    );
+  }
+
+  // Recompute totals from the batches so they are exact after a resume
+  const [totals] = await PaymentBatch.aggregate([
+    { $match: { run: run._id } },
+    {
+      $group: {
+        _id: null,
+        batchCount: { $sum: 1 },
+        paidBatchCount: { $sum: { $cond: [{ $eq: ['$status', 'Paid'] }, 1, 0] } },
+        claimCount: { $sum: '$claimCount' },
+        totalAmount: { $sum: '$amount' }
+      }
+    }
+  ]);
+
+  return PaymentRun.findOneAndUpdate(
+    { _id: run._id },
+    {
+      $set: {
+        status: 'Completed',
+        completedAt: new Date(),
+        batchCount: totals ? totals.batchCount : 0,
+        paidBatchCount: totals ? totals.paidBatchCount : 0,
+        claimCount: totals ? totals.claimCount : 0,
+        totalAmount: totals ? Math.round(totals.totalAmount * 100) / 100 : 0,
+        lockedBy: null,
+        lockedUntil: null
+      }
+    },
+    { new: true }
+  );
+};
+
+// Drive a run to completion from wherever its checkpoints left off
+const processRun = async (runId) => {
+  let run = await acquireLease(runId);
+  if (!run) return null;
+
+  try {
+    if (run.status === 'Selecting') {
+      run = await selectBatches(run);
+    }
+    return await exportAndSettle(run);
+  } catch (error) {
+    // Keep the checkpoints and release the lease so the run can be resumed
+    await PaymentRun.updateOne(
+      { _id: runId },
+      { $set: { lastError: error.message, lockedBy: null, lockedUntil: null } }
+    );
+    throw error;
+  }
+};
+
+module.exports = {
+  PAYMENT_EXPORT_DIR,
+  startRun,
+  processRun
+};
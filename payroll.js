@@ -0,0 +1,35 @@
+// src/routes/payroll.js - Payroll run and payslip routes
+const express = require('express');
+const {
+  createPayrollRun,
+  getPayrollRuns,
+  getPayrollRun,
+  getRunPayslips,
+  getMyPayslips,
+  createSalaryLock,
+  getSalaryLocks,
+  getSalaryLock,
+  verifySalaryLock
+} = require('../controllers/payrollController');
+const { authenticate, authorize } = require('../middleware/auth');
+
+const router = express.Router();
+
+// All routes require authentication
+router.use(authenticate);
+
+router.get('/payslips/me', getMyPayslips);
+
+// Admin/HR only routes
+router.get('/runs', authorize('Administrator', 'HR Manager'), getPayrollRuns);
+router.post('/runs', authorize('Administrator', 'HR Manager'), createPayrollRun);
+router.get('/runs/:id', authorize('Administrator', 'HR Manager'), getPayrollRun);
+router.get('/runs/:id/payslips', authorize('Administrator', 'HR Manager'), getRunPayslips);
+router.get('/locks', authorize('Administrator', 'HR Manager'), getSalaryLocks);
+router.post('/locks', authorize('Administrator', 'HR Manager'), createSalaryLock);
+router.get('/locks/:period', authorize('Administrator', 'HR Manager'), getSalaryLock);
+
+// Admin only routes
+router.post('/locks/:period/verify', authorize('Administrator'), verifySalaryLock);
+
+module.exports = router;
@@ -0,0 +1,376 @@
+// src/controllers/payrollController.js - Payroll runs and payslips controller
+const Action = require('../models/Action');
+const Employee = require('../models/Employee');
+const PayrollRun = require('../models/PayrollRun');
+const Payslip = require('../models/Payslip');
+const SalaryLock = require('../models/SalaryLock');
+const SalarySnapshot = require('../models/SalarySnapshot');
+const { parsePeriod } = require('../services/payrollEngine');
+const { verifyLock } = require('../services/salaryLock');
+
+const SUMMARY_GROUPS = ['department', 'role'];
+
+// Helper to queue a payroll action for a month (executed by the action scheduler)
+const queuePayrollAction = (type, period, user) => Action.create({
+  type,
+  target: period,
+  description: `${type} for ${period}`,
+  category: 'payroll',
+  priority: 'High',
+  scheduledFor: new Date(),
+  assignedTo: user._id,
+  createdBy: user._id
+});
+
+// @desc    Queue a payroll run for a month (executed by the action scheduler)
+// @route   POST /api/payroll/runs
+// @access  Private (Admin/HR only)
+const createPayrollRun = async (req, res) => {
+  try {
+    const period = parsePeriod(req.body.period);
+    if (!period) {
+      return res.status(400).json({
+        success: false,
+        message: 'Period must be "YYYY-MM" or "Month YYYY"'
+      });
+    }
+
+    const action = await queuePayrollAction('Process Payroll', period, req.user);
+
+    console.log(`Payroll run for ${period} queued by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: 'Payroll run queued',
+      data: action
+    });
+
+  } catch (error) {
+    console.error('Create payroll run error:', error);
+
+    if (error.name === 'ValidationError') {
+      const errors = Object.values(error.errors).map(err => err.message);
+      return res.status(400).json({
+        success: false,
+        message: 'Validation Error',
+        errors
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    List payroll runs, newest first
+// @route   GET /api/payroll/runs
+// @access  Private (Admin/HR only)
+const getPayrollRuns = async (req, res) => {
+  try {
+    const { period, status, page = 1, limit = 20 } = req.query;
+    const query = {};
+    if (period) query.period = parsePeriod(period) || period;
+    if (status) query.status = status;
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const pageNumber = Math.max(parseInt(page) || 1, 1);
+
+    const [runs, total] = await Promise.all([
+      PayrollRun.find(query)
+        .populate('startedBy', 'name')
+        .sort({ createdAt: -1 })
+        .skip((pageNumber - 1) * pageSize)
+        .limit(pageSize),
+      PayrollRun.countDocuments(query)
+    ]);
+
+    res.status(200).json({
+      success: true,
+      data: runs,
+      pagination: {
+        page: pageNumber,
+        limit: pageSize,
+        total,
+        pages: Math.ceil(total / pageSize)
+      }
+    });
+
+  } catch (error) {
+    console.error('Get payroll runs error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get one payroll run
+// @route   GET /api/payroll/runs/:id
+// @access  Private (Admin/HR only)
+const getPayrollRun = async (req, res) => {
+  try {
+    const run = await PayrollRun.findById(req.params.id).populate('startedBy', 'name');
+    if (!run) {
+      return res.status(404).json({
+        success: false,
+        message: 'Payroll run not found'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      data: run
+    });
+
+  } catch (error) {
+    console.error('Get payroll run error:', error);
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Payroll run not found'
+      });
+    }
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    List the payslips of a run
+// @route   GET /api/payroll/runs/:id/payslips
+// @access  Private (Admin/HR only)
+const getRunPayslips = async (req, res) => {
+  try {
+    const { department, page = 1, limit = 50 } = req.query;
+    const query = { run: req.params.id };
+    if (department) query.department = department;
+
+    const pageSize = Math.min(parseInt(limit) || 50, 500);
+    const pageNumber = Math.max(parseInt(page) || 1, 1);
+
+    const [payslips, total] = await Promise.all([
+      Payslip.find(query)
+        .sort({ employee: 1 })
+        .skip((pageNumber - 1) * pageSize)
+        .limit(pageSize)
+        .lean(),
+      Payslip.countDocuments(query)
+    ]);
+
+    res.status(200).json({
+      success: true,
+      data: payslips,
+      pagination: {
+        page: pageNumber,
+        limit: pageSize,
+        total,
+        pages: Math.ceil(total / pageSize)
+      }
+    });
+
+  } catch (error) {
+    console.error('Get run payslips error:', error);
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Payroll run not found'
+      });
+    }
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get the signed-in employee's payslips from completed runs
+// @route   GET /api/payroll/payslips/me
+// @access  Private
+const getMyPayslips = async (req, res) => {
+  try {
+    const employee = await Employee.findOne({ email: req.user.email }).select('_id');
+    if (!employee) {
+      return res.status(404).json({
+        success: false,
+        message: 'No employee record for this user'
+      });
+    }
+
+    const payslips = await Payslip.find({ employee: employee._id })
+      .sort({ period: -1, generatedAt: -1 })
+      .limit(48)
+      .lean();
+
+    // Only the latest completed run of each period counts
+    const completed = new Set((await PayrollRun.find({
+      _id: { $in: [...new Set(payslips.map(payslip => String(payslip.run)))] },
+      status: 'Completed'
+    }).distinct('_id')).map(String));
+    const seen = new Set();
+    const latest = payslips.filter(payslip => {
+      if (!completed.has(String(payslip.run)) || seen.has(payslip.period)) return false;
+      seen.add(payslip.period);
+      return true;
+    });
+
+    res.status(200).json({
+      success: true,
+      data: latest
+    });
+
+  } catch (error) {
+    console.error('Get my payslips error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Queue locking a month's compensation into a snapshot
+// @route   POST /api/payroll/locks
+// @access  Private (Admin/HR only)
+const createSalaryLock = async (req, res) => {
+  try {
+    const period = parsePeriod(req.body.period);
+    if (!period) {
+      return res.status(400).json({
+        success: false,
+        message: 'Period must be "YYYY-MM" or "Month YYYY"'
+      });
+    }
+
+    const existing = await SalaryLock.findOne({ period, status: 'Locked' });
+    if (existing) {
+      return res.status(409).json({
+        success: false,
+        message: `Salaries for ${period} are already locked`,
+        data: existing
+      });
+    }
+
+    const action = await queuePayrollAction('Lock Salary', period, req.user);
+
+    console.log(`Salary lock for ${period} queued by ${req.user.name}`);
+
+    res.status(202).json({
+      success: true,
+      message: 'Salary lock queued',
+      data: action
+    });
+
+  } catch (error) {
+    console.error('Create salary lock error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    List salary locks, newest month first
+// @route   GET /api/payroll/locks
+// @access  Private (Admin/HR only)
+const getSalaryLocks = async (req, res) => {
+  try {
+    const locks = await SalaryLock.find()
+      .populate('createdBy', 'name')
+      .sort({ period: -1 })
+      .limit(Math.min(parseInt(req.query.limit) || 24, 120));
+
+    res.status(200).json({
+      success: true,
+      data: locks
+    });
+
+  } catch (error) {
+    console.error('Get salary locks error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get a locked month with its compensation summary
+// @route   GET /api/payroll/locks/:period
+// @access  Private (Admin/HR only)
+const getSalaryLock = async (req, res) => {
+  try {
+    const period = parsePeriod(req.params.period);
+    const groupBy = req.query.groupBy || 'department';
+    if (!SUMMARY_GROUPS.includes(groupBy)) {
+      return res.status(400).json({
+        success: false,
+        message: `groupBy must be one of: ${SUMMARY_GROUPS.join(', ')}`
+      });
+    }
+
+    const lock = period && await SalaryLock.findOne({ period }).populate('createdBy', 'name');
+    if (!lock) {
+      return res.status(404).json({
+        success: false,
+        message: 'Salary lock not found'
+      });
+    }
+
+    const summary = lock.status === 'Locked' ? await SalarySnapshot.summarize(period, groupBy) : [];
+
+    res.status(200).json({
+      success: true,
+      data: { lock, groupBy, summary }
+    });
+
+  } catch (error) {
+    console.error('Get salary lock error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Check a locked month's snapshot against its checksum
+// @route   POST /api/payroll/locks/:period/verify
+// @access  Private (Admin only)
+const verifySalaryLock = async (req, res) => {
+  try {
+    const period = parsePeriod(req.params.period);
+    if (!period) {
+      return res.status(404).json({
+        success: false,
+        message: 'Salary lock not found'
+      });
+    }
+
+    const result = await verifyLock(period);
+
+    res.status(200).json({
+      success: true,
+      message: result.valid ? 'Snapshot matches its checksum' : 'Snapshot does not match its checksum',
+      data: result
+    });
+
+  } catch (error) {
+    console.error('Verify salary lock error:', error);
+    res.status(error.status || 500).json({
+      success: false,
+      message: error.status ? error.message : 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  createSalaryLock,
+  getSalaryLocks,
+  getSalaryLock,
+  verifySalaryLock,
+  createPayrollRun,
+  getPayrollRuns,
+  getPayrollRun,
+  getRunPayslips,
+  getMyPayslips
+};
@@ -0,0 +1,340 @@
+// src/services/payrollEngine.js - Vectorized monthly payroll computation
+// Compensation is loaded into typed-array columns, one slot per employee;
+// every figure is then computed column-wise in a single pass and the
+// payslips are written with batched insertMany. A month whose salaries are
+// locked is computed from its snapshot, so re-runs are reproducible.
+//
+// Pay structure: `salary` is monthly fixed pay, `incentives` and `bonus` are
+// annual amounts paid in twelfths. Employees with a PF number contribute 12%
+// of basic (half of fixed pay) up to the statutory wage ceiling. Monthly
+// income tax is a twelfth of the annual tax on projected income, less
+// standard deduction, PF and eligible declared tax savings.
+const crypto = require('crypto');
+const Employee = require('../models/Employee');
+const PayrollRun = require('../models/PayrollRun');
+const Payslip = require('../models/Payslip');
+const SalaryLock = require('../models/SalaryLock');
+const SalarySnapshot = require('../models/SalarySnapshot');
+const { computeDeductions, computeIncomeTax } = require('./taxComputation');
+const { getLimitsVersion } = require('../utils/taxLimits');
+
+const PF_RATE = 0.12;
+const BASIC_SHARE = 0.5;
+const PF_WAGE_CEILING = 15000;
+const PROFESSIONAL_TAX = 200;
+const PROFESSIONAL_TAX_THRESHOLD = 15000;
+
+const INSERT_BATCH_SIZE = 5000;
+
+const MONTHS = ['january', 'february', 'march', 'april', 'may', 'june',
+  'july', 'august', 'september', 'october', 'november', 'december'];
+
+const payrollError = (message, status) => Object.assign(new Error(message), { status, permanent: true });
+
+const round2 = (value) => Math.round(value * 100) / 100;
+
+// Helper to normalise "2025-01" or "January 2025" to "2025-01"
+const parsePeriod = (value) => {
+  const text = String(value || '').trim().toLowerCase();
+  let match = /^(\d{4})-(\d{1,2})$/.exec(text);
+  if (match) {
+    const month = parseInt(match[2]);
+    return month >= 1 && month <= 12 ? `${match[1]}-${String(month).padStart(2, '0')}` : null;
+  }
+
+  match = /^([a-z]+)\s+(\d{4})$/.exec(text);
+  if (match) {
+    const month = MONTHS.findIndex(name => name.startsWith(match[1]) && match[1].length >= 3);
+    return month >= 0 ? `${match[2]}-${String(month + 1).padStart(2, '0')}` : null;
+  }
+  return null;
+};
+
+// Helper to get the April-March financial year of a period
+const financialYearOf = (period) => {
+  const [year, month] = period.split('-').map(Number);
+  const start = month >= 4 ? year : year - 1;
+  return `${start}-${start + 1}`;
+};
+
+// Column store for compensation rows, grown by doubling
+const createColumns = (capacity = 1024) => ({
+  length: 0,
+  employee: [],
+  employeeId: [],
+  employeeName: [],
+  department: [],
+  salary: new Float64Array(capacity),
+  incentives: new Float64Array(capacity),
+  bonus: new Float64Array(capacity),
+  providentFund: new Uint8Array(capacity)
+});
+
+const NUMERIC_COLUMNS = ['salary', 'incentives', 'bonus', 'providentFund'];
+
+// Append one row ({ employee, employeeId, employeeName, department, salary,
+// incentives, bonus, providentFund }) to the columns
+const appendRow = (columns, row) => {
+  if (columns.length === columns.salary.length) {
+    NUMERIC_COLUMNS.forEach(name => {
+      const grown = new columns[name].constructor(columns[name].length * 2);
+      grown.set(columns[name]);
+      columns[name] = grown;
+    });
+  }
+
+  const i = columns.length;
+  columns.employee.push(row.employee);
+  columns.employeeId.push(row.employeeId);
+  columns.employeeName.push(row.employeeName);
+  columns.department.push(row.department);
+  columns.salary[i] = row.salary || 0;
+  columns.incentives[i] = row.incentives || 0;
+  columns.bonus[i] = row.bonus || 0;
+  columns.providentFund[i] = row.providentFund ? 1 : 0;
+  columns.length += 1;
+};
+
+// Stream active employees' compensation into columns, in _id order
+const loadLiveCompensation = async () => {
+  const columns = createColumns(Math.max(await Employee.countDocuments({ status: 'Active' }), 1));
+  const cursor = Employee.find({ status: 'Active' })
+    .select('employeeId firstName lastName department salary incentives bonus pfNumber')
+    .sort({ _id: 1 })
+    .lean()
+    .cursor({ batchSize: 5000 });
+
+  for await (const employee of cursor) {
+    appendRow(columns, {
+      employee: employee._id,
+      employeeId: employee.employeeId,
+      employeeName: `${employee.firstName} ${employee.lastName}`,
+      department: employee.department,
+      salary: employee.salary,
+      incentives: employee.incentives,
+      bonus: employee.bonus,
+      providentFund: Boolean(employee.pfNumber)
+    });
+  }
+  return columns;
+};
+
+// Stream a locked month's snapshot into columns, checking its checksum
+const loadSnapshotCompensation = async (lock) => {
+  const columns = createColumns(Math.max(lock.employeeCount, 1));
+  const hash = crypto.createHash('sha256');
+  const cursor = SalarySnapshot.find({ period: lock.period })
+    .sort({ employee: 1 })
+    .lean()
+    .cursor({ batchSize: 5000 });
+
+  for await (const row of cursor) {
+    hash.update(`${SalarySnapshot.checksumLine(row)}\n`);
+    appendRow(columns, row);
+  }
+
+  if (hash.digest('hex') !== lock.checksum || columns.length !== lock.employeeCount) {
+    throw payrollError(`Salary snapshot for ${lock.period} does not match its checksum`, 409);
+  }
+  return columns;
+};
+
+// Compensation for a period: the locked snapshot when there is one
+const loadCompensation = async (period) => {
+  const lock = await SalaryLock.findOne({ period, status: 'Locked' });
+  return lock
+    ? { source: 'snapshot', lock, columns: await loadSnapshotCompensation(lock) }
+    : { source: 'live', lock: null, columns: await loadLiveCompensation() };
+};
+
+// Eligible declared deductions aligned with the columns
+const alignDeductions = (columns, deductions) => {
+  const byEmployee = new Map(deductions.employees.map(entry => [String(entry.employee), entry.totalEligible]));
+  const declared = new Float64Array(columns.length);
+  for (let i = 0; i < columns.length; i++) {
+    declared[i] = byEmployee.get(String(columns.employee[i])) || 0;
+  }
+  return declared;
+};
+
+// Compute every payslip figure column-wise. Pure: the same columns,
+// deductions and limits version always give the same result.
+const computePayroll = (columns, declared, limitsVersion) => {
+  const count = columns.length;
+  const { standardDeduction = 0 } = limitsVersion.incomeTax || {};
+
+  const fixed = columns.salary.subarray(0, count);
+  const variable = new Float64Array(count);
+  const gross = new Float64Array(count);
+  const providentFund = new Float64Array(count);
+  const professionalTax = new Float64Array(count);
+  const annualTaxable = new Float64Array(count);
+
+  for (let i = 0; i < count; i++) {
+    variable[i] = round2((columns.incentives[i] + columns.bonus[i]) / 12);
+    gross[i] = fixed[i] + variable[i];
+
+    const pfWage = Math.min(fixed[i] * BASIC_SHARE, PF_WAGE_CEILING);
+    providentFund[i] = columns.providentFund[i] ? Math.round(pfWage * PF_RATE) : 0;
+    professionalTax[i] = gross[i] > PROFESSIONAL_TAX_THRESHOLD ? PROFESSIONAL_TAX : 0;
+
+    const taxable = gross[i] * 12 - standardDeduction - providentFund[i] * 12 - declared[i];
+    annualTaxable[i] = taxable > 0 ? round2(taxable) : 0;
+  }
+
+  const annualTax = computeIncomeTax(annualTaxable, limitsVersion);
+
+  const incomeTax = new Float64Array(count);
+  const totalDeductions = new Float64Array(count);
+  const net = new Float64Array(count);
+  for (let i = 0; i < count; i++) {
+    incomeTax[i] = Math.round(annualTax[i] / 12);
+    totalDeductions[i] = providentFund[i] + professionalTax[i] + incomeTax[i];
+    net[i] = round2(gross[i] - totalDeductions[i]);
+  }
+
+  return { count, fixed, variable, gross, providentFund, professionalTax, incomeTax, totalDeductions, net, annualTaxable };
+};
+
+// sha256 over every input the computation depends on
+const checksumInputs = (columns, declared, limitsVersion) => {
+  const hash = crypto.createHash('sha256');
+  hash.update(JSON.stringify({ version: limitsVersion.version, incomeTax: limitsVersion.incomeTax }));
+  for (let i = 0; i < columns.length; i++) {
+    hash.update(`\n${columns.employee[i]}|${columns.salary[i]}|${columns.incentives[i]}|` +
+      `${columns.bonus[i]}|${columns.providentFund[i]}|${declared[i]}`);
+  }
+  return hash.digest('hex');
+};
+
+// Payslip documents for rows [start, end)
+const payslipRows = (run, columns, declared, result, start, end, generatedAt) => {
+  const rows = [];
+  for (let i = start; i < end; i++) {
+    rows.push({
+      run: run._id,
+      period: run.period,
+      employee: columns.employee[i],
+      employeeId: columns.employeeId[i],
+      employeeName: columns.employeeName[i],
+      department: columns.department[i],
+      earnings: { fixed: result.fixed[i], variable: result.variable[i], gross: result.gross[i] },
+      deductions: {
+        providentFund: result.providentFund[i],
+        professionalTax: result.professionalTax[i],
+        incomeTax: result.incomeTax[i],
+        total: result.totalDeductions[i]
+      },
+      netPay: result.net[i],
+      declaredDeductions: declared[i],
+      annualTaxable: result.annualTaxable[i],
+      generatedAt
+    });
+  }
+  return rows;
+};
+
+// Column total
+const sum = (column) => {
+  let total = 0;
+  for (let i = 0; i < column.length; i++) total += column[i];
+  return round2(total);
+};
+
+// Fail runs an action left 'Running' and remove their partial payslips. A
+// worker killed by its pool (timeout, out of memory) never reaches the
+// cleanup in runPayroll, so retries and the failing handler call this.
+const abandonRuns = async (actionId, reason = 'Payroll run was interrupted') => {
+  const runs = await PayrollRun.find({ action: actionId, status: 'Running' }).select('_id').lean();
+  if (!runs.length) return 0;
+
+  const ids = runs.map(run => run._id);
+  await Payslip.deleteMany({ run: { $in: ids } });
+  await PayrollRun.updateMany(
+    { _id: { $in: ids }, status: 'Running' },
+    { $set: { status: 'Failed', lastError: reason } }
+  );
+  return ids.length;
+};
+
+// Run payroll for a period: load inputs, compute, write payslips and totals.
+// A failed run removes its partial payslips.
+const runPayroll = async ({ period, userId, actionId, progress = () => {} }) => {
+  const normalized = parsePeriod(period);
+  if (!normalized) {
+    throw payrollError('Payroll period must be "YYYY-MM" or "Month YYYY"', 400);
+  }
+
+  const financialYear = financialYearOf(normalized);
+  const limitsVersion = getLimitsVersion(financialYear);
+  if (!limitsVersion.incomeTax) {
+    throw payrollError(`No income tax rules for ${financialYear}`, 400);
+  }
+
+  // An earlier attempt of this action may have been killed mid-run
+  if (actionId) await abandonRuns(actionId);
+
+  const started = Date.now();
+  const run = await PayrollRun.create({
+    period: normalized,
+    financialYear,
+    limitsVersion: limitsVersion.version,
+    action: actionId,
+    startedBy: userId
+  });
+
+  try {
+    const { source, lock, columns } = await loadCompensation(normalized);
+    await PayrollRun.updateOne({ _id: run._id }, { $set: { inputSource: source, salaryLock: lock && lock._id } });
+    progress(20);
+    const declared = alignDeductions(columns, await computeDeductions(financialYear));
+    progress(30);
+
+    const result = computePayroll(columns, declared, limitsVersion);
+    const inputChecksum = checksumInputs(columns, declared, limitsVersion);
+    progress(50);
+
+    const generatedAt = new Date();
+    for (let start = 0; start < result.count; start += INSERT_BATCH_SIZE) {
+      const end = Math.min(start + INSERT_BATCH_SIZE, result.count);
+      await Payslip.insertMany(payslipRows(run, columns, declared, result, start, end, generatedAt), {
+        ordered: false,
+        lean: true
+      });
+      progress(50 + Math.floor((end / result.count) * 45));
+    }
+
+    const completedAt = new Date();
+    return await PayrollRun.findByIdAndUpdate(run._id, {
+      $set: {
+        status: 'Completed',
+        inputChecksum,
+        employeeCount: result.count,
+        totals: {
+          gross: sum(result.gross),
+          deductions: sum(result.totalDeductions),
+          incomeTax: sum(result.incomeTax),
+          net: sum(result.net)
+        },
+        completedAt,
+        durationMs: completedAt - started
+      }
+    }, { new: true });
+
+  } catch (error) {
+    await Payslip.deleteMany({ run: run._id });
+    await PayrollRun.updateOne({ _id: run._id }, { $set: { status: 'Failed', lastError: error.message } });
+    throw error;
+  }
+};
+
+module.exports = {
+  parsePeriod,
+  financialYearOf,
+  createColumns,
+  appendRow,
+  computePayroll,
+  checksumInputs,
+  abandonRuns,
+  runPayroll
+};
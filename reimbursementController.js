@@ -0,0 +1,691 @@
+// src/controllers/reimbursementController.js - Reimbursement management controller
+const mongoose = require('mongoose');
+const Reimbursement = require('../models/Reimbursement');
+const ReimbursementRollup = require('../models/ReimbursementRollup');
+const ApprovalQueueItem = require('../models/ApprovalQueueItem');
+const Employee = require('../models/Employee');
+const FileBlob = require('../models/FileBlob');
+const { toAttachment } = require('../services/blobStore');
+
+const APPROVER_ROLES = ['Administrator', 'HR Manager', 'Manager'];
+const MAX_BATCH_SIZE = 1000;
+const MAX_EDIT_ATTEMPTS = 3;
+
+// Helper to find the employee record linked to the logged-in user
+const getOwnEmployee = (user) => Employee.findOne({ email: user.email });
+
+// Helper to check whether the logged-in user may see a claim
+const canViewReimbursement = async (user, reimbursement) => {
+  if (APPROVER_ROLES.includes(user.role)) return true;
+  const employee = await getOwnEmployee(user);
+  return Boolean(employee && reimbursement.employee.equals(employee._id));
+};
+
+// @desc    Get reimbursements
+// @route   GET /api/reimbursements
+// @access  Private
+const getReimbursements = async (req, res) => {
+  try {
+    const {
+      page = 1,
+      limit = 10,
+      status,
+      category,
+      employeeId,
+      sortBy = 'createdAt',
+      sortOrder = 'desc'
+    } = req.query;
+
+    // Build query
+    let query = {};
+
+    if (status && status !== 'all') {
+      query.status = status;
+    }
+
+    if (category && category !== 'all') {
+      query.category = category;
+    }
+
+    // Employees only ever see their own claims
+    if (APPROVER_ROLES.includes(req.user.role)) {
+      if (employeeId) query.employeeId = employeeId;
+    } else {
+      const employee = await getOwnEmployee(req.user);
+      if (!employee) {
+        return res.status(200).json({
+          success: true,
+          data: [],
+          pagination: { page: parseInt(page), limit: parseInt(limit), total: 0, pages: 0 }
+        });
+      }
+      query.employee = employee._id;
+    }
+
+    const sort = {};
+    sort[sortBy] = sortOrder === 'desc' ? -1 : 1;
+
+    const reimbursements = await Reimbursement.find(query)
+      .populate('employee', 'firstName lastName employeeId')
+      .sort(sort)
+      .limit(parseInt(limit))
+      .skip((parseInt(page) - 1) * parseInt(limit));
+
+    const total = await Reimbursement.countDocuments(query);
+
+    res.status(200).json({
+      success: true,
+      data: reimbursements,
+      pagination: {
+        page: parseInt(page),
+        limit: parseInt(limit),
+        total,
+        pages: Math.ceil(total / parseInt(limit))
+      }
+    });
+
+  } catch (error) {
+    console.error('Get reimbursements error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get single reimbursement
+// @route   GET /api/reimbursements/:id
+// @access  Private
+const getReimbursement = async (req, res) => {
+  try {
+    const reimbursement = await Reimbursement.findById(req.params.id)
+      .populate('employee', 'firstName lastName employeeId department');
+
+    if (!reimbursement || !(await canViewReimbursement(req.user, reimbursement))) {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      data: reimbursement
+    });
+
+  } catch (error) {
+    console.error('Get reimbursement error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Submit new reimbursement
+// @route   POST /api/reimbursements
+// @access  Private
+const createReimbursement = async (req, res) => {
+  try {
+    // Approvers may file on behalf of an employee, everyone else files for themselves
+    const employee = APPROVER_ROLES.includes(req.user.role) && req.body.employee
+      ? await Employee.findById(req.body.employee)
+      : await getOwnEmployee(req.user);
+
+    if (!employee) {
+      return res.status(400).json({
+        success: false,
+        message: 'No employee record found for this reimbursement'
+      });
+    }
+
+    const { category, amount, currency, date, description, invoices } = req.body;
+
+    const reimbursement = await Reimbursement.create({
+      employee: employee._id,
+      employeeId: employee.employeeId,
+      employeeName: employee.name,
+      department: employee.department,
+      category,
+      amount,
+      currency,
+      date,
+      description,
+      invoices,
+      submittedBy: req.user._id,
+      createdBy: req.user._id
+    });
+
+    console.log(`Reimbursement submitted: ${reimbursement._id} for ${employee.name} by ${req.user.name}`);
+
+    res.status(201).json({
+      success: true,
+      message: 'Reimbursement submitted successfully',
+      data: reimbursement
+    });
+
+  } catch (error) {
+    console.error('Create reimbursement error:', error);
+
+    if (error.name === 'ValidationError') {
+      const errors = Object.values(error.errors).map(err => err.message);
+      return res.status(400).json({
+        success: false,
+        message: 'Validation Error',
+        errors
+      });
+    }
+
+    if (error.name === 'CastError') {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid employee reference'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Update a pending reimbursement
+// @route   PUT /api/reimbursements/:id
+// @access  Private
+const updateReimbursement = async (req, res) => {
+  try {
+    // Only the editable claim fields, never status or approval data
+    const updates = {};
+    ['category', 'amount', 'currency', 'date', 'description', 'invoices'].forEach(field => {
+      if (req.body[field] !== undefined) updates[field] = req.body[field];
+    });
+
+    let before = null;
+    let normalized;
+    for (let attempt = 0; !before && attempt < MAX_EDIT_ATTEMPTS; attempt++) {
+      const existing = await Reimbursement.findById(req.params.id);
+
+      if (!existing || !(await canViewReimbursement(req.user, existing))) {
+        return res.status(404).json({
+          success: false,
+          message: 'Reimbursement not found'
+        });
+      }
+
+      if (existing.status !== 'Pending') {
+        return res.status(409).json({
+          success: false,
+          message: 'Only pending reimbursements can be edited'
+        });
+      }
+
+      // Keep the stored base-currency amount in step with the edit. The
+      // filter pins the fields it was computed from, so a concurrent edit
+      // to them makes this attempt miss and start over from a fresh read.
+      normalized = Reimbursement.normalizeUpdate(existing.toObject(), updates);
+      const filter = { _id: existing._id, status: 'Pending' };
+      if (normalized !== updates) {
+        filter.amount = existing.amount;
+        filter.currency = existing.currency ?? null;
+        filter.date = existing.date ?? null;
+      }
+
+      // Take the pre-image atomically so the rollup delta matches what was replaced
+      before = await Reimbursement.findOneAndUpdate(filter, normalized, { new: false, runValidators: true });
+    }
+
+    if (!before) {
+      return res.status(409).json({
+        success: false,
+        message: 'Reimbursement was changed by another request, please retry'
+      });
+    }
+
+    await ReimbursementRollup.recordEdit(before, { ...before.toObject(), ...normalized }).catch(error => {
+      console.error('Reimbursement rollup sync error:', error);
+    });
+
+    const reimbursement = await Reimbursement.findById(req.params.id);
+
+    // Deleted between the update and this read
+    if (!reimbursement) {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    if (reimbursement.status === 'Pending') {
+      await ApprovalQueueItem.enqueue([reimbursement.toQueueEntry()]).catch(error => {
+        console.error('Approval queue sync error:', error);
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      message: 'Reimbursement updated successfully',
+      data: reimbursement
+    });
+
+  } catch (error) {
+    console.error('Update reimbursement error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    if (error.name === 'ValidationError') {
+      const errors = Object.values(error.errors).map(err => err.message);
+      return res.status(400).json({
+        success: false,
+        message: 'Validation Error',
+        errors
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Delete a pending reimbursement
+// @route   DELETE /api/reimbursements/:id
+// @access  Private
+const deleteReimbursement = async (req, res) => {
+  try {
+    const existing = await Reimbursement.findById(req.params.id);
+
+    if (!existing || !(await canViewReimbursement(req.user, existing))) {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    const reimbursement = await Reimbursement.findOneAndDelete({ _id: req.params.id, status: 'Pending' });
+
+    if (!reimbursement) {
+      return res.status(409).json({
+        success: false,
+        message: 'Only pending reimbursements can be deleted'
+      });
+    }
+
+    await FileBlob.releaseReferences(
+      reimbursement.attachments.map(attachment => attachment.digest).filter(Boolean)
+    );
+
+    console.log(`Reimbursement deleted: ${reimbursement._id} by ${req.user.name}`);
+
+    res.status(200).json({
+      success: true,
+      message: 'Reimbursement deleted successfully'
+    });
+
+  } catch (error) {
+    console.error('Delete reimbursement error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Attach receipts to a pending reimbursement
+// @route   POST /api/reimbursements/:id/attachments
+// @access  Private
+const addAttachments = async (req, res) => {
+  try {
+    const existing = await Reimbursement.findById(req.params.id);
+
+    if (!existing || !(await canViewReimbursement(req.user, existing))) {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    const attachments = req.files.map(toAttachment);
+
+    const reimbursement = await Reimbursement.findOneAndUpdate(
+      { _id: req.params.id, status: 'Pending' },
+      { $push: { attachments: { $each: attachments } } },
+      { new: true }
+    );
+
+    if (!reimbursement) {
+      return res.status(409).json({
+        success: false,
+        message: 'Attachments can only be added to pending reimbursements'
+      });
+    }
+
+    await FileBlob.addReferences(req.files);
+
+    res.status(201).json({
+      success: true,
+      message: `${attachments.length} attachment(s) added`,
+      data: reimbursement.attachments,
+      deduplicated: req.files.filter(file => file.deduplicated).length
+    });
+
+  } catch (error) {
+    console.error('Add attachments error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Remove a receipt from a pending reimbursement
+// @route   DELETE /api/reimbursements/:id/attachments/:attachmentId
+// @access  Private
+const removeAttachment = async (req, res) => {
+  try {
+    const existing = await Reimbursement.findById(req.params.id);
+
+    if (!existing || !(await canViewReimbursement(req.user, existing))) {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    const before = await Reimbursement.findOneAndUpdate(
+      { _id: req.params.id, status: 'Pending', 'attachments._id': req.params.attachmentId },
+      { $pull: { attachments: { _id: req.params.attachmentId } } },
+      { new: false }
+    );
+
+    if (!before) {
+      return res.status(404).json({
+        success: false,
+        message: 'Attachment not found on a pending reimbursement'
+      });
+    }
+
+    const removed = before.attachments.id(req.params.attachmentId);
+    if (removed && removed.digest) {
+      await FileBlob.releaseReferences([removed.digest]);
+    }
+
+    res.status(200).json({
+      success: true,
+      message: 'Attachment removed successfully'
+    });
+
+  } catch (error) {
+    console.error('Remove attachment error:', error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Attachment not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// Shared handler for single approve/decline
+const decideReimbursement = (action) => async (req, res) => {
+  try {
+    const reimbursement = await Reimbursement.decide(
+      req.params.id,
+      action,
+      req.user._id,
+      req.user.name,
+      req.body.comments
+    );
+
+    if (!reimbursement) {
+      // Either it does not exist or somebody else already acted on it
+      const exists = await Reimbursement.exists({ _id: req.params.id });
+      return res.status(exists ? 409 : 404).json({
+        success: false,
+        message: exists
+          ? 'Reimbursement is no longer pending'
+          : 'Reimbursement not found'
+      });
+    }
+
+    console.log(`Reimbursement ${action.toLowerCase()}: ${reimbursement._id} by ${req.user.name}`);
+
+    res.status(200).json({
+      success: true,
+      message: `Reimbursement ${action.toLowerCase()} successfully`,
+      data: reimbursement
+    });
+
+  } catch (error) {
+    console.error(`${action} reimbursement error:`, error);
+
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Reimbursement not found'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Approve reimbursement
+// @route   PATCH /api/reimbursements/:id/approve
+// @access  Private (Admin/HR/Manager)
+const approveReimbursement = decideReimbursement('Approved');
+
+// @desc    Decline reimbursement
+// @route   PATCH /api/reimbursements/:id/decline
+// @access  Private (Admin/HR/Manager)
+const declineReimbursement = decideReimbursement('Declined');
+
+// @desc    Approve or decline many reimbursements at once
+// @route   POST /api/reimbursements/batch-decision
+// @access  Private (Admin/HR/Manager)
+const batchDecision = async (req, res) => {
+  try {
+    const { action, items, ids, comments = '' } = req.body;
+
+    if (!['Approved', 'Declined'].includes(action)) {
+      return res.status(400).json({
+        success: false,
+        message: 'Action must be either Approved or Declined'
+      });
+    }
+
+    // Accept either per-claim items or a flat list of ids sharing one comment
+    const decisions = Array.isArray(items)
+      ? items
+      : (Array.isArray(ids) ? ids.map(id => ({ id, comments })) : []);
+
+    if (!decisions.length) {
+      return res.status(400).json({
+        success: false,
+        message: 'Please provide reimbursements to process'
+      });
+    }
+
+    if (decisions.length > MAX_BATCH_SIZE) {
+      return res.status(400).json({
+        success: false,
+        message: `A batch cannot contain more than ${MAX_BATCH_SIZE} reimbursements`
+      });
+    }
+
+    if (decisions.some(item => !item || typeof item !== 'object' || !mongoose.isValidObjectId(item.id))) {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid reimbursement id in batch'
+      });
+    }
+
+    const result = await Reimbursement.decideMany(decisions, action, req.user._id, req.user.name);
+
+    console.log(`Batch ${action.toLowerCase()}: ${result.modified}/${result.requested} reimbursements by ${req.user.name}`);
+
+    res.status(200).json({
+      success: true,
+      message: `${result.modified} reimbursements ${action.toLowerCase()}`,
+      data: {
+        ...result,
+        skipped: result.requested - result.modified
+      }
+    });
+
+  } catch (error) {
+    console.error('Batch decision error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get spend analytics from monthly rollups
+// @route   GET /api/reimbursements/analytics
+// @access  Private (Admin/HR/Manager)
+const getSpendAnalytics = async (req, res) => {
+  try {
+    const {
+      from,
+      to,
+      groupBy = 'month',
+      status = 'Approved',
+      category,
+      department,
+      employee
+    } = req.query;
+
+    const dimensions = groupBy.split(',').map(d => d.trim()).filter(Boolean);
+    const allowedDimensions = ['month', 'category', 'employee', 'department'];
+
+    if (!dimensions.length || dimensions.some(d => !allowedDimensions.includes(d))) {
+      return res.status(400).json({
+        success: false,
+        message: `groupBy must be a combination of: ${allowedDimensions.join(', ')}`
+      });
+    }
+
+    if (status !== 'all' && !ReimbursementRollup.STATUSES.includes(status)) {
+      return res.status(400).json({
+        success: false,
+        message: `Status must be one of: all, ${ReimbursementRollup.STATUSES.join(', ')}`
+      });
+    }
+
+    // Default to year-to-date
+    const currentYear = new Date().getFullYear();
+    const filters = {};
+    if (category) filters.category = category;
+    if (department) filters.department = department;
+    if (employee) filters.employee = new mongoose.Types.ObjectId(employee);
+
+    const data = await ReimbursementRollup.getSpend({
+      from: from || `${currentYear}-01`,
+      to: to || new Date().toISOString().slice(0, 7),
+      groupBy: dimensions,
+      status,
+      filters
+    });
+
+    res.status(200).json({
+      success: true,
+      data,
+      count: data.length
+    });
+
+  } catch (error) {
+    console.error('Get spend analytics error:', error);
+
+    if (error.name === 'BSONError') {
+      return res.status(400).json({
+        success: false,
+        message: 'Invalid employee reference'
+      });
+    }
+
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Rebuild monthly rollups from all claims
+// @route   POST /api/reimbursements/analytics/rebuild
+// @access  Private (Admin only)
+const rebuildSpendAnalytics = async (req, res) => {
+  try {
+    const result = await ReimbursementRollup.rebuild();
+
+    console.log(`Reimbursement rollups rebuilt by ${req.user.name}, ${result.removed} stale buckets removed`);
+
+    res.status(200).json({
+      success: true,
+      message: 'Reimbursement rollups rebuilt successfully',
+      data: result
+    });
+
+  } catch (error) {
+    console.error('Rebuild spend analytics error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  getReimbursements,
+  getReimbursement,
+  createReimbursement,
+  updateReimbursement,
+  deleteReimbursement,
+  approveReimbursement,
+  declineReimbursement,
+  batchDecision,
+  addAttachments,
+  removeAttachment,
+  getSpendAnalytics,
+  rebuildSpendAnalytics
+};
@@ -1,26 +1,55 @@
 // src/routes/reimbursements.js - Reimbursement management routes
 const express = require('express');
+const {
+  getReimbursements,
+  getReimbursement,
+  createReimbursement,
+  updateReimbursement,
+  deleteReimbursement,
+  approveReimbursement,
+  declineReimbursement,
+  batchDecision,
+  addAttachments,
+  removeAttachment,
+  getSpendAnalytics,
+  rebuildSpendAnalytics
+} = require('../controllers/reimbursementController');
+const {
+  createPaymentRun,
+  getPaymentRuns,
+  getPaymentRun,
+  resumePaymentRun
+} = require('../controllers/paymentRunController');
 const { authenticate, authorize } = require('../middleware/auth');
+const { receiveFiles } = require('../middleware/upload');
 
 const router = express.Router();
 
 // All routes require authentication
 router.use(authenticate);
 
-// Placeholder routes - implement controllers as needed
-router.get('/', (req, res) => {
-  res.status(200).json({
-    success: true,
-    message: 'Reimbursement routes not implemented yet',
-    data: []
-  });
-});
+// Analytics routes
+router.get('/analytics', authorize('Administrator', 'HR Manager', 'Manager'), getSpendAnalytics);
+router.post('/analytics/rebuild', authorize('Administrator'), rebuildSpendAnalytics);
 
-router.post('/', (req, res) => {
-  res.status(201).json({
-    success: true,
-    message: 'Reimbursement creation not implemented yet'
-  });
-});
+// Payment run routes (Admin/HR only)
+router.get('/payment-runs', authorize('Administrator', 'HR Manager'), getPaymentRuns);
+router.post('/payment-runs', authorize('Administrator', 'HR Manager'), createPaymentRun);
+router.get('/payment-runs/:id', authorize('Administrator', 'HR Manager'), getPaymentRun);
+router.post('/payment-runs/:id/resume', authorize('Administrator', 'HR Manager'), resumePaymentRun);
+
+// Approver routes
+router.post('/batch-decision', authorize('Administrator', 'HR Manager', 'Manager'), batchDecision);
+router.patch('/:id/approve', authorize('Administrator', 'HR Manager', 'Manager'), approveReimbursement);
+router.patch('/:id/decline', authorize('Administrator', 'HR Manager', 'Manager'), declineReimbursement);
+
+// Claim routes (employees see and manage only their own claims)
+router.get('/', getReimbursements);
+router.get('/:id', getReimbursement);
+router.post('/', createReimbursement);
+router.put('/:id', updateReimbursement);
+router.delete('/:id', deleteReimbursement);
+router.post('/:id/attachments', receiveFiles(), addAttachments);
+router.delete('/:id/attachments/:attachmentId', removeAttachment);
 
 module.exports = router;
@@ -0,0 +1,166 @@
+// src/controllers/reportController.js - Report definitions, requests and cached results
+const Action = require('../models/Action');
+const Report = require('../models/Report');
+const { listDefinitions } = require('../services/reportDefinitions');
+const { resolveRequest, findOrCreateReport, restartReport } = require('../services/reportEngine');
+
+const DOCUMENT_FIELDS = 'name type size formattedSize mimetype category createdAt';
+
+// @desc    List the available report definitions
+// @route   GET /api/reports/definitions
+// @access  Private (Admin/HR only)
+const getReportDefinitions = async (req, res) => {
+  res.status(200).json({
+    success: true,
+    data: listDefinitions()
+  });
+};
+
+// @desc    Request a report; a cached file for unchanged data returns at once,
+//          otherwise generation is queued (executed by the action scheduler)
+// @route   POST /api/reports
+// @access  Private (Admin/HR only)
+const requestReport = async (req, res) => {
+  try {
+    const { definition: name, params, format = 'csv' } = req.body;
+    const { definition } = resolveRequest(name, params, format);
+
+    let { report, queue } = await findOrCreateReport({ name, params, format, userId: req.user._id });
+
+    if (report.status === 'Ready') {
+      await report.populate('document', DOCUMENT_FIELDS);
+      return res.status(200).json({
+        success: true,
+        message: 'Report ready (cached)',
+        cached: true,
+        data: report
+      });
+    }
+
+    // A failed report, or one whose action died without updating it, starts over
+    if (!queue) {
+      const action = await Action.findById(report.action).select('status');
+      if (report.status === 'Failed' || !action || ['Failed', 'Cancelled'].includes(action.status)) {
+        const restarted = await restartReport(report);
+        if (restarted) ({ report, queue } = restarted);
+      }
+    }
+
+    if (queue) {
+      await Action.create({
+        _id: queue,
+        type: 'Generate Report',
+        target: String(report._id),
+        description: `Generate ${definition.title} report (${report.format})`,
+        category: 'reports',
+        priority: 'Medium',
+        scheduledFor: new Date(),
+        assignedTo: req.user._id,
+        createdBy: req.user._id
+      });
+
+      console.log(`Report ${definition.name} queued by ${req.user.name}`);
+    }
+
+    res.status(202).json({
+      success: true,
+      message: queue ? 'Report queued' : 'Report is being generated',
+      cached: false,
+      data: report
+    });
+
+  } catch (error) {
+    console.error('Request report error:', error);
+    res.status(error.status || 500).json({
+      success: false,
+      message: error.status ? error.message : 'Server error'
+    });
+  }
+};
+
+// @desc    List generated reports, newest first
+// @route   GET /api/reports
+// @access  Private (Admin/HR only)
+const getReports = async (req, res) => {
+  try {
+    const { definition, status, page = 1, limit = 20 } = req.query;
+    const query = {};
+    if (definition) query.definition = definition;
+    if (status) query.status = status;
+
+    const pageSize = Math.min(parseInt(limit) || 20, 100);
+    const pageNumber = Math.max(parseInt(page) || 1, 1);
+
+    const [reports, total] = await Promise.all([
+      Report.find(query)
+        .populate('document', DOCUMENT_FIELDS)
+        .populate('requestedBy', 'name')
+        .sort({ createdAt: -1 })
+        .skip((pageNumber - 1) * pageSize)
+        .limit(pageSize),
+      Report.countDocuments(query)
+    ]);
+
+    res.status(200).json({
+      success: true,
+      data: reports,
+      pagination: {
+        page: pageNumber,
+        limit: pageSize,
+        total,
+        pages: Math.ceil(total / pageSize)
+      }
+    });
+
+  } catch (error) {
+    console.error('Get reports error:', error);
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+// @desc    Get one report with its file and generation progress
+// @route   GET /api/reports/:id
+// @access  Private (Admin/HR only)
+const getReport = async (req, res) => {
+  try {
+    const report = await Report.findById(req.params.id)
+      .populate('document', DOCUMENT_FIELDS)
+      .populate('action', 'status progress result')
+      .populate('requestedBy', 'name');
+
+    if (!report) {
+      return res.status(404).json({
+        success: false,
+        message: 'Report not found'
+      });
+    }
+
+    res.status(200).json({
+      success: true,
+      data: report
+    });
+
+  } catch (error) {
+    console.error('Get report error:', error);
+    if (error.name === 'CastError') {
+      return res.status(404).json({
+        success: false,
+        message: 'Report not found'
+      });
+    }
+    res.status(500).json({
+      success: false,
+      message: 'Server error'
+    });
+  }
+};
+
+module.exports = {
+  getReportDefinitions,
+  requestReport,
+  getReports,
+  getReport
+};
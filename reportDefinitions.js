@@ -0,0 +1,255 @@
+// src/services/reportDefinitions.js - Named report definitions, run as aggregation pipelines
+// A definition is { name, title, description, version, model, params,
+// match, stages, columns }:
+// - params(raw) validates and normalizes request parameters (keys in a fixed
+//   order, so equal requests serialize identically for the cache key)
+// - match(params) selects the source documents; the same filter scopes the
+//   data-version fingerprint
+// - stages(params) aggregates the matched documents into report rows
+// - columns(params) lists the output columns as { key, header }
+// Bump `version` when a definition's output changes so cached files expire.
+const Employee = require('../models/Employee');
+const Reimbursement = require('../models/Reimbursement');
+const ITDeclaration = require('../models/ITDeclaration');
+const { parsePeriod } = require('./payrollEngine');
+
+const definitions = new Map();
+
+const paramError = (message) => Object.assign(new Error(message), { status: 400, permanent: true });
+
+// Register a report definition (replaces any earlier one)
+const registerDefinition = (definition) => {
+  definitions.set(definition.name, definition);
+};
+
+// Get a report definition by name, or undefined
+const getDefinition = (name) => definitions.get(name);
+
+// Public description of every definition
+const listDefinitions = () => [...definitions.values()].map(definition => ({
+  name: definition.name,
+  title: definition.title,
+  description: definition.description,
+  params: definition.paramsHelp
+}));
+
+// Helper to get the first instant of a "YYYY-MM" period (UTC)
+const monthStart = (period, offset = 0) => {
+  const [year, month] = period.split('-').map(Number);
+  return new Date(Date.UTC(year, month - 1 + offset, 1));
+};
+
+// Helper to count documents whose field has a value
+const countWhere = (field, value) => ({ $sum: { $cond: [{ $eq: [`$${field}`, value] }, 1, 0] } });
+
+// Helper to total an amount over documents whose field has a value
+const sumWhere = (field, value, amount) => ({ $sum: { $cond: [{ $eq: [`$${field}`, value] }, amount, 0] } });
+
+const round2 = (field) => ({ $round: [`$${field}`, 2] });
+
+// Headcount by department, role or position, with a status breakdown and
+// the pay bill of active employees
+const HEADCOUNT_GROUPS = { department: 'Department', role: 'Role', position: 'Position' };
+
+registerDefinition({
+  name: 'headcount',
+  title: 'Headcount',
+  description: 'Employees by department, role or position with status breakdown and active pay bill',
+  version: 1,
+  model: Employee,
+  paramsHelp: {
+    groupBy: Object.keys(HEADCOUNT_GROUPS).join(' | '),
+    period: 'YYYY-MM (optional): only employees who joined by the end of the month'
+  },
+  params: (raw = {}) => {
+    const groupBy = raw.groupBy || 'department';
+    if (!HEADCOUNT_GROUPS[groupBy]) {
+      throw paramError(`groupBy must be one of: ${Object.keys(HEADCOUNT_GROUPS).join(', ')}`);
+    }
+    const period = raw.period ? parsePeriod(raw.period) : null;
+    if (raw.period && !period) {
+      throw paramError('Period must be "YYYY-MM" or "Month YYYY"');
+    }
+    return { groupBy, period };
+  },
+  match: ({ period }) => (period ? { joinDate: { $lt: monthStart(period, 1) } } : {}),
+  stages: ({ groupBy }) => {
+    const active = { $eq: ['$status', 'Active'] };
+    return [
+      {
+        $group: {
+          _id: `$${groupBy}`,
+          total: { $sum: 1 },
+          active: countWhere('status', 'Active'),
+          inactive: countWhere('status', 'Inactive'),
+          suspended: countWhere('status', 'Suspended'),
+          pending: countWhere('status', 'Pending'),
+          monthlySalary: { $sum: { $cond: [active, { $ifNull: ['$salary', 0] }, 0] } },
+          annualCtc: { $sum: { $cond: [active, { $ifNull: ['$ctc', 0] }, 0] } }
+        }
+      },
+      { $addFields: { group: { $ifNull: ['$_id', 'Unassigned'] } } },
+      { $sort: { group: 1 } },
+      {
+        $project: {
+          _id: 0,
+          group: 1,
+          total: 1,
+          active: 1,
+          inactive: 1,
+          suspended: 1,
+          pending: 1,
+          monthlySalary: round2('monthlySalary'),
+          annualCtc: round2('annualCtc')
+        }
+      }
+    ];
+  },
+  columns: ({ groupBy }) => [
+    { key: 'group', header: HEADCOUNT_GROUPS[groupBy] },
+    { key: 'total', header: 'Headcount' },
+    { key: 'active', header: 'Active' },
+    { key: 'inactive', header: 'Inactive' },
+    { key: 'suspended', header: 'Suspended' },
+    { key: 'pending', header: 'Pending' },
+    { key: 'monthlySalary', header: 'Monthly Salary (Active)' },
+    { key: 'annualCtc', header: 'Annual CTC (Active)' }
+  ]
+});
+
+// Reimbursement claims by category over a range of expense months, amounts
+// in the base currency
+registerDefinition({
+  name: 'reimbursements-by-category',
+  title: 'Reimbursements by Category',
+  description: 'Claims and base-currency amounts per category and status for a range of expense months',
+  version: 1,
+  model: Reimbursement,
+  paramsHelp: {
+    from: 'YYYY-MM',
+    to: 'YYYY-MM (optional, defaults to from)'
+  },
+  params: (raw = {}) => {
+    const from = parsePeriod(raw.from || raw.period);
+    const to = raw.to ? parsePeriod(raw.to) : from;
+    if (!from || !to) {
+      throw paramError('from and to must be "YYYY-MM" or "Month YYYY"');
+    }
+    if (to < from) {
+      throw paramError('to must not be before from');
+    }
+    return { from, to };
+  },
+  match: ({ from, to }) => ({ date: { $gte: monthStart(from), $lt: monthStart(to, 1) } }),
+  stages: () => {
+    const amount = { $ifNull: ['$baseAmount', '$amount'] };
+    return [
+      {
+        $group: {
+          _id: '$category',
+          claims: { $sum: 1 },
+          pending: countWhere('status', 'Pending'),
+          processing: countWhere('status', 'Processing'),
+          approved: countWhere('status', 'Approved'),
+          declined: countWhere('status', 'Declined'),
+          totalAmount: { $sum: amount },
+          approvedAmount: sumWhere('status', 'Approved', amount),
+          paidAmount: sumWhere('paymentStatus', 'Paid', amount)
+        }
+      },
+      { $sort: { _id: 1 } },
+      {
+        $project: {
+          _id: 0,
+          category: '$_id',
+          claims: 1,
+          pending: 1,
+          processing: 1,
+          approved: 1,
+          declined: 1,
+          totalAmount: round2('totalAmount'),
+          approvedAmount: round2('approvedAmount'),
+          paidAmount: round2('paidAmount')
+        }
+      }
+    ];
+  },
+  columns: () => [
+    { key: 'category', header: 'Category' },
+    { key: 'claims', header: 'Claims' },
+    { key: 'pending', header: 'Pending' },
+    { key: 'processing', header: 'Processing' },
+    { key: 'approved', header: 'Approved' },
+    { key: 'declined', header: 'Declined' },
+    { key: 'totalAmount', header: 'Total Amount' },
+    { key: 'approvedAmount', header: 'Approved Amount' },
+    { key: 'paidAmount', header: 'Paid Amount' }
+  ]
+});
+
+// IT declaration status per section for one financial year
+registerDefinition({
+  name: 'declaration-status',
+  title: 'Declaration Status',
+  description: 'IT declarations per section and status for a financial year',
+  version: 1,
+  model: ITDeclaration,
+  paramsHelp: {
+    financialYear: 'YYYY-YYYY'
+  },
+  params: (raw = {}) => {
+    const match = /^(\d{4})-(\d{4})$/.exec(String(raw.financialYear || '').trim());
+    if (!match || Number(match[2]) !== Number(match[1]) + 1) {
+      throw paramError('financialYear must be in format YYYY-YYYY');
+    }
+    return { financialYear: match[0] };
+  },
+  match: ({ financialYear }) => ({ financialYear }),
+  stages: () => [
+    {
+      $group: {
+        _id: '$section',
+        declarations: { $sum: 1 },
+        employees: { $addToSet: '$employee' },
+        pending: countWhere('status', 'Pending'),
+        underReview: countWhere('status', 'Under Review'),
+        completed: countWhere('status', 'Completed'),
+        rejected: countWhere('status', 'Rejected'),
+        declaredAmount: { $sum: '$amount' },
+        verifiedAmount: sumWhere('status', 'Completed', '$amount')
+      }
+    },
+    { $sort: { _id: 1 } },
+    {
+      $project: {
+        _id: 0,
+        section: '$_id',
+        declarations: 1,
+        employees: { $size: '$employees' },
+        pending: 1,
+        underReview: 1,
+        completed: 1,
+        rejected: 1,
+        declaredAmount: round2('declaredAmount'),
+        verifiedAmount: round2('verifiedAmount')
+      }
+    }
+  ],
+  columns: () => [
+    { key: 'section', header: 'Section' },
+    { key: 'declarations', header: 'Declarations' },
+    { key: 'employees', header: 'Employees' },
+    { key: 'pending', header: 'Pending' },
+    { key: 'underReview', header: 'Under Review' },
+    { key: 'completed', header: 'Completed' },
+    { key: 'rejected', header: 'Rejected' },
+    { key: 'declaredAmount', header: 'Declared Amount' },
+    { key: 'verifiedAmount', header: 'Verified Amount' }
+  ]
+});
+
+module.exports = {
+  registerDefinition,
+  getDefinition,
+  listDefinitions
+};
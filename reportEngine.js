@@ -0,0 +1,195 @@
+// src/services/reportEngine.js - Cached, streamed report generation
+// A report request is keyed by (definition, params, format, data version).
+// The data version is a cheap fingerprint of the source rows the definition
+// reads (count plus latest update time), so a repeated request for the same
+// month finds its finished Report by key and returns the stored file at
+// once; any change to the underlying data gives a new key. Generation runs
+// as a 'Generate Report' action on the worker pool: the aggregation cursor
+// is streamed through the CSV or XLSX writer straight into the blob store
+// and the file is registered as a Document in the Reports category.
+const crypto = require('crypto');
+const mongoose = require('mongoose');
+const Report = require('../models/Report');
+const Document = require('../models/Document');
+const FileBlob = require('../models/FileBlob');
+const DocumentVersion = require('../models/DocumentVersion');
+const { ingest } = require('./blobStore');
+const { getDefinition } = require('./reportDefinitions');
+const { createCsvStream, createXlsxStream } = require('../utils/reportWriter');
+
+const MAX_REPORT_SIZE = parseInt(process.env.MAX_REPORT_SIZE) || 1024 * 1024 * 1024;
+const CURSOR_BATCH_SIZE = 1000;
+
+const FORMATS = {
+  csv: { type: 'CSV', mimetype: 'text/csv' },
+  xlsx: { type: 'XLSX', mimetype: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' }
+};
+
+const reportError = (message, status) => Object.assign(new Error(message), { status, permanent: true });
+
+// Helper to resolve a definition, normalized params and format for a request
+const resolveRequest = (name, rawParams, format = 'csv') => {
+  const definition = getDefinition(name);
+  if (!definition) throw reportError(`Unknown report: ${name}`, 404);
+  if (!FORMATS[format]) throw reportError(`Format must be one of: ${Object.keys(FORMATS).join(', ')}`, 400);
+  return { definition, params: definition.params(rawParams || {}), format };
+};
+
+// Change fingerprint of the rows a definition reads for these params
+const getDataVersion = async (definition, params) => {
+  const [row] = await definition.model.aggregate([
+    { $match: definition.match(params) },
+    { $group: { _id: null, count: { $sum: 1 }, lastUpdated: { $max: '$updatedAt' } } }
+  ]);
+  return row ? `${row.count}:${row.lastUpdated && row.lastUpdated.getTime()}` : 'empty';
+};
+
+const cacheKey = (definition, params, format, dataVersion) => crypto.createHash('sha256')
+  .update(JSON.stringify([definition.name, definition.version, params, format, dataVersion]))
+  .digest('hex');
+
+// Find the report for a request, or create it. Returns { report, queue }
+// where `queue` is the id the new 'Generate Report' action must take.
+const findOrCreateReport = async ({ name, params: rawParams, format, userId }) => {
+  const { definition, params, format: resolved } = resolveRequest(name, rawParams, format);
+  const dataVersion = await getDataVersion(definition, params);
+  const key = cacheKey(definition, params, resolved, dataVersion);
+
+  const existing = await Report.findOneAndUpdate({ key, status: 'Ready' }, { $inc: { hits: 1 } }, { new: true });
+  if (existing) return { report: existing, queue: null };
+
+  const queue = new mongoose.Types.ObjectId();
+  try {
+    const report = await Report.create({
+      key,
+      definition: definition.name,
+      params,
+      format: resolved,
+      dataVersion,
+      action: queue,
+      requestedBy: userId
+    });
+    return { report, queue };
+  } catch (error) {
+    if (error.code !== 11000) throw error;
+  }
+
+  return { report: await Report.findOne({ key }), queue: null };
+};
+
+// Hand a failed or stalled report to a new action. Returns { report, queue },
+// or null when another request restarted (or finished) it first.
+const restartReport = async (report) => {
+  const queue = new mongoose.Types.ObjectId();
+  const restarted = await Report.findOneAndUpdate(
+    { _id: report._id, action: report.action, status: { $ne: 'Ready' } },
+    { $set: { status: 'Generating', action: queue, lastError: null } },
+    { new: true }
+  );
+  return restarted ? { report: restarted, queue } : null;
+};
+
+// Count rows on their way from the cursor to the writer
+async function* counted(cursor, counter) {
+  for await (const row of cursor) {
+    counter.rows += 1;
+    yield row;
+  }
+}
+
+// Helper to build a readable file name from the report and its params
+const fileNameFor = (definition, params, format) => {
+  const label = Object.values(params).filter(Boolean).join(' ');
+  return `${definition.title}${label ? ` - ${label}` : ''}.${format}`.replace(/[\\/:*?"<>|]/g, '_');
+};
+
+// Generate a report's file. Only the action the report currently points at
+// may write it; a superseded action returns the report untouched.
+const generateReport = async ({ reportId, actionId, progress = () => {} }) => {
+  const report = await Report.findById(reportId);
+  if (!report) throw reportError('Report not found', 404);
+  if (report.status === 'Ready' || (actionId && String(report.action) !== String(actionId))) {
+    return report;
+  }
+
+  const definition = getDefinition(report.definition);
+  if (!definition) throw reportError(`Unknown report: ${report.definition}`, 400);
+
+  const owned = { _id: report._id, action: report.action };
+  await Report.updateOne(owned, { $set: { status: 'Generating', lastError: null } });
+
+  const started = Date.now();
+  let document = null;
+  let stored = null;
+  try {
+    const { params, format } = report;
+    const columns = definition.columns(params);
+    const cursor = definition.model
+      .aggregate([{ $match: definition.match(params) }, ...definition.stages(params)])
+      .allowDiskUse(true)
+      .cursor({ batchSize: CURSOR_BATCH_SIZE });
+    progress(10);
+
+    const counter = { rows: 0 };
+    const rows = counted(cursor, counter);
+    const stream = format === 'xlsx'
+      ? createXlsxStream(columns, rows, { sheetName: definition.title })
+      : createCsvStream(columns, rows);
+
+    const filename = fileNameFor(definition, params, format);
+    const { type, mimetype } = FORMATS[format];
+    stored = await ingest(stream, { filename, mimetype, maxSize: MAX_REPORT_SIZE });
+    progress(80);
+
+    document = await Document.create({
+      name: filename,
+      originalName: filename,
+      filename: stored.digest,
+      digest: stored.digest,
+      size: stored.size,
+      mimetype,
+      type,
+      category: 'Reports',
+      description: definition.description,
+      tags: ['report', definition.name],
+      uploadedBy: report.requestedBy
+    });
+    await FileBlob.addReferences([{ ...stored, mimetype }]);
+    await DocumentVersion.markReferenced(document._id, document.version);
+    progress(95);
+
+    const finished = await Report.findOneAndUpdate(
+      { ...owned, status: 'Generating' },
+      {
+        $set: {
+          status: 'Ready',
+          document: document._id,
+          rowCount: counter.rows,
+          size: stored.size,
+          generatedAt: new Date(),
+          durationMs: Date.now() - started
+        }
+      },
+      { new: true }
+    );
+    if (!finished) {
+      throw reportError('Report was restarted by another request', 409);
+    }
+    return finished;
+
+  } catch (error) {
+    if (document) {
+      await Document.removeTree(document._id);
+      await FileBlob.releaseReferences([stored.digest]);
+    }
+    await Report.updateOne(owned, { $set: { status: 'Failed', lastError: error.message } });
+    throw error;
+  }
+};
+
+module.exports = {
+  resolveRequest,
+  findOrCreateReport,
+  restartReport,
+  generateReport
+};
@@ -0,0 +1,133 @@
+// src/utils/reportWriter.js - Streaming CSV and XLSX writers for tabular reports
+// Rows are read from an (async) iterable one at a time and written out in
+// chunks as the consumer drains the stream, so a report never sits in
+// memory whole. XLSX output is a minimal SpreadsheetML workbook with one
+// sheet of inline strings, packed by the streaming ZIP writer.
+const { Readable } = require('stream');
+const { createZipStream } = require('./zipStream');
+
+// Rows are buffered into chunks of about this many characters
+const CHUNK_SIZE = 64 * 1024;
+
+// Excel's sheet name limits
+const MAX_SHEET_NAME = 31;
+
+// Characters a spreadsheet would read as the start of a formula
+const FORMULA_PREFIX = /^[=+\-@\t\r]/;
+
+// Characters XML 1.0 can't carry
+const INVALID_XML = /[^\t\n\r\x20-\uD7FF\uE000-\uFFFD\u{10000}-\u{10FFFF}]/gu;
+
+// Helper to get a cell value, numbers kept as numbers
+const cellValue = (row, column) => {
+  const value = row[column.key];
+  if (value === null || value === undefined) return '';
+  if (value instanceof Date) return value.toISOString();
+  return value;
+};
+
+// Helper to quote a CSV field; text that looks like a formula is prefixed
+// so spreadsheets show it instead of evaluating it
+const csvField = (value) => {
+  if (typeof value === 'number') return Number.isFinite(value) ? String(value) : '';
+  let text = String(value);
+  if (FORMULA_PREFIX.test(text)) text = `'${text}`;
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+};
+
+const escapeXml = (text) => String(text)
+  .replace(INVALID_XML, '')
+  .replace(/&/g, '&amp;')
+  .replace(/</g, '&lt;')
+  .replace(/>/g, '&gt;')
+  .replace(/"/g, '&quot;');
+
+const xlsxCell = (value) => (typeof value === 'number' && Number.isFinite(value)
+  ? `<c><v>${value}</v></c>`
+  : `<c t="inlineStr"><is><t xml:space="preserve">${escapeXml(value)}</t></is></c>`);
+
+// Buffer formatted lines into chunks of about CHUNK_SIZE
+async function* chunked(lines) {
+  let buffer = '';
+  for await (const line of lines) {
+    buffer += line;
+    if (buffer.length >= CHUNK_SIZE) {
+      yield buffer;
+      buffer = '';
+    }
+  }
+  if (buffer) yield buffer;
+}
+
+async function* csvLines(columns, rows) {
+  yield `${columns.map(column => csvField(column.header)).join(',')}\r\n`;
+  for await (const row of rows) {
+    yield `${columns.map(column => csvField(cellValue(row, column))).join(',')}\r\n`;
+  }
+}
+
+async function* sheetLines(columns, rows) {
+  yield '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n' +
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>';
+  yield `<row>${columns.map(column => xlsxCell(column.header)).join('')}</row>`;
+  for await (const row of rows) {
+    yield `<row>${columns.map(column => xlsxCell(cellValue(row, column))).join('')}</row>`;
+  }
+  yield '</sheetData></worksheet>';
+}
+
+const XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n';
+
+const CONTENT_TYPES = `${XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">` +
+  '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' +
+  '<Default Extension="xml" ContentType="application/xml"/>' +
+  '<Override PartName="/xl/workbook.xml" ' +
+  'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>' +
+  '<Override PartName="/xl/worksheets/sheet1.xml" ' +
+  'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' +
+  '</Types>';
+
+const PACKAGE_RELS = `${XML_HEADER}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">` +
+  '<Relationship Id="rId1" ' +
+  'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" ' +
+  'Target="xl/workbook.xml"/></Relationships>';
+
+const WORKBOOK_RELS = `${XML_HEADER}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">` +
+  '<Relationship Id="rId1" ' +
+  'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" ' +
+  'Target="worksheets/sheet1.xml"/></Relationships>';
+
+const workbook = (sheetName) => `${XML_HEADER}<workbook ` +
+  'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" ' +
+  'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">' +
+  `<sheets><sheet name="${escapeXml(sheetName)}" sheetId="1" r:id="rId1"/></sheets></workbook>`;
+
+// Helper to make a valid sheet name
+const sheetNameFor = (name) => (String(name || 'Report').replace(/[[\]:*?/\\]/g, ' ').trim() || 'Report')
+  .slice(0, MAX_SHEET_NAME);
+
+// CSV stream for rows. columns: [{ key, header }]
+const createCsvStream = (columns, rows) => Readable.from(chunked(csvLines(columns, rows)), {
+  objectMode: false
+});
+
+// XLSX stream for rows. columns: [{ key, header }]
+const createXlsxStream = (columns, rows, { sheetName, date = new Date() } = {}) => {
+  const part = (name, text) => ({ name, date, source: () => Readable.from([Buffer.from(text, 'utf8')]) });
+  return createZipStream([
+    part('[Content_Types].xml', CONTENT_TYPES),
+    part('_rels/.rels', PACKAGE_RELS),
+    part('xl/workbook.xml', workbook(sheetNameFor(sheetName))),
+    part('xl/_rels/workbook.xml.rels', WORKBOOK_RELS),
+    {
+      name: 'xl/worksheets/sheet1.xml',
+      date,
+      source: () => Readable.from(chunked(sheetLines(columns, rows)), { objectMode: false })
+    }
+  ]);
+};
+
+module.exports = {
+  createCsvStream,
+  createXlsxStream
+};
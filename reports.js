@@ -0,0 +1,22 @@
+// src/routes/reports.js - Report generation routes
+const express = require('express');
+const {
+  getReportDefinitions,
+  requestReport,
+  getReports,
+  getReport
+} = require('../controllers/reportController');
+const { authenticate, authorize } = require('../middleware/auth');
+
+const router = express.Router();
+
+// All routes require authentication
+router.use(authenticate);
+
+// Admin/HR only routes
+router.get('/definitions', authorize('Administrator', 'HR Manager'), getReportDefinitions);
+router.get('/', authorize('Administrator', 'HR Manager'), getReports);
+router.post('/', authorize('Administrator', 'HR Manager'), requestReport);
+router.get('/:id', authorize('Administrator', 'HR Manager'), getReport);
+
+module.exports = router;
@@ -0,0 +1,258 @@
+// src/services/resumableUploads.js - Resumable chunked uploads into the blob store
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { Transform } = require('stream');
+const { pipeline } = require('stream/promises');
+const UploadSession = require('../models/UploadSession');
+const Document = require('../models/Document');
+const FileBlob = require('../models/FileBlob');
+const DocumentVersion = require('../models/DocumentVersion');
+const { UPLOAD_DIR, ingest, isAllowedType, getExtension } = require('./blobStore');
+
+const SESSION_DIR = path.join(UPLOAD_DIR, 'sessions');
+const MAX_RESUMABLE_SIZE = parseInt(process.env.MAX_RESUMABLE_UPLOAD_SIZE) || 2 * 1024 * 1024 * 1024;
+const SESSION_TTL_MS = (parseInt(process.env.UPLOAD_SESSION_TTL_HOURS) || 24) * 60 * 60 * 1000;
+const CHUNK_LOCK_MS = 10 * 60 * 1000;
+const SWEEP_INTERVAL_MS = 60 * 60 * 1000;
+
+const uploadError = (message, status, extra = {}) => Object.assign(new Error(message), { status, ...extra });
+
+// Partial file for a session
+const partPath = (sessionId) => path.join(SESSION_DIR, `${sessionId}.part`);
+
+// Document.type for an extension, or null when documents can't hold it
+const documentTypeFor = (filename) => {
+  const type = getExtension(filename).toUpperCase();
+  return Document.schema.path('type').enumValues.includes(type) && type !== 'Folder' ? type : null;
+};
+
+// Remove partial files whose session has expired or finished (at most hourly)
+let lastSweep = 0;
+const sweepParts = async () => {
+  if (Date.now() - lastSweep < SWEEP_INTERVAL_MS) return;
+  lastSweep = Date.now();
+
+  const names = await fs.promises.readdir(SESSION_DIR).catch(() => []);
+  const ids = names.filter(name => name.endsWith('.part')).map(name => name.slice(0, -5));
+  if (!ids.length) return;
+
+  const open = await UploadSession.find({ _id: { $in: ids }, status: 'Open' }).distinct('_id');
+  const live = new Set(open.map(String));
+  await Promise.all(ids
+    .filter(id => !live.has(id))
+    .map(id => fs.promises.rm(partPath(id), { force: true })));
+};
+
+// Start a session
+const createSession = async (user, { filename, size, mimetype, sha256, ...fields }) => {
+  if (!filename || !isAllowedType(filename) || !documentTypeFor(filename)) {
+    throw uploadError('File type is not allowed', 415);
+  }
+  if (!(size > 0) || size > MAX_RESUMABLE_SIZE) {
+    throw uploadError(`File size must be between 1 and ${MAX_RESUMABLE_SIZE} bytes`, 413);
+  }
+
+  await fs.promises.mkdir(SESSION_DIR, { recursive: true });
+  sweepParts().catch(error => console.error('Upload sweep error:', error.message));
+
+  const session = await UploadSession.create({
+    user: user._id,
+    filename,
+    mimetype,
+    size,
+    sha256,
+    documentFields: {
+      name: fields.name || filename,
+      parentFolder: fields.parentFolder,
+      folder: fields.folder,
+      category: fields.category,
+      description: fields.description,
+      tags: fields.tags
+    },
+    expiresAt: new Date(Date.now() + SESSION_TTL_MS)
+  });
+
+  // Create the partial file now so every chunk can open it in place
+  await fs.promises.writeFile(partPath(session._id), Buffer.alloc(0));
+  return session;
+};
+
+// Get a user's open session
+const getSession = async (user, sessionId) => {
+  const session = await UploadSession.findOne({ _id: sessionId, user: user._id });
+  if (!session) throw uploadError('Upload session not found', 404);
+  return session;
+};
+
+// Receive one chunk starting at `offset`. Only the writer holding the lock
+// at the current offset may append; bytes are fsynced before the offset
+// moves, so a crash or disconnect never loses acknowledged data.
+// `checksum` (optional) is the base64 sha256 of the chunk.
+const writeChunk = async (user, sessionId, stream, { offset, checksum }) => {
+  const now = new Date();
+  const session = await UploadSession.findOneAndUpdate(
+    {
+      _id: sessionId,
+      user: user._id,
+      status: 'Open',
+      received: offset,
+      $or: [{ lockedUntil: null }, { lockedUntil: { $lt: now } }]
+    },
+    { $set: { lockedUntil: new Date(now.getTime() + CHUNK_LOCK_MS) } },
+    { new: true }
+  );
+
+  if (!session) {
+    const current = await getSession(user, sessionId);
+    if (current.status !== 'Open') throw uploadError('Upload already completed', 409, { offset: current.received });
+    if (current.received !== offset) {
+      throw uploadError('Offset does not match the bytes received', 409, { offset: current.received });
+    }
+    throw uploadError('Another chunk is being uploaded for this session', 409, { offset: current.received });
+  }
+
+  const remaining = session.size - offset;
+  const hash = crypto.createHash('sha256');
+  let bytes = 0;
+  const meter = new Transform({
+    transform(chunk, encoding, callback) {
+      bytes += chunk.length;
+      if (bytes > remaining) {
+        return callback(uploadError('Chunk runs past the declared file size', 413));
+      }
+      hash.update(chunk);
+      callback(null, chunk);
+    }
+  });
+
+  const handle = await fs.promises.open(partPath(session._id), 'r+');
+  let failure = null;
+  let written = 0;
+  try {
+    const out = handle.createWriteStream({ start: offset, autoClose: false });
+    await pipeline(stream, meter, out).catch(error => {
+      failure = error;
+    });
+    written = out.bytesWritten;
+    await handle.sync();
+  } finally {
+    await handle.close();
+  }
+
+  // A checksummed chunk counts only if it arrived whole and matches;
+  // otherwise whatever reached the disk counts and the client resumes from there
+  const mismatch = Boolean(checksum) && !failure && hash.digest('base64') !== checksum;
+  const accepted = checksum && (failure || mismatch) ? 0 : written;
+
+  const updated = await UploadSession.findOneAndUpdate(
+    { _id: session._id, received: offset },
+    {
+      $set: {
+        received: offset + accepted,
+        lockedUntil: null,
+        expiresAt: new Date(Date.now() + SESSION_TTL_MS)
+      }
+    },
+    { new: true }
+  );
+  const received = updated ? updated.received : offset;
+
+  if (failure) throw Object.assign(failure, { offset: received });
+  if (mismatch) throw uploadError('Chunk checksum mismatch', 400, { offset: received });
+  return updated;
+};
+
+// Assemble the finished file into the blob store and create its Document
+const completeSession = async (user, sessionId) => {
+  const existing = await getSession(user, sessionId);
+
+  if (existing.status === 'Completed') {
+    return { session: existing, document: await Document.findById(existing.document) };
+  }
+  if (existing.received !== existing.size) {
+    throw uploadError('Upload is incomplete', 409, { offset: existing.received });
+  }
+
+  // Take the session lock so a repeated "complete" can't create two documents
+  const now = new Date();
+  const session = await UploadSession.findOneAndUpdate(
+    {
+      _id: existing._id,
+      status: 'Open',
+      $or: [{ lockedUntil: null }, { lockedUntil: { $lt: now } }]
+    },
+    { $set: { lockedUntil: new Date(now.getTime() + CHUNK_LOCK_MS) } },
+    { new: true }
+  );
+  if (!session) {
+    throw uploadError('Upload is already being completed', 409, { offset: existing.received });
+  }
+
+  const file = partPath(session._id);
+  let document;
+  let stored;
+  try {
+    // Drop any bytes past the declared size left by an abandoned chunk
+    await fs.promises.truncate(file, session.size);
+
+    stored = await ingest(fs.createReadStream(file), {
+      filename: session.filename,
+      mimetype: session.mimetype,
+      maxSize: MAX_RESUMABLE_SIZE
+    });
+
+    if (session.sha256 && stored.digest !== session.sha256) {
+      throw uploadError('File checksum mismatch', 422);
+    }
+
+    const fields = session.documentFields || {};
+    document = await Document.create({
+      name: fields.name || session.filename,
+      originalName: session.filename,
+      filename: stored.digest,
+      digest: stored.digest,
+      size: stored.size,
+      mimetype: session.mimetype,
+      type: documentTypeFor(session.filename),
+      parentFolder: fields.parentFolder,
+      folder: fields.folder,
+      category: fields.category,
+      description: fields.description,
+      tags: fields.tags,
+      uploadedBy: user._id
+    });
+  } catch (error) {
+    await UploadSession.updateOne({ _id: session._id }, { $set: { lockedUntil: null } });
+    throw error;
+  }
+
+  await FileBlob.addReferences([{ ...stored, mimetype: session.mimetype }]);
+  await DocumentVersion.markReferenced(document._id, document.version);
+
+  const completed = await UploadSession.findOneAndUpdate(
+    { _id: session._id, status: 'Open' },
+    { $set: { status: 'Completed', document: document._id, lockedUntil: null } },
+    { new: true }
+  );
+  await fs.promises.rm(file, { force: true });
+
+  return { session: completed || session, document };
+};
+
+// Abandon a session and its partial file
+const abortSession = async (user, sessionId) => {
+  const session = await getSession(user, sessionId);
+  await UploadSession.deleteOne({ _id: session._id });
+  await fs.promises.rm(partPath(session._id), { force: true });
+  return session;
+};
+
+module.exports = {
+  MAX_RESUMABLE_SIZE,
+  createSession,
+  getSession,
+  writeChunk,
+  completeSession,
+  abortSession
+};
@@ -0,0 +1,153 @@
+// src/services/salaryLock.js - Lock a month's compensation into an immutable snapshot
+// Active employees are streamed once, in _id order, into compact
+// SalarySnapshot rows written with batched insertMany while a sha256 of the
+// rows is built alongside. The lock is final: a locked month is never
+// rewritten, and payroll for it reads the snapshot instead of live data.
+const crypto = require('crypto');
+const os = require('os');
+const Employee = require('../models/Employee');
+const SalaryLock = require('../models/SalaryLock');
+const SalarySnapshot = require('../models/SalarySnapshot');
+const { parsePeriod } = require('./payrollEngine');
+
+const WORKER_ID = `${os.hostname()}:${process.pid}`;
+const LEASE_MS = 10 * 60 * 1000;
+const INSERT_BATCH_SIZE = 5000;
+
+const lockError = (message, status) => Object.assign(new Error(message), { status, permanent: true });
+
+// Take the month's lock header: a new one, or one abandoned mid-write
+// (its partial rows are cleared). Returns { lock, locked } where `locked`
+// is an already finished lock.
+const acquire = async (period, { userId, actionId }) => {
+  const now = new Date();
+  const lease = { lockedBy: WORKER_ID, lockedUntil: new Date(now.getTime() + LEASE_MS) };
+
+  try {
+    return { lock: await SalaryLock.create({ period, action: actionId, createdBy: userId, ...lease }) };
+  } catch (error) {
+    if (error.code !== 11000) throw error;
+  }
+
+  const existing = await SalaryLock.findOne({ period });
+  if (existing && existing.status === 'Locked') return { locked: existing };
+
+  const lock = await SalaryLock.findOneAndUpdate(
+    {
+      period,
+      status: 'Locking',
+      $or: [{ lockedUntil: null }, { lockedUntil: { $lt: now } }]
+    },
+    { $set: { ...lease, action: actionId, createdBy: userId } },
+    { new: true }
+  );
+  if (!lock) throw lockError(`Salaries for ${period} are already being locked`, 409);
+
+  await SalarySnapshot.deleteMany({ period });
+  return { lock };
+};
+
+// Lock compensation for a month. Locking an already locked month returns
+// the existing lock unchanged.
+const lockSalaries = async ({ period, userId, actionId, progress = () => {} }) => {
+  const normalized = parsePeriod(period);
+  if (!normalized) {
+    throw lockError('Period must be "YYYY-MM" or "Month YYYY"', 400);
+  }
+
+  const { lock, locked } = await acquire(normalized, { userId, actionId });
+  if (locked) return locked;
+
+  try {
+    const expected = Math.max(await Employee.countDocuments({ status: 'Active' }), 1);
+    const hash = crypto.createHash('sha256');
+    const totals = { salary: 0, incentives: 0, bonus: 0 };
+    let count = 0;
+    let batch = [];
+
+    const writeBatch = async () => {
+      await SalarySnapshot.insertMany(batch, { ordered: false, lean: true });
+      batch = [];
+      progress(Math.min(Math.floor((count / expected) * 95), 95));
+      await SalaryLock.updateOne(
+        { _id: lock._id, lockedBy: WORKER_ID },
+        { $set: { lockedUntil: new Date(Date.now() + LEASE_MS) } }
+      );
+    };
+
+    const cursor = Employee.find({ status: 'Active' })
+      .select('employeeId firstName lastName department role salary ctc incentives bonus pfNumber')
+      .sort({ _id: 1 })
+      .lean()
+      .cursor({ batchSize: INSERT_BATCH_SIZE });
+
+    for await (const employee of cursor) {
+      const row = {
+        period: normalized,
+        employee: employee._id,
+        employeeId: employee.employeeId,
+        employeeName: `${employee.firstName} ${employee.lastName}`,
+        department: employee.department,
+        role: employee.role,
+        salary: employee.salary || 0,
+        ctc: employee.ctc || 0,
+        incentives: employee.incentives || 0,
+        bonus: employee.bonus || 0,
+        providentFund: Boolean(employee.pfNumber)
+      };
+
+      hash.update(`${SalarySnapshot.checksumLine(row)}\n`);
+      totals.salary += row.salary;
+      totals.incentives += row.incentives;
+      totals.bonus += row.bonus;
+      count += 1;
+
+      batch.push(row);
+      if (batch.length === INSERT_BATCH_SIZE) await writeBatch();
+    }
+    if (batch.length) await writeBatch();
+
+    const finished = await SalaryLock.findOneAndUpdate(
+      { _id: lock._id, lockedBy: WORKER_ID },
+      {
+        $set: {
+          status: 'Locked',
+          checksum: hash.digest('hex'),
+          employeeCount: count,
+          totals,
+          lockedAt: new Date(),
+          lockedBy: null,
+          lockedUntil: null
+        }
+      },
+      { new: true }
+    );
+    if (!finished) throw lockError(`Lost the lock on ${normalized} while writing the snapshot`, 409);
+    return finished;
+
+  } catch (error) {
+    // Leave the header for a retry to take over, but free it now
+    await SalaryLock.updateOne({ _id: lock._id, lockedBy: WORKER_ID }, { $set: { lockedUntil: null } });
+    throw error;
+  }
+};
+
+// Check a locked month's rows still match its checksum
+const verifyLock = async (period) => {
+  const lock = await SalaryLock.findOne({ period, status: 'Locked' });
+  if (!lock) throw lockError(`Salaries for ${period} are not locked`, 404);
+
+  const { checksum, count } = await SalarySnapshot.computeChecksum(period);
+  return {
+    period,
+    valid: checksum === lock.checksum && count === lock.employeeCount,
+    employeeCount: count,
+    checksum,
+    expectedChecksum: lock.checksum
+  };
+};
+
+module.exports = {
+  lockSalaries,
+  verifyLock
+};
@@ -0,0 +1,115 @@
+// src/utils/serveFile.js - Streamed file responses with Range and conditional GET support
+const fs = require('fs');
+const { pipeline } = require('stream');
+
+// Large read chunks keep syscalls few; memory stays bounded by the socket buffer
+const READ_CHUNK_SIZE = 256 * 1024;
+
+// Parse a single "bytes=" range. Returns { start, end }, null when the
+// header should be ignored (absent, malformed or multi-range) and -1 when
+// the range cannot be satisfied.
+const parseRange = (header, size) => {
+  if (!header) return null;
+
+  const match = /^bytes=(\d*)-(\d*)$/.exec(header.trim());
+  if (!match || (match[1] === '' && match[2] === '')) return null;
+
+  let start;
+  let end;
+
+  if (match[1] === '') {
+    // Suffix range: last N bytes
+    const suffix = parseInt(match[2], 10);
+    if (suffix === 0) return -1;
+    start = Math.max(0, size - suffix);
+    end = size - 1;
+  } else {
+    start = parseInt(match[1], 10);
+    end = match[2] === '' ? size - 1 : Math.min(parseInt(match[2], 10), size - 1);
+  }
+
+  if (start >= size || start > end) return -1;
+  return { start, end };
+};
+
+// Helper for a Content-Disposition header that survives non-ASCII names
+const contentDisposition = (filename, inline = false) => {
+  const fallback = filename.replace(/[^\x20-\x7e]|["\\]/g, '_');
+  return `${inline ? 'inline' : 'attachment'}; filename="${fallback}"; filename*=UTF-8''${encodeURIComponent(filename)}`;
+};
+
+// Helper to match an If-None-Match / If-Range header against an ETag
+const etagMatches = (header, etag) => header
+  .split(',')
+  .map(tag => tag.trim())
+  .some(tag => tag === '*' || tag === etag);
+
+// Send a file from disk. Handles HEAD, If-None-Match, If-Range and a
+// single byte range; the body is streamed straight from disk and marked
+// no-transform so the compression middleware leaves it alone.
+//
+// options: { etag, lastModified, mimetype, filename, inline, onComplete(info) }
+const serveFile = async (req, res, filePath, options = {}) => {
+  const stats = await fs.promises.stat(filePath);
+  const size = stats.size;
+  const lastModified = options.lastModified || stats.mtime;
+
+  res.set({
+    'Accept-Ranges': 'bytes',
+    'Cache-Control': 'private, no-transform',
+    'Last-Modified': lastModified.toUTCString(),
+    'Content-Type': options.mimetype || 'application/octet-stream',
+    'X-Content-Type-Options': 'nosniff'
+  });
+  if (options.etag) res.set('ETag', options.etag);
+  if (options.filename) res.set('Content-Disposition', contentDisposition(options.filename, options.inline));
+
+  // Conditional GET
+  const ifNoneMatch = req.headers['if-none-match'];
+  if (options.etag && ifNoneMatch && etagMatches(ifNoneMatch, options.etag)) {
+    return res.status(304).end();
+  }
+
+  // Only honour Range when If-Range (if any) still matches the current version
+  const ifRange = req.headers['if-range'];
+  const rangeAllowed = !ifRange || (options.etag && etagMatches(ifRange, options.etag));
+  const range = rangeAllowed ? parseRange(req.headers.range, size) : null;
+
+  if (range === -1) {
+    res.set('Content-Range', `bytes */${size}`);
+    return res.status(416).end();
+  }
+
+  const start = range ? range.start : 0;
+  const end = range ? range.end : size - 1;
+  const length = size === 0 ? 0 : end - start + 1;
+
+  res.status(range ? 206 : 200);
+  res.set('Content-Length', String(length));
+  if (range) res.set('Content-Range', `bytes ${start}-${end}/${size}`);
+
+  if (req.method === 'HEAD' || length === 0) {
+    return res.end();
+  }
+
+  const stream = fs.createReadStream(filePath, { start, end, highWaterMark: READ_CHUNK_SIZE });
+
+  pipeline(stream, res, (error) => {
+    if (error) {
+      // Client aborts are routine for range/resume downloads
+      if (error.code !== 'ERR_STREAM_PREMATURE_CLOSE') {
+        console.error('File stream error:', error.message);
+      }
+      return;
+    }
+    if (options.onComplete) {
+      options.onComplete({ start, end, size, partial: Boolean(range) });
+    }
+  });
+};
+
+module.exports = {
+  parseRange,
+  contentDisposition,
+  serveFile
+};
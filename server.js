@@ -2,6 +2,12 @@
 require('dotenv').config();
 const app = require('./src/app');
 const connectDB = require('./src/config/database');
+const documentCounters = require('./src/services/documentCounters');
+const documentRetention = require('./src/jobs/documentRetention');
+const actionScheduler = require('./src/jobs/actionScheduler');
+const actionLogger = require('./src/services/actionLogger');
+const actionPool = require('./src/services/actionPool');
+const overdueTracker = require('./src/services/overdueTracker');
 
 const PORT = process.env.PORT || 3000;
 
@@ -20,6 +26,13 @@ const server = app.listen(PORT, () => {
   console.log(`🚀 Server running on port ${PORT} in ${process.env.NODE_ENV || 'development'} mode`);
   console.log(`📊 Dashboard: http://localhost:${PORT}`);
   console.log(`🔗 API: http://localhost:${PORT}/api`);
+
+  // Recycle bin archiving and blob purge, inside the low-traffic window
+  documentRetention.start();
+
+  // Run scheduled actions (catches up on anything that fell due while down)
+  actionScheduler.start();
+  overdueTracker.start();
 });
 
 // Handle unhandled promise rejections
@@ -34,7 +47,13 @@ process.on('unhandledRejection', (err) => {
 // Graceful shutdown
 process.on('SIGTERM', () => {
   console.log('👋 SIGTERM RECEIVED. Shutting down gracefully');
-  server.close(() => {
+  server.close(async () => {
+    overdueTracker.stop();
+    // Write buffered document counters and finish in-flight background work
+    await Promise.all([documentCounters.stop(), documentRetention.stop(), actionScheduler.stop()]);
+    // Then the worker pools, and last the logger so every entry is written
+    await actionPool.stop();
+    await actionLogger.stop();
     console.log('💥 Process terminated!');
   });
 });
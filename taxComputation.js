@@ -0,0 +1,179 @@
+// src/services/taxComputation.js - Batch IT declaration deduction engine
+const ITDeclaration = require('../models/ITDeclaration');
+const { getLimitsVersion } = require('../utils/taxLimits');
+
+// Which declarations count towards each basis
+const BASIS_STATUSES = {
+  declared: ['Pending', 'Under Review', 'Completed'],
+  verified: ['Completed']
+};
+
+// Computed results per (financialYear, basis), valid while the fingerprint holds
+const resultCache = new Map();
+
+// Cheap change detector for a financial year: declaration count plus the
+// latest update time, served from the { financialYear, updatedAt } index
+const getFingerprint = async (financialYear) => {
+  const [row] = await ITDeclaration.aggregate([
+    { $match: { financialYear } },
+    { $group: { _id: null, count: { $sum: 1 }, lastUpdated: { $max: '$updatedAt' } } }
+  ]);
+  return row ? `${row.count}:${row.lastUpdated && row.lastUpdated.getTime()}` : 'empty';
+};
+
+// One aggregation pass: declared amount per employee x section
+const aggregateSections = (financialYear, statuses) => ITDeclaration.aggregate([
+  { $match: { financialYear, status: { $in: statuses } } },
+  {
+    $group: {
+      _id: { employee: '$employee', section: '$section' },
+      employeeId: { $first: '$employeeId' },
+      employeeName: { $first: '$employeeName' },
+      amount: { $sum: '$amount' },
+      declarations: { $sum: 1 }
+    }
+  },
+  { $sort: { '_id.employee': 1, '_id.section': 1 } }
+]).allowDiskUse(true);
+
+// Apply section caps over all rows at once and fold rows into employees
+const applyCaps = (rows, limitsVersion) => {
+  const rowCount = rows.length;
+  const amounts = new Float64Array(rowCount);
+  const caps = new Float64Array(rowCount);
+  const eligible = new Float64Array(rowCount);
+  const owner = new Int32Array(rowCount);
+
+  const employees = [];
+  const employeeIndex = new Map();
+
+  for (let i = 0; i < rowCount; i++) {
+    const row = rows[i];
+    const key = String(row._id.employee);
+
+    if (!employeeIndex.has(key)) {
+      employeeIndex.set(key, employees.length);
+      employees.push({
+        employee: row._id.employee,
+        employeeId: row.employeeId,
+        employeeName: row.employeeName,
+        sections: {},
+        totalDeclared: 0,
+        totalEligible: 0
+      });
+    }
+
+    const limit = limitsVersion.limits[row._id.section];
+    amounts[i] = row.amount;
+    caps[i] = limit === null || limit === undefined ? Infinity : limit;
+    owner[i] = employeeIndex.get(key);
+  }
+
+  // Vectorized cap: eligible = min(amount, cap)
+  for (let i = 0; i < rowCount; i++) {
+    eligible[i] = amounts[i] < caps[i] ? amounts[i] : caps[i];
+  }
+
+  // Per-employee totals
+  const totalDeclared = new Float64Array(employees.length);
+  const totalEligible = new Float64Array(employees.length);
+  for (let i = 0; i < rowCount; i++) {
+    totalDeclared[owner[i]] += amounts[i];
+    totalEligible[owner[i]] += eligible[i];
+  }
+
+  for (let i = 0; i < rowCount; i++) {
+    employees[owner[i]].sections[rows[i]._id.section] = {
+      declared: amounts[i],
+      cap: caps[i] === Infinity ? null : caps[i],
+      eligible: eligible[i],
+      declarations: rows[i].declarations
+    };
+  }
+
+  for (let e = 0; e < employees.length; e++) {
+    employees[e].totalDeclared = totalDeclared[e];
+    employees[e].totalEligible = totalEligible[e];
+  }
+
+  return employees;
+};
+
+// Annual income tax for a column of taxable incomes, slab by slab, using
+// the version's incomeTax rules ({ slabs, rebateUpTo, cessRate })
+const computeIncomeTax = (taxable, limitsVersion) => {
+  const rules = limitsVersion.incomeTax;
+  if (!rules || !Array.isArray(rules.slabs)) {
+    throw new Error(`No income tax rules for limits version ${limitsVersion.version}`);
+  }
+
+  const count = taxable.length;
+  const tax = new Float64Array(count);
+
+  let lower = 0;
+  for (const slab of rules.slabs) {
+    const upper = slab.upTo === null ? Infinity : slab.upTo;
+    if (slab.rate) {
+      for (let i = 0; i < count; i++) {
+        const portion = (taxable[i] < upper ? taxable[i] : upper) - lower;
+        if (portion > 0) tax[i] += portion * slab.rate;
+      }
+    }
+    lower = upper;
+  }
+
+  const cess = 1 + (rules.cessRate || 0);
+  for (let i = 0; i < count; i++) {
+    tax[i] = taxable[i] <= (rules.rebateUpTo || 0) ? 0 : Math.round(tax[i] * cess);
+  }
+  return tax;
+};
+
+// Eligible deductions for every employee in a financial year.
+// Cached until any declaration in that year changes.
+const computeDeductions = async (financialYear, { basis = 'declared' } = {}) => {
+  const statuses = BASIS_STATUSES[basis];
+  if (!statuses) {
+    throw Object.assign(new Error(`Unknown basis: ${basis}`), { status: 400 });
+  }
+
+  const cacheKey = `${financialYear}|${basis}`;
+  const fingerprint = await getFingerprint(financialYear);
+  const cached = resultCache.get(cacheKey);
+
+  if (cached && cached.fingerprint === fingerprint) {
+    return cached.result;
+  }
+
+  const limitsVersion = getLimitsVersion(financialYear);
+  const rows = await aggregateSections(financialYear, statuses);
+
+  const result = {
+    financialYear,
+    basis,
+    limitsVersion: limitsVersion.version,
+    computedAt: new Date(),
+    employees: applyCaps(rows, limitsVersion)
+  };
+
+  resultCache.set(cacheKey, { fingerprint, result });
+  return result;
+};
+
+// Eligible deductions for one employee, served from the org-wide result
+const getEmployeeDeductions = async (financialYear, employeeId, options) => {
+  const { employees, ...meta } = await computeDeductions(financialYear, options);
+  const match = employees.find(entry => String(entry.employee) === String(employeeId));
+  return {
+    ...meta,
+    employee: match || { employee: employeeId, sections: {}, totalDeclared: 0, totalEligible: 0 }
+  };
+};
+
+module.exports = {
+  BASIS_STATUSES,
+  applyCaps,
+  computeIncomeTax,
+  computeDeductions,
+  getEmployeeDeductions
+};
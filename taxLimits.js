@@ -0,0 +1,47 @@
+// src/utils/taxLimits.js - Versioned section caps for IT declarations
+const fs = require('fs');
+const path = require('path');
+
+const TAX_LIMITS_FILE = process.env.TAX_LIMITS_FILE || path.join(__dirname, '../config/taxLimits.json');
+
+// Cached limits table, loaded on first use
+let limitsTable = null;
+
+// Load (or reload) the limits table from disk
+const loadLimitsTable = () => {
+  const raw = JSON.parse(fs.readFileSync(TAX_LIMITS_FILE, 'utf8'));
+
+  if (!Array.isArray(raw.versions) || !raw.versions.length) {
+    throw new Error(`Invalid tax limits file: ${TAX_LIMITS_FILE}`);
+  }
+
+  // "2023-2024" sorts correctly as a string
+  limitsTable = raw.versions.slice().sort((a, b) => a.fromYear.localeCompare(b.fromYear));
+  return limitsTable;
+};
+
+const getLimitsTable = () => limitsTable || loadLimitsTable();
+
+// Find the limits version in force for a financial year
+const getLimitsVersion = (financialYear) => {
+  const versions = getLimitsTable();
+
+  let selected = versions[0];
+  for (const version of versions) {
+    if (financialYear && version.fromYear > financialYear) break;
+    selected = version;
+  }
+  return selected;
+};
+
+// Cap for one section in a financial year (null = no cap)
+const getSectionLimit = (section, financialYear) => {
+  const limit = getLimitsVersion(financialYear).limits[section];
+  return limit === undefined ? null : limit;
+};
+
+module.exports = {
+  loadLimitsTable,
+  getLimitsVersion,
+  getSectionLimit
+};
@@ -0,0 +1,99 @@
+// src/middleware/upload.js - Streaming multipart upload middleware
+const { MultipartParser, getBoundary } = require('../utils/multipart');
+const { ingest, isAllowedType, ALLOWED_FILE_TYPES } = require('../services/blobStore');
+
+// Receive multipart uploads straight into the blob store.
+// Files are hashed and size/type checked while streaming, never buffered
+// whole; on success req.files holds
+// { fieldname, originalName, mimetype, digest, size, deduplicated }
+// and req.body holds the plain form fields.
+const receiveFiles = ({ maxFiles = 10 } = {}) => {
+  return (req, res, next) => {
+    const boundary = getBoundary(req.headers['content-type']);
+
+    if (!boundary) {
+      return res.status(400).json({
+        success: false,
+        message: 'Expected a multipart/form-data upload'
+      });
+    }
+
+    const parser = new MultipartParser(boundary, { maxFiles });
+    const files = [];
+    const pending = [];
+    let failed = false;
+
+    req.body = {};
+
+    const fail = (error) => {
+      if (failed) return;
+      failed = true;
+
+      console.error('Upload error:', error.message);
+
+      req.unpipe(parser);
+      parser.destroy();
+
+      // Stop receiving the rest of the body once the client has the answer
+      res.set('Connection', 'close');
+      res.on('finish', () => req.destroy());
+      res.status(error.status || 500).json({
+        success: false,
+        message: error.status ? error.message : 'Upload failed'
+      });
+    };
+
+    parser.on('field', (name, value) => {
+      req.body[name] = value;
+    });
+
+    parser.on('file', (fieldname, stream, info) => {
+      if (!isAllowedType(info.filename)) {
+        stream.resume();
+        return fail(Object.assign(
+          new Error(`File type not allowed. Allowed types: ${ALLOWED_FILE_TYPES.join(', ')}`),
+          { status: 415 }
+        ));
+      }
+
+      const index = files.length;
+      files.push(null);
+
+      pending.push(
+        ingest(stream, { filename: info.filename, mimetype: info.mimeType })
+          .then(result => {
+            files[index] = {
+              fieldname,
+              originalName: info.filename,
+              mimetype: info.mimeType,
+              ...result
+            };
+          })
+          .catch(fail)
+      );
+    });
+
+    parser.on('error', fail);
+
+    parser.on('finish', async () => {
+      await Promise.all(pending);
+      if (failed) return;
+
+      if (!files.length) {
+        return res.status(400).json({
+          success: false,
+          message: 'Please attach at least one file'
+        });
+      }
+
+      req.files = files;
+      next();
+    });
+
+    req.pipe(parser);
+  };
+};
+
+module.exports = {
+  receiveFiles
+};
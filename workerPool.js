@@ -0,0 +1,158 @@
+// src/utils/workerPool.js - Fixed-size worker_threads pool for CPU-heavy jobs
+const { Worker, parentPort, isMainThread } = require('worker_threads');
+const os = require('os');
+
+// Pool of workers all running the same script. Each task is a plain
+// object sent to an idle worker; the promise settles with the worker's
+// result. Workers that crash are replaced and their task is failed.
+class WorkerPool {
+  constructor(filename, { size = Math.max(1, Math.min(os.cpus().length - 1, 4)), workerData, resourceLimits } = {}) {
+    this.filename = filename;
+    this.size = size;
+    this.workerData = workerData;
+    this.resourceLimits = resourceLimits;
+
+    this.workers = [];
+    this.idle = [];
+    this.queue = [];
+    this.nextTaskId = 1;
+    this.closed = false;
+
+    for (let i = 0; i < size; i++) {
+      this._spawn();
+    }
+  }
+
+  _spawn() {
+    const worker = new Worker(this.filename, {
+      workerData: this.workerData,
+      resourceLimits: this.resourceLimits
+    });
+    worker.current = null;
+
+    worker.on('message', (message) => {
+      const task = worker.current;
+      if (!task || message.id !== task.id) return;
+
+      if (message.type === 'progress') {
+        if (task.onProgress) task.onProgress(message.value);
+        return;
+      }
+
+      worker.current = null;
+      clearTimeout(task.timer);
+      if (message.type === 'error') {
+        task.reject(Object.assign(new Error(message.error.message), message.error));
+      } else {
+        task.resolve(message.result);
+      }
+      this._release(worker);
+    });
+
+    worker.on('error', (error) => this._replace(worker, error));
+    worker.on('exit', (code) => {
+      if (!this.closed) {
+        this._replace(worker, new Error(`Worker exited with code ${code}`));
+      }
+    });
+
+    this.workers.push(worker);
+    this._release(worker);
+  }
+
+  // Fail the worker's current task and start a fresh worker in its place
+  _replace(worker, error) {
+    if (!this.workers.includes(worker)) return;
+
+    this.workers = this.workers.filter(w => w !== worker);
+    this.idle = this.idle.filter(w => w !== worker);
+
+    if (worker.current) {
+      clearTimeout(worker.current.timer);
+      worker.current.reject(error);
+      worker.current = null;
+    }
+
+    worker.removeAllListeners();
+    worker.terminate().catch(() => {});
+
+    if (!this.closed) this._spawn();
+  }
+
+  _release(worker) {
+    const task = this.queue.shift();
+    if (task) {
+      this._dispatch(worker, task);
+    } else {
+      this.idle.push(worker);
+    }
+  }
+
+  _dispatch(worker, task) {
+    worker.current = task;
+    if (task.timeout) {
+      task.timer = setTimeout(() => {
+        this._replace(worker, Object.assign(new Error(`Task timed out after ${task.timeout}ms`), { code: 'ETIMEDOUT' }));
+      }, task.timeout);
+    }
+    worker.postMessage({ id: task.id, payload: task.payload });
+  }
+
+  // Run a task on the next free worker.
+  // options: { timeout (ms), onProgress (value => void) }
+  run(payload, { timeout, onProgress } = {}) {
+    if (this.closed) {
+      return Promise.reject(new Error('Worker pool is closed'));
+    }
+
+    return new Promise((resolve, reject) => {
+      const task = { id: this.nextTaskId++, payload, timeout, onProgress, resolve, reject };
+      const worker = this.idle.shift();
+      if (worker) {
+        this._dispatch(worker, task);
+      } else {
+        this.queue.push(task);
+      }
+    });
+  }
+
+  // Number of tasks running or waiting
+  get pending() {
+    return this.queue.length + this.workers.filter(w => w.current).length;
+  }
+
+  async close() {
+    this.closed = true;
+    this.queue.splice(0).forEach(task => task.reject(new Error('Worker pool is closed')));
+    await Promise.all(this.workers.map(worker => worker.terminate()));
+    this.workers = [];
+    this.idle = [];
+  }
+}
+
+// Worker-side helper: answer pool tasks with `handler(payload, { progress })`
+const serveTasks = (handler) => {
+  if (isMainThread) {
+    throw new Error('serveTasks must be called from a worker thread');
+  }
+
+  parentPort.on('message', async ({ id, payload }) => {
+    const progress = (value) => parentPort.postMessage({ id, type: 'progress', value });
+
+    try {
+      const result = await handler(payload, { progress });
+      parentPort.postMessage({ id, type: 'result', result });
+    } catch (error) {
+      parentPort.postMessage({
+        id,
+        type: 'error',
+        error: { message: error.message, name: error.name, code: error.code, permanent: error.permanent }
+      });
+    }
+  });
+};
+
+module.exports = {
+  WorkerPool,
+  serveTasks
+};
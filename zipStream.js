@@ -0,0 +1,176 @@
+// src/utils/zipStream.js - Streaming ZIP archive writer
+const zlib = require('zlib');
+const { Readable, Transform, pipeline } = require('stream');
+
+// ZIP32 limits; archives beyond them would need ZIP64 records
+const MAX_ENTRIES = 0xffff;
+const MAX_SIZE = 0xffffffff;
+
+// Bit 3: sizes follow in a data descriptor; bit 11: names are UTF-8
+const FLAGS = 0x0808;
+
+// Formats that are already compressed are stored rather than deflated
+const STORED_EXTENSIONS = new Set(['jpg', 'jpeg', 'png', 'gif', 'zip', 'docx', 'xlsx', 'pptx', 'gz', 'mp4']);
+
+// CRC-32 (zlib.crc32 where available, table-driven otherwise)
+const CRC_TABLE = (() => {
+  const table = new Int32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) {
+      c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    }
+    table[n] = c;
+  }
+  return table;
+})();
+
+const crc32 = zlib.crc32 || ((data, value = 0) => {
+  let crc = ~value;
+  for (let i = 0; i < data.length; i++) {
+    crc = CRC_TABLE[(crc ^ data[i]) & 0xff] ^ (crc >>> 8);
+  }
+  return ~crc >>> 0;
+});
+
+// Helper to convert a Date to MS-DOS time and date fields
+const toDosDateTime = (date) => {
+  const d = date instanceof Date && !isNaN(date) ? date : new Date();
+  const year = Math.max(d.getFullYear(), 1980);
+  return {
+    time: (d.getHours() << 11) | (d.getMinutes() << 5) | Math.floor(d.getSeconds() / 2),
+    date: ((year - 1980) << 9) | ((d.getMonth() + 1) << 5) | d.getDate()
+  };
+};
+
+const localHeader = (name, method, dos) => {
+  const header = Buffer.alloc(30);
+  header.writeUInt32LE(0x04034b50, 0);
+  header.writeUInt16LE(20, 4);
+  header.writeUInt16LE(FLAGS, 6);
+  header.writeUInt16LE(method, 8);
+  header.writeUInt16LE(dos.time, 10);
+  header.writeUInt16LE(dos.date, 12);
+  // CRC and sizes (14-25) are zero; they follow in the data descriptor
+  header.writeUInt16LE(name.length, 26);
+  header.writeUInt16LE(0, 28);
+  return Buffer.concat([header, name]);
+};
+
+const dataDescriptor = (entry) => {
+  const descriptor = Buffer.alloc(16);
+  descriptor.writeUInt32LE(0x08074b50, 0);
+  descriptor.writeUInt32LE(entry.crc, 4);
+  descriptor.writeUInt32LE(entry.compressedSize, 8);
+  descriptor.writeUInt32LE(entry.size, 12);
+  return descriptor;
+};
+
+const centralHeader = (entry) => {
+  const header = Buffer.alloc(46);
+  header.writeUInt32LE(0x02014b50, 0);
+  header.writeUInt16LE(20, 4);
+  header.writeUInt16LE(20, 6);
+  header.writeUInt16LE(FLAGS, 8);
+  header.writeUInt16LE(entry.method, 10);
+  header.writeUInt16LE(entry.dos.time, 12);
+  header.writeUInt16LE(entry.dos.date, 14);
+  header.writeUInt32LE(entry.crc, 16);
+  header.writeUInt32LE(entry.compressedSize, 20);
+  header.writeUInt32LE(entry.size, 24);
+  header.writeUInt16LE(entry.name.length, 28);
+  // Extra, comment, disk, attributes (30-41) are zero
+  header.writeUInt32LE(entry.offset, 42);
+  return Buffer.concat([header, entry.name]);
+};
+
+const endOfCentralDirectory = (count, size, offset) => {
+  const record = Buffer.alloc(22);
+  record.writeUInt32LE(0x06054b50, 0);
+  record.writeUInt16LE(count, 8);
+  record.writeUInt16LE(count, 10);
+  record.writeUInt32LE(size, 12);
+  record.writeUInt32LE(offset, 16);
+  return record;
+};
+
+// Helper to choose stored (0) or deflated (8) for a file name
+const methodFor = (name) => {
+  const extension = name.split('.').pop().toLowerCase();
+  return STORED_EXTENSIONS.has(extension) ? 0 : 8;
+};
+
+async function* generateArchive(entries, { level = zlib.constants.Z_DEFAULT_COMPRESSION } = {}) {
+  const written = [];
+  let offset = 0;
+
+  for await (const entry of entries) {
+    if (written.length >= MAX_ENTRIES) {
+      throw new Error(`ZIP archives are limited to ${MAX_ENTRIES} entries`);
+    }
+
+    const record = {
+      name: Buffer.from(entry.name, 'utf8'),
+      method: entry.method !== undefined ? entry.method : methodFor(entry.name),
+      dos: toDosDateTime(entry.date),
+      offset,
+      crc: 0,
+      size: 0,
+      compressedSize: 0
+    };
+
+    const header = localHeader(record.name, record.method, record.dos);
+    yield header;
+    offset += header.length;
+
+    // CRC and size are taken from the raw bytes on their way to the deflater
+    const tap = new Transform({
+      transform(chunk, encoding, callback) {
+        record.crc = crc32(chunk, record.crc);
+        record.size += chunk.length;
+        callback(null, chunk);
+      }
+    });
+    const stages = [entry.source(), tap];
+    if (record.method === 8) stages.push(zlib.createDeflateRaw({ level }));
+    const body = pipeline(...stages, () => {});
+
+    for await (const chunk of body) {
+      record.compressedSize += chunk.length;
+      yield chunk;
+    }
+    offset += record.compressedSize;
+
+    if (record.size > MAX_SIZE || offset > MAX_SIZE) {
+      throw new Error('ZIP archive exceeds the 4 GB limit');
+    }
+
+    const descriptor = dataDescriptor(record);
+    yield descriptor;
+    offset += descriptor.length;
+
+    written.push(record);
+  }
+
+  const centralOffset = offset;
+  let centralSize = 0;
+  for (const record of written) {
+    const header = centralHeader(record);
+    centralSize += header.length;
+    yield header;
+  }
+
+  yield endOfCentralDirectory(written.length, centralSize, centralOffset);
+}
+
+// Build a ZIP archive as a readable stream. Entries are read one at a time
+// and only as fast as the consumer drains the stream.
+// entries: (async) iterable of { name, source: () => Readable, date?, method? }
+const createZipStream = (entries, options) => Readable.from(generateArchive(entries, options), {
+  objectMode: false
+});
+
+module.exports = {
+  crc32,
+  createZipStream
+};